@@ -1,69 +1,555 @@
 # auto-research-agent/agents/analysis_agent.py
 
+import asyncio
 import os
-import google.generativeai as genai
+import copy
+import hashlib
 import json
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from config import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    ANALYSIS_MODE,
+    ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS,
+    ANALYSIS_CHUNK_TOKENS,
+    ANALYSIS_MAP_CONCURRENCY,
+    ANALYSIS_CACHE_ENABLED,
+    ANALYSIS_CACHE_TTL_SECONDS,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_MAX_MEMORY_BYTES,
+    ANALYSIS_CACHE_DIR,
+    ANALYSIS_CACHE_MAX_DISK_BYTES,
+)
+from utils.cache import TieredCache, build_tiered_cache, make_cache_key
+from utils.context_packer import chunk_content, estimate_tokens
+from utils.json_stream import IncrementalJSONParser
+from utils.lazy import lazy_import
+from utils.metrics import record_gemini_usage, track_call
+from utils.rate_limiter import ProviderLimiter, RateLimitError, get_rate_limiter, is_rate_limit_error
 
-class AnalysisAgent:
+# The Gemini SDK takes most of the app's import time, so it loads when the first agent is built
+genai = lazy_import("google.generativeai")
+
+ANALYSIS_MODES = ("single", "map_reduce", "auto")
+
+def throttle_pause(attempt: int) -> float:
+    """Seconds Gemini calls pause after the `attempt`-th 429 in a row (Gemini sends no Retry-After)."""
+    return min(16.0, 2.0 ** attempt)
+
+@dataclass
+class AnalysisResult:
+    """Insights produced by AnalysisAgent.analyze, plus how they were produced."""
+    insights: dict
+    mode: str
+    chunks: int = 1
+    failed_chunks: int = 0
+    cache_hit: bool = False
+
+    def metadata(self) -> dict:
+        return {
+            "mode": self.mode,
+            "chunks": self.chunks,
+            "failed_chunks": self.failed_chunks,
+            "cache_hit": self.cache_hit,
+        }
+
+def create_analysis_cache() -> TieredCache | None:
+    """Builds the analysis result cache from config, or returns None if it is disabled."""
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+    return build_tiered_cache(
+        ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+        max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+        max_memory_bytes=ANALYSIS_CACHE_MAX_MEMORY_BYTES,
+        disk_dir=ANALYSIS_CACHE_DIR or None,
+        max_disk_bytes=ANALYSIS_CACHE_MAX_DISK_BYTES,
+    )
+
+class AnalysisAgentBase:
     """
-    Agent responsible for analyzing content using the Gemini API.
+    Prompts, caching, mode selection and response parsing shared by
+    AnalysisAgent and AsyncAnalysisAgent; the subclasses call Gemini.
     """
-    def __init__(self):
-        if not GEMINI_API_KEY:
-            raise ValueError("Gemini API key is required.")
-        genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+    def __init__(self, model=None, cache: TieredCache | None = None, limiter: ProviderLimiter | None = None):
+        """
+        Args:
+            model: Optional object with a Gemini-compatible generate_content(prompt)
+                method, or generate_content_async(prompt) for AsyncAnalysisAgent
+                (e.g. a stub for offline tests). Defaults to GEMINI_MODEL.
+            cache: Optional cache for parsed reports. Defaults to one built from
+                the ANALYSIS_CACHE_* settings.
+            limiter: Optional rate limiter for Gemini calls. Defaults to the
+                process-wide "gemini" limiter.
+        """
+        if model is None:
+            if not GEMINI_API_KEY:
+                raise ValueError("Gemini API key is required.")
+            genai.configure(api_key=GEMINI_API_KEY)
+            model = genai.GenerativeModel(GEMINI_MODEL)
+        self.model = model
+        self.model_name = getattr(model, "model_name", None) or GEMINI_MODEL
         self.prompt_template = self._load_prompt_template()
+        self.map_prompt_template = self._load_prompt_template("map_prompt.txt")
+        self.refresh_prompt_template = self._load_prompt_template("refresh_prompt.txt")
+        # Any edit to a prompt changes this version and so invalidates cached reports
+        self.prompt_version = hashlib.sha256(
+            "\0".join((self.prompt_template, self.map_prompt_template, self.refresh_prompt_template)).encode("utf-8")
+        ).hexdigest()[:16]
+        self.cache = cache if cache is not None else create_analysis_cache()
+        self.limiter = limiter if limiter is not None else get_rate_limiter("gemini")
 
-    def _load_prompt_template(self) -> str:
-        """Loads the prompt template from a file."""
+    def _load_prompt_template(self, filename: str = "report_prompt.txt") -> str:
+        """Loads a prompt template from the prompts/ directory."""
         # Get the absolute path to the project root (where main.py is located)
         current_dir = os.path.dirname(os.path.abspath(__file__))
         project_root = os.path.dirname(current_dir)  # Go up one level from agents/
-        
+
         # Build absolute path for prompt template
-        prompt_path = os.path.join(project_root, "prompts", "report_prompt.txt")
-        
+        prompt_path = os.path.join(project_root, "prompts", filename)
+
         print(f"AnalysisAgent: Loading prompt template from: {prompt_path}")
-        
+
         with open(prompt_path, 'r') as f:
             return f.read()
 
-    def run(self, raw_content: str) -> dict:
+    @staticmethod
+    def _resolve_mode(mode: str | None, raw_content: str) -> str:
+        """Defaults the mode to ANALYSIS_MODE and resolves "auto" by content size."""
+        mode = mode or ANALYSIS_MODE
+        if mode == "auto":
+            too_large = estimate_tokens(raw_content or "") > ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS
+            mode = "map_reduce" if too_large else "single"
+        return mode
+
+    def _cached_result(self, mode: str, raw_content: str,
+                       previous_insights: dict | None) -> tuple[str | None, AnalysisResult | None]:
+        """Returns (cache key, cached result); the key is None if the result must not be cached."""
+        if self.cache is None or not raw_content:
+            return None, None
+        cache_key = self._cache_key(mode, raw_content, previous_insights)
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        print("AnalysisAgent: Cache hit, skipping Gemini.")
+        return cache_key, AnalysisResult(
+            insights=copy.deepcopy(cached["insights"]), mode=mode,
+            chunks=cached.get("chunks", 1), failed_chunks=cached.get("failed_chunks", 0),
+            cache_hit=True,
+        )
+
+    def _store_result(self, cache_key: str | None, result: AnalysisResult) -> None:
+        # Only successfully parsed reports are cached, never error results
+        if cache_key is not None and result.insights and "error" not in result.insights:
+            self.cache.set(cache_key, {
+                "insights": result.insights,
+                "chunks": result.chunks,
+                "failed_chunks": result.failed_chunks,
+            })
+
+    def cache_info(self) -> dict | None:
+        """Returns the cache's hit/miss counters and sizes, or None if caching is disabled."""
+        return self.cache.info() if self.cache is not None else None
+
+    def _cache_key(self, mode: str, raw_content: str, previous_insights: dict | None) -> str:
+        parts = ["analysis", self.model_name, self.prompt_version, mode, raw_content]
+        if previous_insights is not None:
+            parts.append(json.dumps(previous_insights, sort_keys=True))
+        return make_cache_key(*parts)
+
+    def _report_prompt(self, raw_content: str, previous_insights: dict | None = None) -> str:
+        """The prompt for the final report call: a fresh report, or an update of `previous_insights`."""
+        if previous_insights is None:
+            return self.prompt_template.replace("{{raw_content}}", raw_content)
+        previous = json.dumps(previous_insights, indent=2, ensure_ascii=False)
+        return self.refresh_prompt_template.replace("{{previous_report}}", previous).replace("{{raw_content}}", raw_content)
+
+    def _parse_response(self, text: str) -> dict:
+        """Parses Gemini's reply as the report JSON, tolerating ```json fences."""
+        # Clean up the response to ensure it's valid JSON
+        cleaned_response = text.strip().replace("```json", "").replace("```", "")
+        return json.loads(cleaned_response)
+
+    def _parse_insights(self, text: str) -> dict:
+        insights = self._parse_response(text)
+
+        print("AnalysisAgent: Successfully parsed Gemini response.")
+        print(f"AnalysisAgent: Response keys: {list(insights.keys())}")
+        print(f"AnalysisAgent: Title: {insights.get('title', 'No title')}")
+        print(f"AnalysisAgent: Has executive_summary: {'executive_summary' in insights}")
+        print(f"AnalysisAgent: Has key_insights: {'key_insights' in insights}")
+        print(f"AnalysisAgent: Has source_analysis: {'source_analysis' in insights}")
+        print(f"AnalysisAgent: Has conclusion: {'conclusion' in insights}")
+
+        return insights
+
+    @staticmethod
+    def _analysis_error(error: Exception, response=None) -> dict:
+        print(f"AnalysisAgent: Error generating or parsing Gemini response: {error}")
+        print(f"AnalysisAgent: Raw response: {response.text if response is not None else 'No response'}")
+        # Fallback or error handling
+        return {"error": "Failed to generate analysis", "details": str(error)}
+
+    def _map_prompt(self, chunk: str) -> str:
+        return self.map_prompt_template.replace("{{raw_content}}", chunk)
+
+    @staticmethod
+    def _chunk_notes(index: int, response) -> str:
+        """A map call's notes (raises on an empty summary)."""
+        notes = response.text.strip()
+        if not notes:
+            raise ValueError("Empty summary")
+        print(f"AnalysisAgent: Summarized chunk {index + 1} ({len(notes)} chars).")
+        return notes
+
+    @staticmethod
+    def _reduce_content(summaries: list[str | None],
+                        rate_limited: RateLimitError | None) -> tuple[str | None, int, int]:
+        """Joins the chunk summaries for the reduce call (see _map_phase)."""
+        succeeded = [s for s in summaries if s]
+        failed = len(summaries) - len(succeeded)
+        if not succeeded:
+            if rate_limited is not None:
+                raise rate_limited
+            return None, len(summaries), failed
+
+        reduce_content = "\n\n".join(
+            f"Summary of source excerpt {i + 1}:\n{s}" for i, s in enumerate(summaries) if s
+        )
+        if failed:
+            reduce_content += f"\n\n(Note: {failed} of {len(summaries)} excerpts could not be summarized.)"
+        return reduce_content, len(summaries), failed
+
+    @staticmethod
+    def _map_failure(chunks: int, failed: int) -> AnalysisResult:
+        return AnalysisResult(
+            insights={"error": "Failed to generate analysis", "details": "All chunk summaries failed."},
+            mode="map_reduce", chunks=chunks, failed_chunks=failed,
+        )
+
+class AnalysisAgent(AnalysisAgentBase):
+    """
+    Agent responsible for analyzing content using the Gemini API.
+
+    Two modes are supported: "single" sends all content in one call, while
+    "map_reduce" summarizes chunks with concurrent calls and builds the report
+    from the summaries (for large document sets). Given a previous report, the
+    final call updates that report with the content instead of writing a new one
+    (prompts/refresh_prompt.txt).
+
+    Every Gemini call takes a slot from the shared Gemini limiter first; calls
+    answered with 429 are retried until the limiter's deadline, after which
+    RateLimitError propagates to the caller.
+    """
+    def run(self, raw_content: str, mode: str | None = None) -> dict:
         """
         Analyzes the raw content with Gemini and returns structured JSON.
 
         Args:
             raw_content: The consolidated text from the ResearchAgent.
+            mode: "single", "map_reduce" or "auto" (defaults to ANALYSIS_MODE).
 
         Returns:
             A dictionary containing the structured insights from Gemini.
         """
+        return self.analyze(raw_content, mode).insights
+
+    def analyze(self, raw_content: str, mode: str | None = None,
+                previous_insights: dict | None = None) -> AnalysisResult:
+        """
+        Analyzes the raw content and reports which mode was used.
+
+        Args:
+            raw_content: The consolidated text from the ResearchAgent.
+            mode: "single", "map_reduce" or "auto" (defaults to ANALYSIS_MODE).
+            previous_insights: An earlier report to update with the content
+                (only new or changed material) instead of starting over.
+
+        Returns:
+            An AnalysisResult whose insights are the report JSON (or an error dict).
+        """
+        mode = self._resolve_mode(mode, raw_content) if raw_content else "single"
+        cache_key, cached = self._cached_result(mode, raw_content, previous_insights)
+        if cached is not None:
+            return cached
+
+        if mode == "map_reduce":
+            result = self._analyze_map_reduce(raw_content, previous_insights)
+        else:
+            result = AnalysisResult(insights=self._analyze_single(raw_content, previous_insights), mode="single")
+        self._store_result(cache_key, result)
+        return result
+
+    def _generate(self, prompt: str, operation: str):
+        """
+        Calls Gemini within the rate limits, recording latency, characters and tokens.
+
+        Raises:
+            RateLimitError: If the call could not be made (or kept getting 429s)
+                before the limiter's deadline.
+        """
+        deadline = self.limiter.deadline()
+        attempt = 0
+        while True:
+            with self.limiter.acquire(estimate_tokens(prompt), deadline) as permit:
+                try:
+                    with track_call("gemini", operation) as call:
+                        response = self.model.generate_content(prompt)
+                        call.add_bytes(sent=len(prompt), received=len(response.text))
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    permit.throttled(throttle_pause(attempt))
+                    print(f"AnalysisAgent: Gemini rate limited {operation} (attempt {attempt + 1}); retrying.")
+                else:
+                    used = record_gemini_usage(response)
+                    if used is not None:
+                        permit.record_tokens(used)
+                    return response
+            attempt += 1
+
+    def _analyze_single(self, raw_content: str, previous_insights: dict | None = None) -> dict:
         print("AnalysisAgent: Analyzing content with Gemini...")
         if not raw_content:
             print("AnalysisAgent: No content to analyze.")
             return {}
 
-        prompt = self.prompt_template.replace("{{raw_content}}", raw_content)
+        prompt = self._report_prompt(raw_content, previous_insights)
 
         try:
-            response = self.model.generate_content(prompt)
-            # Clean up the response to ensure it's valid JSON
-            cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-            insights = json.loads(cleaned_response)
-            
-            print("AnalysisAgent: Successfully parsed Gemini response.")
-            print(f"AnalysisAgent: Response keys: {list(insights.keys())}")
-            print(f"AnalysisAgent: Title: {insights.get('title', 'No title')}")
-            print(f"AnalysisAgent: Has executive_summary: {'executive_summary' in insights}")
-            print(f"AnalysisAgent: Has key_insights: {'key_insights' in insights}")
-            print(f"AnalysisAgent: Has source_analysis: {'source_analysis' in insights}")
-            print(f"AnalysisAgent: Has conclusion: {'conclusion' in insights}")
-            
-            return insights
+            response = self._generate(prompt, "analyze")
+            return self._parse_insights(response.text)
+        except RateLimitError:
+            raise
         except Exception as e:
-            print(f"AnalysisAgent: Error generating or parsing Gemini response: {e}")
-            print(f"AnalysisAgent: Raw response: {response.text if 'response' in locals() else 'No response'}")
-            # Fallback or error handling
-            return {"error": "Failed to generate analysis", "details": str(e)}
\ No newline at end of file
+            return self._analysis_error(e, response if 'response' in locals() else None)
+
+    def _summarize_chunk(self, index: int, chunk: str) -> str:
+        """Map step: returns plain-text notes for one chunk (raises on failure)."""
+        response = self._generate(self._map_prompt(chunk), "summarize_chunk")
+        return self._chunk_notes(index, response)
+
+    def _map_phase(self, raw_content: str) -> tuple[str | None, int, int]:
+        """
+        Summarizes chunks concurrently and joins the summaries for the reduce call.
+
+        Returns:
+            (reduce_content, chunks, failed_chunks); reduce_content is None if no
+            chunk could be summarized.
+
+        Raises:
+            RateLimitError: If no chunk was summarized because Gemini's quota ran out.
+        """
+        chunks = chunk_content(raw_content, ANALYSIS_CHUNK_TOKENS)
+        print(f"AnalysisAgent: Map-reduce over {len(chunks)} chunks "
+              f"(concurrency {ANALYSIS_MAP_CONCURRENCY})...")
+
+        summaries, rate_limited = [None] * len(chunks), None
+        with ThreadPoolExecutor(max_workers=min(ANALYSIS_MAP_CONCURRENCY, len(chunks)),
+                                thread_name_prefix="analysis-map") as executor:
+            futures = [executor.submit(self._summarize_chunk, i, chunk) for i, chunk in enumerate(chunks)]
+            for i, future in enumerate(futures):
+                try:
+                    summaries[i] = future.result()
+                except Exception as e:
+                    print(f"AnalysisAgent: Failed to summarize chunk {i + 1}: {e}")
+                    if isinstance(e, RateLimitError):
+                        rate_limited = e
+        return self._reduce_content(summaries, rate_limited)
+
+    def _analyze_map_reduce(self, raw_content: str, previous_insights: dict | None = None) -> AnalysisResult:
+        """
+        Summarizes chunks concurrently (map), then builds the report JSON from the
+        summaries with the regular report prompt (reduce).
+
+        Chunks whose summary fails are skipped; the report is only an error if no
+        chunk could be summarized or the reduce call fails.
+        """
+        reduce_content, chunks, failed = self._map_phase(raw_content)
+        if reduce_content is None:
+            return self._map_failure(chunks, failed)
+        insights = self._analyze_single(reduce_content, previous_insights)
+        return AnalysisResult(insights=insights, mode="map_reduce", chunks=chunks, failed_chunks=failed)
+
+    def stream(self, raw_content: str, mode: str | None = None, previous_insights: dict | None = None):
+        """
+        Analyzes the content while streaming Gemini's output, yielding report fields as they complete.
+        `previous_insights` works as in analyze().
+
+        Yields:
+            ("item", key, index, value) for each completed element of a list field
+            (e.g. every key_insights entry), ("field", key, value) for each completed
+            top-level field, and finally ("result", AnalysisResult).
+        """
+        mode = self._resolve_mode(mode, raw_content)
+        if not raw_content:
+            yield ("result", AnalysisResult(insights={}, mode="single"))
+            return
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(mode, raw_content, previous_insights)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("AnalysisAgent: Cache hit, streaming cached report.")
+                insights = copy.deepcopy(cached["insights"])
+                for key, value in insights.items():
+                    if isinstance(value, list):
+                        for index, item in enumerate(value):
+                            yield ("item", key, index, item)
+                    yield ("field", key, value)
+                yield ("result", AnalysisResult(
+                    insights=insights, mode=mode, chunks=cached.get("chunks", 1),
+                    failed_chunks=cached.get("failed_chunks", 0), cache_hit=True,
+                ))
+                return
+
+        chunks, failed = 1, 0
+        content = raw_content
+        if mode == "map_reduce":
+            content, chunks, failed = self._map_phase(raw_content)
+            if content is None:
+                yield ("result", self._map_failure(chunks, failed))
+                return
+
+        print("AnalysisAgent: Streaming analysis from Gemini...")
+        prompt = self._report_prompt(content, previous_insights)
+        parser = IncrementalJSONParser()
+        text = []
+        try:
+            deadline, attempt = self.limiter.deadline(), 0
+            while True:
+                chunk = None
+                with self.limiter.acquire(estimate_tokens(prompt), deadline) as permit:
+                    try:
+                        with track_call("gemini", "analyze_stream") as call:
+                            for chunk in self.model.generate_content(prompt, stream=True):
+                                piece = chunk.text
+                                text.append(piece)
+                                for event in parser.feed(piece):
+                                    yield event
+                            call.add_bytes(sent=len(prompt), received=sum(len(piece) for piece in text))
+                    except Exception as e:
+                        # Only a stream that has not emitted anything yet can be retried
+                        if text or not is_rate_limit_error(e):
+                            raise
+                        permit.throttled(throttle_pause(attempt))
+                        print(f"AnalysisAgent: Gemini rate limited the stream (attempt {attempt + 1}); retrying.")
+                        attempt += 1
+                        continue
+                    # The final chunk carries the usage totals for the whole stream
+                    used = record_gemini_usage(chunk)
+                    if used is not None:
+                        permit.record_tokens(used)
+                break
+            insights = parser.result if parser.done else self._parse_response("".join(text))
+        except RateLimitError:
+            raise
+        except Exception as e:
+            print(f"AnalysisAgent: Error streaming or parsing Gemini response: {e}")
+            insights = {"error": "Failed to generate analysis", "details": str(e)}
+
+        result = AnalysisResult(insights=insights, mode=mode, chunks=chunks, failed_chunks=failed)
+        if cache_key is not None and insights and "error" not in insights:
+            self.cache.set(cache_key, {"insights": insights, "chunks": chunks, "failed_chunks": failed})
+        yield ("result", result)
+
+class AsyncAnalysisAgent(AnalysisAgentBase):
+    """
+    Analysis agent for the asyncio pipeline, with AnalysisAgent's methods as coroutines.
+
+    Gemini calls go through the model's generate_content_async, and limiter
+    waits and 429 pauses use acquire_async, so a report waiting on Gemini holds
+    no thread. Map-reduce summarizes chunks as tasks, at most
+    ANALYSIS_MAP_CONCURRENCY at a time per report. Prompts, caching and parsing
+    come from AnalysisAgentBase. Streaming stays with AnalysisAgent.
+    """
+    async def _generate(self, prompt: str, operation: str):
+        """Like AnalysisAgent._generate(), waiting for the limiter on the event loop."""
+        deadline = self.limiter.deadline()
+        attempt = 0
+        while True:
+            with await self.limiter.acquire_async(estimate_tokens(prompt), deadline) as permit:
+                try:
+                    with track_call("gemini", operation) as call:
+                        response = await self.model.generate_content_async(prompt)
+                        call.add_bytes(sent=len(prompt), received=len(response.text))
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    permit.throttled(throttle_pause(attempt))
+                    print(f"AnalysisAgent: Gemini rate limited {operation} (attempt {attempt + 1}); retrying.")
+                else:
+                    used = record_gemini_usage(response)
+                    if used is not None:
+                        permit.record_tokens(used)
+                    return response
+            attempt += 1
+
+    async def run(self, raw_content: str, mode: str | None = None) -> dict:
+        """Like AnalysisAgent.run(), as a coroutine."""
+        return (await self.analyze(raw_content, mode)).insights
+
+    async def analyze(self, raw_content: str, mode: str | None = None,
+                      previous_insights: dict | None = None) -> AnalysisResult:
+        """Like AnalysisAgent.analyze(), as a coroutine."""
+        mode = self._resolve_mode(mode, raw_content) if raw_content else "single"
+        cache_key, cached = self._cached_result(mode, raw_content, previous_insights)
+        if cached is not None:
+            return cached
+
+        if mode == "map_reduce":
+            result = await self._analyze_map_reduce(raw_content, previous_insights)
+        else:
+            result = AnalysisResult(insights=await self._analyze_single(raw_content, previous_insights), mode="single")
+        self._store_result(cache_key, result)
+        return result
+
+    async def _analyze_single(self, raw_content: str, previous_insights: dict | None = None) -> dict:
+        print("AnalysisAgent: Analyzing content with Gemini...")
+        if not raw_content:
+            print("AnalysisAgent: No content to analyze.")
+            return {}
+
+        prompt = self._report_prompt(raw_content, previous_insights)
+        response = None
+        try:
+            response = await self._generate(prompt, "analyze")
+            return self._parse_insights(response.text)
+        except RateLimitError:
+            raise
+        except Exception as e:
+            return self._analysis_error(e, response)
+
+    async def _summarize_chunk(self, index: int, chunk: str) -> str:
+        response = await self._generate(self._map_prompt(chunk), "summarize_chunk")
+        return self._chunk_notes(index, response)
+
+    async def _map_phase(self, raw_content: str) -> tuple[str | None, int, int]:
+        """Like AnalysisAgent._map_phase(), with the chunks summarized as tasks."""
+        chunks = chunk_content(raw_content, ANALYSIS_CHUNK_TOKENS)
+        print(f"AnalysisAgent: Map-reduce over {len(chunks)} chunks "
+              f"(concurrency {ANALYSIS_MAP_CONCURRENCY})...")
+        semaphore = asyncio.Semaphore(ANALYSIS_MAP_CONCURRENCY)
+
+        async def summarize(index: int, chunk: str) -> str:
+            async with semaphore:
+                return await self._summarize_chunk(index, chunk)
+
+        outcomes = await asyncio.gather(*(summarize(i, c) for i, c in enumerate(chunks)), return_exceptions=True)
+        summaries, rate_limited = [], None
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"AnalysisAgent: Failed to summarize chunk {i + 1}: {outcome}")
+                if isinstance(outcome, RateLimitError):
+                    rate_limited = outcome
+                outcome = None
+            summaries.append(outcome)
+        return self._reduce_content(summaries, rate_limited)
+
+    async def _analyze_map_reduce(self, raw_content: str, previous_insights: dict | None = None) -> AnalysisResult:
+        reduce_content, chunks, failed = await self._map_phase(raw_content)
+        if reduce_content is None:
+            return self._map_failure(chunks, failed)
+        insights = await self._analyze_single(reduce_content, previous_insights)
+        return AnalysisResult(insights=insights, mode="map_reduce", chunks=chunks, failed_chunks=failed)
@@ -1,22 +1,30 @@
 # auto-research-agent/agents/delivery_agent.py
 
+import asyncio
+import base64
+import hashlib
 import os
-from config import GCS_REPORTS_BUCKET
+from concurrent.futures import ThreadPoolExecutor
+from config import GCS_REPORTS_BUCKET, DELIVERY_MAX_CONCURRENCY
+from utils.api_clients import get_storage_client
+from utils.metrics import track_call
+
+PDF_CONTENT_TYPE = "application/pdf"
 
 class DeliveryAgent:
     """
     Agent responsible for delivering the final report by uploading it to GCS.
+
+    Uploads set the public-read ACL in the same request (predefined_acl) instead
+    of a separate make_public() call, and are verified against an MD5 checksum
+    computed locally.
     """
-    def __init__(self):
+    def __init__(self, storage_client=None):
         # Make GCS client optional to avoid authentication errors
-        self.storage_client = None
-        try:
-            from google.cloud import storage
-            self.storage_client = storage.Client()
-        except Exception as e:
-            print(f"Warning: Google Cloud Storage not available: {e}")
+        self.storage_client = storage_client or get_storage_client()
+        if not self.storage_client:
             print("GCS upload will be disabled. Reports will only be saved locally.")
-        
+
         self.bucket_name = GCS_REPORTS_BUCKET
 
     def run(self, local_pdf_path: str) -> str | None:
@@ -40,18 +48,116 @@ class DeliveryAgent:
 
         print(f"DeliveryAgent: Uploading {local_pdf_path} to GCS bucket {self.bucket_name}...")
         try:
-            bucket = self.storage_client.bucket(self.bucket_name)
-            blob_name = os.path.basename(local_pdf_path)
-            blob = bucket.blob(blob_name)
+            with open(local_pdf_path, "rb") as f:
+                pdf_bytes = f.read()
+            return self._upload(os.path.basename(local_pdf_path), pdf_bytes)
+        except Exception as e:
+            print(f"DeliveryAgent: Failed to upload to GCS. Error: {e}")
+            return None
 
-            blob.upload_from_filename(local_pdf_path)
+    def deliver_bytes(self, pdf_bytes: bytes, filename: str) -> str | None:
+        """
+        Uploads an in-memory PDF to GCS without touching the local disk.
 
-            # Make the blob publicly accessible (adjust permissions as needed for production)
-            blob.make_public()
-            
-            print(f"DeliveryAgent: Upload successful. Public URL: {blob.public_url}")
-            return blob.public_url
+        Args:
+            pdf_bytes: The rendered PDF.
+            filename: The object name to upload it as.
 
+        Returns:
+            The public GCS URL of the uploaded file, or None on failure.
+        """
+        if not pdf_bytes:
+            print("DeliveryAgent: No PDF data provided. Skipping delivery.")
+            return None
+
+        if not self.storage_client:
+            print("DeliveryAgent: GCS client not available. Skipping in-memory delivery.")
+            return None
+
+        print(f"DeliveryAgent: Uploading {filename} ({len(pdf_bytes)} bytes) to GCS bucket {self.bucket_name}...")
+        try:
+            return self._upload(filename, pdf_bytes)
         except Exception as e:
-            print(f"DeliveryAgent: Failed to upload to GCS. Error: {e}")
-            return None
\ No newline at end of file
+            print(f"DeliveryAgent: Failed to upload {filename} to GCS. Error: {e}")
+            return None
+
+    def deliver_many(self, reports: list[tuple[str, bytes]], max_concurrency: int | None = None) -> list[str | None]:
+        """
+        Uploads many in-memory PDFs concurrently (e.g. for bulk exports).
+
+        Args:
+            reports: (filename, pdf_bytes) pairs.
+            max_concurrency: Maximum uploads in flight (defaults to DELIVERY_MAX_CONCURRENCY).
+
+        Returns:
+            The public URL of each report, in input order (None for failed uploads).
+        """
+        if not reports:
+            return []
+        workers = max(1, min(max_concurrency or DELIVERY_MAX_CONCURRENCY, len(reports)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="delivery") as executor:
+            urls = list(executor.map(lambda report: self.deliver_bytes(report[1], report[0]), reports))
+        print(f"DeliveryAgent: Delivered {sum(1 for url in urls if url)}/{len(reports)} reports.")
+        return urls
+
+    def _upload(self, blob_name: str, pdf_bytes: bytes) -> str:
+        """Uploads the bytes as a public object and verifies the stored checksum; raises on failure."""
+        bucket = self.storage_client.bucket(self.bucket_name)
+        blob = bucket.blob(blob_name)
+        md5 = base64.b64encode(hashlib.md5(pdf_bytes).digest()).decode("ascii")
+
+        try:
+            # One request: content, ACL and an MD5 check by the client library
+            with track_call("gcs", "upload") as call:
+                blob.upload_from_string(pdf_bytes, content_type=PDF_CONTENT_TYPE,
+                                        predefined_acl="publicRead", checksum="md5")
+                call.add_bytes(sent=len(pdf_bytes))
+        except Exception as e:
+            if getattr(e, "code", None) != 400:
+                raise
+            # Buckets with uniform bucket-level access reject per-object ACLs;
+            # upload plainly and fall back to the separate make_public() call
+            print(f"DeliveryAgent: Bucket rejected the upload ACL ({e}); uploading without it.")
+            with track_call("gcs", "upload") as call:
+                blob.upload_from_string(pdf_bytes, content_type=PDF_CONTENT_TYPE, checksum="md5")
+                call.add_bytes(sent=len(pdf_bytes))
+            with track_call("gcs", "make_public"):
+                blob.make_public()
+
+        if blob.md5_hash and blob.md5_hash != md5:
+            raise ValueError(f"Checksum mismatch for {blob_name}: expected {md5}, stored {blob.md5_hash}")
+
+        print(f"DeliveryAgent: Upload successful. Public URL: {blob.public_url}")
+        return blob.public_url
+
+class AsyncDeliveryAgent:
+    """
+    Delivery agent for the asyncio pipeline.
+
+    The GCS SDK has no async API, so uploads are DeliveryAgent.deliver_bytes()
+    calls on one executor shared by every report (DELIVERY_MAX_CONCURRENCY
+    threads by default); the event loop only awaits them.
+    """
+    def __init__(self, storage_client=None, executor=None, delivery_agent: DeliveryAgent | None = None):
+        self.delivery_agent = delivery_agent or DeliveryAgent(storage_client)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=DELIVERY_MAX_CONCURRENCY, thread_name_prefix="delivery"
+        )
+
+    async def deliver_bytes(self, pdf_bytes: bytes, filename: str) -> str | None:
+        """Uploads an in-memory PDF like DeliveryAgent.deliver_bytes(), off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.delivery_agent.deliver_bytes, pdf_bytes, filename)
+
+    async def deliver_many(self, reports: list[tuple[str, bytes]]) -> list[str | None]:
+        """Uploads many in-memory PDFs like DeliveryAgent.deliver_many(); concurrency is bounded by the executor."""
+        urls = await asyncio.gather(*(self.deliver_bytes(pdf_bytes, filename) for filename, pdf_bytes in reports))
+        if reports:
+            print(f"DeliveryAgent: Delivered {sum(1 for url in urls if url)}/{len(reports)} reports.")
+        return list(urls)
+
+    def close(self) -> None:
+        """Shuts down the upload executor if this agent created it."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -2,15 +2,17 @@
 
 import os
 import uuid
-from config import REPORT_TEMPLATE_PATH, TEMP_DIR
-from utils.pdf_generator import generate_pdf_from_template
+from config import REPORT_TEMPLATE_PATH, TEMP_DIR, PDF_RENDER_PROCESSES, PDF_RENDER_TIMEOUT_SECONDS
+from utils.pdf_generator import generate_pdf_from_template, get_report_renderer
+from utils.render_pool import RenderError, RenderPool, get_render_pool
 
 class ReportingAgent:
     """
     Agent responsible for creating a styled PDF report from structured data.
-    It uses a utility function to handle the actual PDF generation.
+    It uses a utility function to handle the actual PDF generation, or a pool
+    of render processes when PDF_RENDER_PROCESSES is set.
     """
-    def __init__(self):
+    def __init__(self, render_pool: RenderPool | None = None):
         # Get the absolute path to the project root (where main.py is located)
         # This ensures template paths work regardless of current working directory
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +21,19 @@ class ReportingAgent:
         # Build absolute paths for templates
         self.template_dir = os.path.join(project_root, "templates")
         self.template_name = "report_template.html"
+        # Build the shared renderer (styles, Jinja2 environment) now rather than on the first report
+        self.renderer = get_report_renderer(self.template_dir, self.template_name)
+        if render_pool is None and PDF_RENDER_PROCESSES > 0:
+            render_pool = get_render_pool(
+                self.template_dir, self.template_name, PDF_RENDER_PROCESSES, PDF_RENDER_TIMEOUT_SECONDS
+            )
+        self.render_pool = render_pool
+
+    @staticmethod
+    def report_filename(query: str) -> str:
+        """Generates a unique, safe filename for a report on the query."""
+        safe_query = "".join(c for c in query if c.isalnum()).lower()
+        return f"report_{safe_query[:20]}_{uuid.uuid4().hex[:6]}.pdf"
 
     def run(self, insights_data: dict, query: str) -> str | None:
         """
@@ -36,15 +51,21 @@ class ReportingAgent:
             print("ReportingAgent: Invalid data received, skipping PDF generation.")
             return None
 
-        # Generate a unique, safe filename
-        safe_query = "".join(c for c in query if c.isalnum()).lower()
-        filename = f"report_{safe_query[:20]}_{uuid.uuid4().hex[:6]}.pdf"
-        output_path = os.path.join(TEMP_DIR, filename)
+        output_path = os.path.join(TEMP_DIR, self.report_filename(query))
 
         print(f"ReportingAgent: Template directory: {self.template_dir}")
         print(f"ReportingAgent: Template name: {self.template_name}")
         print(f"ReportingAgent: Output path: {output_path}")
 
+        if self.render_pool is not None:
+            try:
+                self.render_pool.render(insights_data, output_path)
+                print(f"ReportingAgent: PDF rendered in worker process.")
+                return output_path
+            except RenderError as e:
+                print(f"ReportingAgent: PDF generation failed: {e}")
+                return None
+
         # Call the utility function to do the heavy lifting
         success = generate_pdf_from_template(
             data=insights_data,
@@ -58,4 +79,32 @@ class ReportingAgent:
             return output_path
         else:
             print(f"ReportingAgent: PDF generation failed.")
-            return None
\ No newline at end of file
+            return None
+
+    def render_bytes(self, insights_data: dict, query: str) -> tuple[str, bytes] | None:
+        """
+        Renders the PDF report in memory, without writing a temp file.
+
+        Args:
+            insights_data: The structured JSON data from the AnalysisAgent.
+            query: The original user query, used for naming the file.
+
+        Returns:
+            (filename, pdf_bytes), or None on failure.
+        """
+        print("ReportingAgent: Generating PDF report in memory...")
+        if not insights_data or "error" in insights_data:
+            print("ReportingAgent: Invalid data received, skipping PDF generation.")
+            return None
+
+        filename = self.report_filename(query)
+        try:
+            if self.render_pool is not None:
+                pdf_bytes = self.render_pool.render(insights_data)
+            else:
+                pdf_bytes = self.renderer.render_to_bytes(insights_data)
+        except Exception as e:
+            print(f"ReportingAgent: PDF generation failed: {e}")
+            return None
+        print(f"ReportingAgent: Rendered {filename} ({len(pdf_bytes)} bytes).")
+        return filename, pdf_bytes
@@ -1,70 +1,474 @@
 # auto-research-agent/agents/research_agent.py
 
-from utils.api_clients import WebSearchClient
-from config import GCS_SOURCE_BUCKET
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from utils.api_clients import AsyncWebSearchClient, WebSearchClient, format_search_results, get_storage_client
+from utils.metrics import track_call
+from utils.rate_limiter import RateLimitError
+from config import (
+    GCS_SOURCE_BUCKET,
+    GCS_READ_MAX_CONCURRENCY,
+    GCS_READ_TIMEOUT_SECONDS,
+    RESEARCH_FAN_OUT,
+    RESEARCH_MAX_FAN_OUT,
+    RESEARCH_MAX_CONCURRENCY,
+    RESEARCH_PER_QUERY_TIMEOUT_SECONDS,
+    RESEARCH_RESULTS_PER_QUERY,
+    RESEARCH_SUB_QUERY_TEMPLATES,
+)
 
-class ResearchAgent:
+def parse_gcs_path(path: str) -> tuple[str, str]:
     """
-    Agent responsible for gathering information from web searches and GCS documents.
+    Splits a document path into (bucket, blob name).
+
+    Full URIs ('gs://bucket/dir/file.txt') name their own bucket; bare object
+    names ('dir/file.txt') are read from GCS_SOURCE_BUCKET.
+
+    Raises:
+        ValueError: If the path has no object name or no bucket can be determined.
     """
-    def __init__(self):
-        self.search_client = WebSearchClient()
+    if path.startswith("gs://"):
+        bucket_name, _, blob_name = path[len("gs://"):].partition("/")
+    else:
+        bucket_name, blob_name = GCS_SOURCE_BUCKET, path.lstrip("/")
+    if not bucket_name:
+        raise ValueError(f"No bucket in '{path}' and GCS_SOURCE_BUCKET is not set.")
+    if not blob_name:
+        raise ValueError(f"No object name in '{path}'.")
+    return bucket_name, blob_name
+
+@dataclass
+class DocumentResult:
+    """Outcome of reading one source document."""
+    path: str
+    bucket: str | None = None
+    blob_name: str | None = None
+    content: str | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class ResearchResult:
+    """Everything gathered by ResearchAgent.gather for one request."""
+    content: str
+    documents: list[DocumentResult] = field(default_factory=list)
+
+    @property
+    def document_errors(self) -> list[dict]:
+        return [{"path": d.path, "error": d.error} for d in self.documents if not d.ok]
+
+class ResearchAgentBase:
+    """
+    Query expansion, result merging, document bookkeeping and consolidation
+    shared by ResearchAgent and AsyncResearchAgent; the subclasses do the I/O.
+    """
+    def __init__(self, search_client, storage_client=None):
+        self.search_client = search_client
         # Make GCS client optional to avoid authentication errors
-        self.storage_client = None
-        try:
-            from google.cloud import storage
-            self.storage_client = storage.Client()
-        except Exception as e:
-            print(f"Warning: Google Cloud Storage not available: {e}")
+        self.storage_client = storage_client or get_storage_client()
+        if not self.storage_client:
             print("GCS document reading will be disabled. Only web search will work.")
 
+    @staticmethod
+    def expand_query(query: str, fan_out: int, sub_queries: list[str] | None = None) -> list[str]:
+        """
+        Expands a query into at most `fan_out` distinct search queries.
+
+        The original query always comes first. Caller-supplied sub-queries are used
+        as given; otherwise the configured templates ("latest", "risks", ...) are
+        applied to the query.
+        """
+        candidates = [query] + list(sub_queries or [])
+        if not sub_queries:
+            candidates += [template.format(query=query) for template in RESEARCH_SUB_QUERY_TEMPLATES]
+
+        expanded, seen = [], set()
+        for candidate in candidates:
+            key = " ".join(candidate.lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                expanded.append(candidate)
+            if len(expanded) >= fan_out:
+                break
+        return expanded
+
+    @staticmethod
+    def merge_results(queries: list[str], result_lists: list[list[dict]]) -> str:
+        """Interleaves the searches' results by rank, keeps each URL once, and formats them."""
+        merged, seen_urls = [], set()
+        for rank in range(max((len(r) for r in result_lists), default=0)):
+            for results in result_lists:
+                if rank >= len(results):
+                    continue
+                item = results[rank]
+                url = item.get("link") or item.get("title")
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                merged.append(item)
+        print(f"ResearchAgent: Merged {len(merged)} unique results from {len(result_lists)}/{len(queries)} searches.")
+        return format_search_results(merged)
+
+    def _prepare_documents(self, gcs_paths: list[str]) -> tuple[list[DocumentResult], dict]:
+        """
+        Parses the paths into DocumentResults and opens each bucket once.
+
+        Paths that cannot be read (bad path, no GCS client) already have `error` set.
+        """
+        if not gcs_paths:
+            return [], {}
+
+        if not self.storage_client:
+            print("ResearchAgent: GCS client not available. Skipping GCS document reading.")
+            return [DocumentResult(path=path, error="GCS client not available") for path in gcs_paths], {}
+
+        print(f"ResearchAgent: Reading {len(gcs_paths)} GCS documents: {gcs_paths}...")
+        results = [DocumentResult(path=path) for path in gcs_paths]
+        buckets = {}
+        for result in results:
+            try:
+                result.bucket, result.blob_name = parse_gcs_path(result.path)
+            except ValueError as e:
+                result.error = str(e)
+                continue
+            if result.bucket not in buckets:
+                buckets[result.bucket] = self.storage_client.bucket(result.bucket)
+        return results, buckets
+
+    @staticmethod
+    def _download(buckets: dict, result: DocumentResult) -> str:
+        blob = buckets[result.bucket].blob(result.blob_name)
+        with track_call("gcs", "download") as call:
+            text = blob.download_as_text(timeout=GCS_READ_TIMEOUT_SECONDS)
+            call.add_bytes(received=len(text))
+        return text
+
+    @staticmethod
+    def _report_errors(results: list[DocumentResult]) -> list[DocumentResult]:
+        for result in results:
+            if not result.ok:
+                print(f"Error reading GCS file {result.path}: {result.error}")
+        return results
+
+    def _queries(self, query: str, fan_out: int | None, sub_queries: list[str] | None) -> list[str]:
+        if fan_out is None:
+            fan_out = len(sub_queries) + 1 if sub_queries else RESEARCH_FAN_OUT
+        fan_out = max(1, min(fan_out, RESEARCH_MAX_FAN_OUT))
+        return self.expand_query(query, fan_out, sub_queries)
+
+    def consolidate(self, query: str, web_content: str, documents: list[DocumentResult]) -> ResearchResult:
+        """Joins web results and readable documents into the text handed to analysis."""
+        doc_content = "\n".join(
+            f"Source Document: {d.blob_name}\n{d.content}\n---" for d in documents if d.ok
+        )
+
+        consolidated_content = f"Web Search Results for query '{query}':\n{web_content}\n\n"
+        if doc_content:
+            consolidated_content += f"Internal Document Content:\n{doc_content}"
+
+        print(f"ResearchAgent: Completed. Total content length: {len(consolidated_content)} chars.")
+        return ResearchResult(content=consolidated_content, documents=documents)
+
+class ResearchAgent(ResearchAgentBase):
+    """
+    Agent responsible for gathering information from web searches and GCS documents.
+
+    Instances hold no per-run state, so a single agent can serve concurrent requests.
+    """
+    def __init__(self, search_client: WebSearchClient | None = None, storage_client=None):
+        super().__init__(search_client or WebSearchClient(), storage_client)
+
     def _search_web(self, query: str) -> str:
         """Performs a web search for the given query."""
         print(f"ResearchAgent: Searching web for '{query}'...")
         return self.search_client.search(query)
 
-    def _read_gcs_documents(self, gcs_paths: list[str]) -> str:
-        """Reads content from a list of GCS document paths."""
-        if not gcs_paths:
-            return ""
-        
-        if not self.storage_client:
-            print("ResearchAgent: GCS client not available. Skipping GCS document reading.")
-            return ""
+    def _search_web_fan_out(self, queries: list[str], per_query_timeout: float) -> str:
+        """
+        Runs the queries concurrently and merges their results by URL.
+
+        Results are interleaved by rank (every query's top hit first), and a URL
+        returned by several queries is kept once. Each query gets
+        `per_query_timeout` from the moment it starts; queries that fail or run
+        past their deadline are skipped, as are queries still queued behind
+        timed-out ones. If every query was refused by the Serper rate limiter,
+        its RateLimitError is raised.
+        """
+        print(f"ResearchAgent: Fanning out {len(queries)} searches: {queries}")
+        workers = min(RESEARCH_MAX_CONCURRENCY, len(queries))
+        changed = threading.Condition()
+        started: dict[int, float] = {}
+
+        def search(index: int, q: str) -> list[dict]:
+            with changed:
+                started[index] = time.monotonic()
+                changed.notify()
+            return self.search_client.search_results(q, RESEARCH_RESULTS_PER_QUERY)
+
+        def finished(_future) -> None:
+            with changed:
+                changed.notify()
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research-search")
+        try:
+            futures = [executor.submit(search, i, q) for i, q in enumerate(queries)]
+            for future in futures:
+                future.add_done_callback(finished)
+            with changed:
+                while True:
+                    now = time.monotonic()
+                    pending = [i for i, future in enumerate(futures) if not future.done()]
+                    deadlines = [started[i] + per_query_timeout for i in pending
+                                 if i in started and started[i] + per_query_timeout > now]
+                    queued = [i for i in pending if i not in started]
+                    # Timed-out searches keep their threads; queries behind them cannot start
+                    overdue = len(pending) - len(queued) - len(deadlines)
+                    if not deadlines and (not queued or overdue >= workers):
+                        break
+                    changed.wait(timeout=min(deadlines) - now if deadlines else None)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        result_lists, rate_limited = [], None
+        for i, (q, future) in enumerate(zip(queries, futures)):
+            if not future.done() or future.cancelled():
+                if i in started:
+                    print(f"ResearchAgent: Search for '{q}' timed out after {per_query_timeout}s; skipping.")
+                else:
+                    print(f"ResearchAgent: Search for '{q}' never started (all slots held by timed-out searches); skipping.")
+                continue
+            if future.exception() is not None:
+                print(f"ResearchAgent: Search for '{q}' failed: {future.exception()}")
+                if isinstance(future.exception(), RateLimitError):
+                    rate_limited = future.exception()
+                continue
+            result_lists.append(future.result())
+        if not result_lists and rate_limited is not None:
+            raise rate_limited
+        return self.merge_results(queries, result_lists)
 
-        print(f"ResearchAgent: Reading GCS documents: {gcs_paths}...")
-        all_content = []
-        for path in gcs_paths:
+    def _read_gcs_documents(self, gcs_paths: list[str]) -> list[DocumentResult]:
+        """
+        Downloads the documents concurrently on a bounded thread pool.
+
+        Each download gets its own timeout, bucket handles are shared between
+        documents in the same bucket, and results come back in the caller's order.
+        Failures are returned as DocumentResults with `error` set.
+        """
+        results, buckets = self._prepare_documents(gcs_paths)
+        pending = [r for r in results if r.ok]
+        if pending:
+            executor = ThreadPoolExecutor(
+                max_workers=min(GCS_READ_MAX_CONCURRENCY, len(pending)),
+                thread_name_prefix="research-gcs",
+            )
             try:
-                # Expects path in the format 'gs://bucket_name/file_name.txt'
-                # We only need the file name as the bucket is configured.
-                blob_name = path.replace(f"gs://{GCS_SOURCE_BUCKET}/", "")
-                bucket = self.storage_client.bucket(GCS_SOURCE_BUCKET)
-                blob = bucket.blob(blob_name)
-                content = blob.download_as_text()
-                all_content.append(f"Source Document: {blob_name}\n{content}\n---")
-            except Exception as e:
-                print(f"Error reading GCS file {path}: {e}")
-        return "\n".join(all_content)
-
-    def run(self, query: str, gcs_paths: list[str] | None = None) -> str:
+                futures = {executor.submit(self._download, buckets, r): r for r in pending}
+                # The client-side timeout bounds each download; this is a backstop
+                # for downloads that queue behind the concurrency cap.
+                waves = -(-len(pending) // GCS_READ_MAX_CONCURRENCY)
+                wait(futures, timeout=GCS_READ_TIMEOUT_SECONDS * waves + 5)
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            for future, result in futures.items():
+                if not future.done() or future.cancelled():
+                    result.error = f"Timed out after {GCS_READ_TIMEOUT_SECONDS}s"
+                elif future.exception() is not None:
+                    result.error = str(future.exception())
+                else:
+                    result.content = future.result()
+        return self._report_errors(results)
+
+    def run(
+        self,
+        query: str,
+        gcs_paths: list[str] | None = None,
+        fan_out: int | None = None,
+        sub_queries: list[str] | None = None,
+        per_query_timeout: float | None = None,
+    ) -> str:
+        """
+        Executes the research tasks and consolidates the content.
+
+        See gather() for the arguments; this returns only the consolidated text.
+        """
+        return self.gather(query, gcs_paths, fan_out, sub_queries, per_query_timeout).content
+
+    def gather(
+        self,
+        query: str,
+        gcs_paths: list[str] | None = None,
+        fan_out: int | None = None,
+        sub_queries: list[str] | None = None,
+        per_query_timeout: float | None = None,
+    ) -> ResearchResult:
         """
         Executes the research tasks and consolidates the content.
 
         Args:
             query: The user's research query.
             gcs_paths: A list of GCS URIs for source documents.
+            fan_out: Number of search queries to run (defaults to RESEARCH_FAN_OUT,
+                capped at RESEARCH_MAX_FAN_OUT). 1 searches only the query itself.
+            sub_queries: Optional caller-supplied sub-queries to search alongside the query.
+            per_query_timeout: Seconds to wait for each search in fan-out mode.
 
         Returns:
-            A single string containing all gathered information.
+            A ResearchResult with the consolidated text and per-document outcomes.
         """
         print("ResearchAgent: Starting research...")
-        web_content = self._search_web(query)
-        doc_content = self._read_gcs_documents(gcs_paths or [])
+        if not gcs_paths:
+            web_content = self.search_web(query, fan_out, sub_queries, per_query_timeout)
+            return self.consolidate(query, web_content, [])
 
-        consolidated_content = f"Web Search Results for query '{query}':\n{web_content}\n\n"
-        if doc_content:
-            consolidated_content += f"Internal Document Content:\n{doc_content}"
+        # Web search and document reads are independent, so overlap them
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="research-docs") as executor:
+            documents_future = executor.submit(self.read_documents, gcs_paths)
+            web_content = self.search_web(query, fan_out, sub_queries, per_query_timeout)
+            documents = documents_future.result()
+        return self.consolidate(query, web_content, documents)
 
-        print(f"ResearchAgent: Completed. Total content length: {len(consolidated_content)} chars.")
-        return consolidated_content
\ No newline at end of file
+    def search_web(
+        self,
+        query: str,
+        fan_out: int | None = None,
+        sub_queries: list[str] | None = None,
+        per_query_timeout: float | None = None,
+    ) -> str:
+        """Runs the web half of research (one query, or a fan-out) and returns formatted results."""
+        queries = self._queries(query, fan_out, sub_queries)
+        if len(queries) > 1:
+            return self._search_web_fan_out(
+                queries, per_query_timeout or RESEARCH_PER_QUERY_TIMEOUT_SECONDS
+            )
+        return self._search_web(query)
+
+    def read_documents(self, gcs_paths: list[str] | None) -> list[DocumentResult]:
+        """Reads the source documents (the GCS half of research)."""
+        return self._read_gcs_documents(gcs_paths or [])
+
+class AsyncResearchAgent(ResearchAgentBase):
+    """
+    Research agent for the asyncio pipeline, with ResearchAgent's methods as coroutines.
+
+    Web searches are coroutines on an AsyncWebSearchClient, so a fan-out costs
+    tasks rather than threads. The GCS SDK has no async API, so downloads run on
+    `executor`, one pool shared by every report (GCS_READ_MAX_CONCURRENCY
+    threads by default) instead of a pool per call.
+    """
+    def __init__(self, search_client: AsyncWebSearchClient | None = None, storage_client=None, executor=None):
+        super().__init__(search_client or AsyncWebSearchClient(), storage_client)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=GCS_READ_MAX_CONCURRENCY, thread_name_prefix="research-gcs"
+        )
+
+    async def _search_web(self, query: str) -> str:
+        print(f"ResearchAgent: Searching web for '{query}'...")
+        return await self.search_client.search(query)
+
+    async def _search_web_fan_out(self, queries: list[str], per_query_timeout: float) -> str:
+        """Like ResearchAgent._search_web_fan_out(); the timeout starts once a query gets a concurrency slot."""
+        print(f"ResearchAgent: Fanning out {len(queries)} searches: {queries}")
+        semaphore = asyncio.Semaphore(RESEARCH_MAX_CONCURRENCY)
+
+        async def search(q: str) -> list[dict]:
+            async with semaphore:
+                return await asyncio.wait_for(
+                    self.search_client.search_results(q, RESEARCH_RESULTS_PER_QUERY), per_query_timeout
+                )
+
+        outcomes = await asyncio.gather(*(search(q) for q in queries), return_exceptions=True)
+        result_lists, rate_limited = [], None
+        for q, outcome in zip(queries, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                print(f"ResearchAgent: Search for '{q}' timed out after {per_query_timeout}s; skipping.")
+            elif isinstance(outcome, BaseException):
+                print(f"ResearchAgent: Search for '{q}' failed: {outcome}")
+                if isinstance(outcome, RateLimitError):
+                    rate_limited = outcome
+            else:
+                result_lists.append(outcome)
+        if not result_lists and rate_limited is not None:
+            raise rate_limited
+        return self.merge_results(queries, result_lists)
+
+    async def _read_gcs_documents(self, gcs_paths: list[str]) -> list[DocumentResult]:
+        """Like ResearchAgent._read_gcs_documents(), with downloads on the shared executor."""
+        results, buckets = self._prepare_documents(gcs_paths)
+        pending = [r for r in results if r.ok]
+        if pending:
+            loop = asyncio.get_running_loop()
+            tasks = {
+                asyncio.ensure_future(loop.run_in_executor(self.executor, self._download, buckets, r)): r
+                for r in pending
+            }
+            waves = -(-len(pending) // GCS_READ_MAX_CONCURRENCY)
+            await asyncio.wait(tasks, timeout=GCS_READ_TIMEOUT_SECONDS * waves + 5)
+            for task, result in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    result.error = f"Timed out after {GCS_READ_TIMEOUT_SECONDS}s"
+                elif task.exception() is not None:
+                    result.error = str(task.exception())
+                else:
+                    result.content = task.result()
+        return self._report_errors(results)
+
+    async def run(
+        self,
+        query: str,
+        gcs_paths: list[str] | None = None,
+        fan_out: int | None = None,
+        sub_queries: list[str] | None = None,
+        per_query_timeout: float | None = None,
+    ) -> str:
+        """Like ResearchAgent.run(), as a coroutine."""
+        return (await self.gather(query, gcs_paths, fan_out, sub_queries, per_query_timeout)).content
+
+    async def gather(
+        self,
+        query: str,
+        gcs_paths: list[str] | None = None,
+        fan_out: int | None = None,
+        sub_queries: list[str] | None = None,
+        per_query_timeout: float | None = None,
+    ) -> ResearchResult:
+        """Like ResearchAgent.gather(); the web search and document reads run concurrently."""
+        print("ResearchAgent: Starting research...")
+        web_content, documents = await asyncio.gather(
+            self.search_web(query, fan_out, sub_queries, per_query_timeout),
+            self.read_documents(gcs_paths),
+        )
+        return self.consolidate(query, web_content, documents)
+
+    async def search_web(
+        self,
+        query: str,
+        fan_out: int | None = None,
+        sub_queries: list[str] | None = None,
+        per_query_timeout: float | None = None,
+    ) -> str:
+        """Like ResearchAgent.search_web(), as a coroutine."""
+        queries = self._queries(query, fan_out, sub_queries)
+        if len(queries) > 1:
+            return await self._search_web_fan_out(
+                queries, per_query_timeout or RESEARCH_PER_QUERY_TIMEOUT_SECONDS
+            )
+        return await self._search_web(query)
+
+    async def read_documents(self, gcs_paths: list[str] | None) -> list[DocumentResult]:
+        """Like ResearchAgent.read_documents(), as a coroutine."""
+        return await self._read_gcs_documents(gcs_paths or [])
+
+    def close(self) -> None:
+        """Shuts down the download executor if this agent created it."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,165 @@
+# auto-research-agent/asgi.py
+"""
+ASGI entry point. Report runs (POST /) are served by the asyncio pipeline
+(orchestrator/async_orchestrator.py), so many reports share one event loop
+instead of holding a thread each; every other request goes to the Flask app.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+
+POST / requests that ask for a background job ("async": true) or a CPU
+profile (X-Profile) are also passed to Flask, which runs on a thread pool
+through asgiref's WSGI adapter. The adapter is only imported when the first
+such request arrives.
+"""
+
+import asyncio
+import json
+import math
+from urllib.parse import parse_qs
+import main
+from config import AGENT_POOL_WARM_UP
+from utils.lazy import lazy_import
+from utils.rate_limiter import RateLimitQueueFull, check_capacity
+
+asgiref_wsgi = lazy_import("asgiref.wsgi")
+
+async def read_body(receive) -> bytes:
+    """Reads the whole request body from the ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+def replay_body(body: bytes, receive):
+    """A receive channel that hands out the already read body first."""
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+async def send_json(send, status: int, payload: dict, headers: list[tuple[bytes, bytes]] = ()) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def send_rate_limited(send, message: str, queue_full: bool, retry_after: float) -> None:
+    """main.rate_limited_response for ASGI: 503 or 429 with Retry-After."""
+    headers = [(b"retry-after", str(max(1, math.ceil(retry_after))).encode("ascii"))]
+    await send_json(send, 503 if queue_full else 429, {"error": message, "retry_after": retry_after}, headers)
+
+class ResearchASGIApp:
+    """
+    Serves POST / from the pool's AsyncOrchestrator and delegates everything
+    else to `fallback` (the Flask app wrapped for ASGI by default).
+    """
+    def __init__(self, flask_app=None, pool=None, fallback=None):
+        self.flask_app = flask_app or main.app
+        self.pool = pool or main.agent_pool
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/":
+            body = await read_body(receive)
+            try:
+                request_json = json.loads(body) if body else None
+            except ValueError:
+                request_json = None
+            if self._serves(scope, request_json):
+                await self._run_report(request_json, send)
+                return
+            receive = replay_body(body, receive)
+        await self._get_fallback()(scope, receive, send)
+
+    def _get_fallback(self):
+        if self.fallback is None:
+            self.fallback = asgiref_wsgi.WsgiToAsgi(self.flask_app)
+        return self.fallback
+
+    @staticmethod
+    def _serves(scope, request_json) -> bool:
+        """Whether the async pipeline handles this POST / (Flask answers invalid bodies, jobs and profiled runs)."""
+        if not isinstance(request_json, dict) or 'query' not in request_json or request_json.get('async'):
+            return False
+        headers = dict(scope.get("headers") or [])
+        profile = headers.get(b"x-profile", b"").decode("latin-1")
+        if not profile:
+            profile = (parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile") or [""])[0]
+        return not main.profiling_authorized(profile)
+
+    async def _run_report(self, request_json: dict, send) -> None:
+        """The POST / handler of main.research_report_agent, run on the event loop."""
+        query = request_json['query']
+        gcs_paths = request_json.get('gcs_paths')
+        try:
+            options = main.parse_run_options(request_json)
+        except ValueError as e:
+            await send_json(send, 400, {"error": str(e)})
+            return
+
+        print(f"Received request for query: {query}")
+
+        try:
+            check_capacity()
+        except RateLimitQueueFull as e:
+            await send_rate_limited(send, str(e), True, e.retry_after)
+            return
+
+        try:
+            # Building the agents blocks (client setup), so it happens off the loop
+            orchestrator = await asyncio.get_running_loop().run_in_executor(None, self.pool.get_async_orchestrator)
+            result = await orchestrator.run(query, gcs_paths, options=options)
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+            await send_json(send, 500, {"error": "An internal server error occurred."})
+            return
+
+        if result['status'] == 'success':
+            await send_json(send, 200, result)
+        elif result.get('rate_limited'):
+            limited = result['rate_limited']
+            await send_rate_limited(send, result['message'], limited['queue_full'], limited['retry_after'])
+        else:
+            await send_json(send, 500, {"error": result['message']})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if AGENT_POOL_WARM_UP:
+                    # Like main's warm-up thread: startup completes without waiting for it
+                    asyncio.get_running_loop().run_in_executor(None, self._warm_up)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.pool.aclose_async_orchestrator()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _warm_up(self) -> None:
+        try:
+            self.pool.get_async_orchestrator()
+        except Exception as e:
+            print(f"AgentPool: Async warm-up failed: {e}")
+
+app = ResearchASGIApp()
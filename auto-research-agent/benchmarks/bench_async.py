@@ -0,0 +1,125 @@
+# auto-research-agent/benchmarks/bench_async.py
+"""
+Compares many concurrent reports served by MainOrchestrator (one request thread
+per report, as under a threaded WSGI server) with AsyncOrchestrator (one event
+loop), using the real agents on stub Serper, Gemini and GCS backends with
+simulated latency (no network or API keys needed).
+
+Usage (from auto-research-agent/):
+    python benchmarks/bench_async.py [--reports 200] [--search 0.2] [--read 0.1] [--analysis 1.0]
+
+Provider limiters are sized so they never throttle; rendering is stubbed with
+a little CPU work so the comparison is about waiting on I/O.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.analysis_agent import AnalysisAgent, AsyncAnalysisAgent
+from agents.delivery_agent import AsyncDeliveryAgent, DeliveryAgent
+from agents.research_agent import AsyncResearchAgent, ResearchAgent
+from benchmarks.stubs import StubGeminiModel, build_async_search_client, build_search_client, build_storage_client
+from orchestrator.async_orchestrator import AsyncOrchestrator
+from orchestrator.main_orchestrator import MainOrchestrator
+from utils.rate_limiter import ProviderLimiter
+
+class StubReporting:
+    @staticmethod
+    def render_bytes(insights, query):
+        sum(i * i for i in range(20_000))  # a little CPU-bound layout work
+        return f"report_{abs(hash(query))}.pdf", b"%PDF-1.4"
+
+class ThreadSampler:
+    """Records the peak number of live threads while it runs."""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+def limiters(reports: int) -> tuple[ProviderLimiter, ProviderLimiter]:
+    return (ProviderLimiter("serper", max_concurrency=reports * 2, max_queue=reports * 2),
+            ProviderLimiter("gemini", max_concurrency=reports * 2, max_queue=reports * 2))
+
+def build_threaded(args) -> MainOrchestrator:
+    serper, gemini = limiters(args.reports)
+    search_client = build_search_client(args.search)
+    search_client.limiter = serper
+    storage_client, _ = build_storage_client(args.read)
+    return MainOrchestrator(
+        research_agent=ResearchAgent(search_client=search_client, storage_client=storage_client),
+        analysis_agent=AnalysisAgent(model=StubGeminiModel(args.analysis), limiter=gemini),
+        reporting_agent=StubReporting(),
+        delivery_agent=DeliveryAgent(storage_client=storage_client),
+        in_memory_delivery=True,
+    )
+
+def build_async(args) -> AsyncOrchestrator:
+    serper, gemini = limiters(args.reports)
+    search_client = build_async_search_client(args.search)
+    search_client.limiter = serper
+    storage_client, _ = build_storage_client(args.read)
+    return AsyncOrchestrator(
+        research_agent=AsyncResearchAgent(search_client=search_client, storage_client=storage_client),
+        analysis_agent=AsyncAnalysisAgent(model=StubGeminiModel(args.analysis), limiter=gemini),
+        reporting_agent=StubReporting(),
+        delivery_agent=AsyncDeliveryAgent(storage_client=storage_client),
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=200, help="reports in flight at once")
+    parser.add_argument("--search", type=float, default=0.2, help="seconds per Serper search")
+    parser.add_argument("--read", type=float, default=0.1, help="seconds per GCS read/upload")
+    parser.add_argument("--analysis", type=float, default=1.0, help="seconds per Gemini call")
+    args = parser.parse_args()
+    _, paths = build_storage_client()
+    items = [(f"solid state batteries {i}", paths[:1]) for i in range(args.reports)]
+
+    threaded = build_threaded(args)
+    with ThreadSampler() as threads, ThreadPoolExecutor(args.reports, thread_name_prefix="request") as requests:
+        start = time.perf_counter()
+        results = list(requests.map(lambda item: threaded.run(*item), items))
+        threaded_seconds = time.perf_counter() - start
+    threaded_ok = sum(r["status"] == "success" for r in results)
+    threaded.close()
+
+    async def run_all(orchestrator: AsyncOrchestrator) -> list[dict]:
+        try:
+            return await asyncio.gather(*(orchestrator.run(query, gcs_paths) for query, gcs_paths in items))
+        finally:
+            await orchestrator.aclose()
+
+    with ThreadSampler() as loop_threads:
+        start = time.perf_counter()
+        results = asyncio.run(run_all(build_async(args)))
+        async_seconds = time.perf_counter() - start
+    async_ok = sum(r["status"] == "success" for r in results)
+
+    print(f"{args.reports} concurrent reports, {os.cpu_count()} cores")
+    print(f"threads (MainOrchestrator):     {threaded_seconds:6.2f}s  {args.reports / threaded_seconds:7.1f} reports/s  "
+          f"peak {threads.peak} threads  ({threaded_ok} ok)")
+    print(f"event loop (AsyncOrchestrator): {async_seconds:6.2f}s  {args.reports / async_seconds:7.1f} reports/s  "
+          f"peak {loop_threads.peak} threads  ({async_ok} ok)")
+
+if __name__ == "__main__":
+    main()
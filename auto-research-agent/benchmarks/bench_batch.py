@@ -0,0 +1,108 @@
+# auto-research-agent/benchmarks/bench_batch.py
+"""
+Compares a batch of reports generated with one run() call per query against a
+single run_batch() call, using stub agents with simulated Serper, GCS and Gemini
+latency (no network or API keys needed).
+
+Usage (from auto-research-agent/):
+    python benchmarks/bench_batch.py [--items 100] [--search 0.05] [--read 0.05] [--analysis 0.1]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.research_agent import DocumentResult, ResearchResult
+from orchestrator.main_orchestrator import MainOrchestrator
+
+class StubResearch:
+    def __init__(self, search_seconds: float, read_seconds: float):
+        self.search_seconds = search_seconds
+        self.read_seconds = read_seconds
+        self.reads = 0
+        self.lock = threading.Lock()
+
+    def search_web(self, query, **kwargs):
+        time.sleep(self.search_seconds)
+        return f"Title: {query}\nSnippet: result\n---"
+
+    def read_documents(self, paths):
+        with self.lock:
+            self.reads += len(paths)
+        time.sleep(self.read_seconds)
+        return [DocumentResult(path=p, bucket="digests", blob_name=p.rsplit("/", 1)[1], content="Doc.") for p in paths]
+
+    def consolidate(self, query, web_content, documents):
+        return ResearchResult(content=f"{web_content}\n" + "\n".join(d.content for d in documents), documents=documents)
+
+class StubAnalysis:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def analyze(self, content, mode):
+        time.sleep(self.seconds)
+        return SimpleNamespace(insights={"title": "Digest"}, metadata=lambda: {"mode": mode})
+
+class StubReporting:
+    @staticmethod
+    def render_bytes(insights, query):
+        sum(i * i for i in range(20_000))  # a little CPU-bound layout work
+        return f"report_{abs(hash(query))}.pdf", b"%PDF-1.4"
+
+class StubDelivery:
+    @staticmethod
+    def deliver_bytes(pdf, filename):
+        return f"https://storage.googleapis.com/reports/{filename}"
+
+class StubPacker:
+    @staticmethod
+    def pack(content, query, token_budget):
+        return SimpleNamespace(content=content, summary=lambda: {"kept_passages": None})
+
+def build(args) -> MainOrchestrator:
+    return MainOrchestrator(
+        research_agent=StubResearch(args.search, args.read),
+        analysis_agent=StubAnalysis(args.analysis),
+        reporting_agent=StubReporting(),
+        delivery_agent=StubDelivery(),
+        context_packer=StubPacker(),
+        in_memory_delivery=True,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--search", type=float, default=0.05, help="seconds per Serper search")
+    parser.add_argument("--read", type=float, default=0.05, help="seconds per GCS read")
+    parser.add_argument("--analysis", type=float, default=0.1, help="seconds per Gemini call")
+    args = parser.parse_args()
+    # Every query reads the same two digest sources
+    items = [(f"weekly digest topic {i}", ["gs://digests/market.txt", "gs://digests/news.txt"])
+             for i in range(args.items)]
+
+    sequential = build(args)
+    start = time.perf_counter()
+    for query, gcs_paths in items:
+        sequential.run(query, gcs_paths)
+    one_by_one = time.perf_counter() - start
+    sequential.close()
+
+    batched = build(args)
+    start = time.perf_counter()
+    succeeded = sum(result["status"] == "success" for _, result in batched.run_batch(items))
+    batch = time.perf_counter() - start
+    batched.close()
+
+    print(f"{args.items} reports, {os.cpu_count()} cores")
+    print(f"one run() per query:  {one_by_one:7.2f}s  {args.items / one_by_one:6.1f} reports/s  "
+          f"{sequential.research_agent.reads} document reads")
+    print(f"run_batch():          {batch:7.2f}s  {args.items / batch:6.1f} reports/s  "
+          f"{batched.research_agent.reads} document reads  ({one_by_one / batch:.1f}x, {succeeded} ok)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# auto-research-agent/benchmarks/bench_pdf_render.py
+"""
+Microbenchmark for per-report PDF rendering cost.
+
+Compares the old per-call path (new Jinja2 environment, new styles and a
+discarded HTML render for every report) with the shared ReportRenderer.
+
+Usage (from auto-research-agent/):
+    python benchmarks/bench_pdf_render.py [--iterations 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_generator import ReportRenderer
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+TEMPLATE_NAME = "report_template.html"
+
+SAMPLE_REPORT = {
+    "title": "Solid-State Battery Market Outlook",
+    "executive_summary": "Solid-state batteries promise higher energy density and safety. " * 6,
+    "key_insights": [
+        {
+            "insight": f"Insight {i}: manufacturing yields are improving",
+            "explanation": "Pilot lines report steady yield gains and falling cell costs. " * 3,
+            "relevance_score": 8,
+        }
+        for i in range(6)
+    ],
+    "source_analysis": {"sentiment": "Positive", "confidence": "High"},
+    "conclusion": "Commercial adoption is likely within the decade. " * 4,
+}
+
+def render_per_call(data: dict, output_path: str) -> None:
+    """The old path: everything rebuilt for each report, plus an unused HTML render."""
+    renderer = ReportRenderer(TEMPLATE_DIR, TEMPLATE_NAME)
+    renderer.render_html(data)
+    renderer.render_to_file(data, output_path)
+
+def measure(func, iterations: int) -> list[float]:
+    func()  # warm imports and font caches
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    renderer = ReportRenderer(TEMPLATE_DIR, TEMPLATE_NAME)
+    output_path = os.path.join(tempfile.gettempdir(), "bench_report.pdf")
+    cases = {
+        "per-call setup (before)": lambda: render_per_call(SAMPLE_REPORT, output_path),
+        "shared renderer, file": lambda: renderer.render_to_file(SAMPLE_REPORT, output_path),
+        "shared renderer, bytes": lambda: renderer.render_to_bytes(SAMPLE_REPORT),
+        "setup only (before)": lambda: ReportRenderer(TEMPLATE_DIR, TEMPLATE_NAME).render_html(SAMPLE_REPORT),
+    }
+
+    print(f"{'case':<26} {'median ms':>10} {'mean ms':>10} {'p95 ms':>10}")
+    for name, func in cases.items():
+        timings = sorted(measure(func, args.iterations))
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{name:<26} {statistics.median(timings):>10.2f} {statistics.mean(timings):>10.2f} {p95:>10.2f}")
+    os.remove(output_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# auto-research-agent/benchmarks/bench_render_pool.py
+"""
+Measures PDF rendering throughput with concurrent requests: threads sharing one
+ReportRenderer (serialized by the GIL) versus the RenderPool worker processes.
+
+Usage (from auto-research-agent/):
+    python benchmarks/bench_render_pool.py [--reports 48] [--concurrency 8] [--processes 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_pdf_render import SAMPLE_REPORT, TEMPLATE_DIR, TEMPLATE_NAME
+from utils.pdf_generator import ReportRenderer
+from utils.render_pool import RenderPool
+
+def run_concurrently(render, reports: int, concurrency: int) -> float:
+    """Renders `reports` reports from `concurrency` request threads; returns reports per second."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: render(SAMPLE_REPORT), range(reports)))
+    return reports / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reports", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    renderer = ReportRenderer(TEMPLATE_DIR, TEMPLATE_NAME)
+    run_concurrently(renderer.render_to_bytes, 4, 2)  # warm fonts
+    threaded = run_concurrently(renderer.render_to_bytes, args.reports, args.concurrency)
+
+    pool = RenderPool(TEMPLATE_DIR, TEMPLATE_NAME, max_workers=args.processes, timeout=60)
+    pool.warm_up()
+    try:
+        pooled = run_concurrently(pool.render, args.reports, args.concurrency)
+    finally:
+        pool.close()
+
+    print(f"{args.reports} reports, {args.concurrency} concurrent requests, {os.cpu_count()} cores")
+    print(f"threads (GIL-bound):          {threaded:8.1f} reports/s")
+    print(f"render pool ({args.processes} processes):   {pooled:8.1f} reports/s ({pooled / threaded:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# auto-research-agent/benchmarks/bench_startup.py
+"""
+Cold start benchmark: times `import main` and the first byte of `GET /` in fresh
+interpreters, and lists the slowest imports.
+
+Usage (from auto-research-agent/):
+    python benchmarks/bench_startup.py [--runs 5] [--warm-up] [--output startup.json]
+    python benchmarks/bench_startup.py --baseline startup.json [--threshold 0.2]
+
+"first_byte" runs from spawning the interpreter to the first byte of the
+response, so it includes interpreter start-up and `import main`. The boot
+warm-up (AGENT_POOL_WARM_UP) is off unless --warm-up is given, since it runs on
+a background thread and would otherwise compete with the first request.
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_suite import compare, environment
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SCRIPT = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+
+# Serves the app on a free port and prints the port once it is listening
+SERVE_SCRIPT = """
+import main
+from werkzeug.serving import make_server
+server = make_server("127.0.0.1", 0, main.app, threaded=True)
+print(server.server_port, flush=True)
+server.serve_forever()
+"""
+
+def child_env(warm_up: bool) -> dict:
+    env = dict(os.environ)
+    # config.py requires the API keys; nothing here calls the APIs
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("SERPER_API_KEY", "benchmark")
+    env["AGENT_POOL_WARM_UP"] = "true" if warm_up else "false"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+def time_import(env: dict) -> float:
+    """Seconds `import main` takes in a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=APP_DIR, env=env,
+                         capture_output=True, text=True, check=True, timeout=120)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def time_first_byte(env: dict) -> tuple[float, float]:
+    """Seconds from spawning the server to listening and to the first byte of GET /."""
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", SERVE_SCRIPT], cwd=APP_DIR, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        port = int(server.stdout.readline())
+        listening = time.perf_counter() - start
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        conn.request("GET", "/")
+        response = conn.getresponse()
+        response.read(1)
+        first_byte = time.perf_counter() - start
+        if response.status != 200:
+            raise RuntimeError(f"GET / returned {response.status}")
+        conn.close()
+        return listening, first_byte
+    finally:
+        server.terminate()
+        server.wait(10)
+
+def slowest_imports(env: dict, top: int) -> list[dict]:
+    """The modules main imports directly, by cumulative time, from `python -X importtime`."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=APP_DIR, env=env,
+                         capture_output=True, text=True, check=True, timeout=120)
+    imports = []
+    for line in out.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; nesting is shown by
+        # indentation and a module's line comes after the lines of what it imports
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == "main":
+                break
+            imports = []  # interpreter start-up (site, encodings, ...)
+        elif depth == 1:
+            imports.append({"module": name.strip(), "cumulative_ms": round(int(cumulative) / 1000, 1)})
+    return sorted(imports, key=lambda i: -i["cumulative_ms"])[:top]
+
+def summarize(timings: list[float]) -> dict:
+    timings = sorted(t * 1000 for t in timings)
+    return {
+        "iterations": len(timings),
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(timings[0], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--warm-up", action="store_true", help="start the agent pool warm-up at boot")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--output", help="write results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    env = child_env(args.warm_up)
+    imports, listening, first_byte = [], [], []
+    for _ in range(args.runs):
+        imports.append(time_import(env))
+        ready, byte = time_first_byte(env)
+        listening.append(ready)
+        first_byte.append(byte)
+
+    results = {
+        "import_main": summarize(imports),
+        "listening": summarize(listening),
+        "first_byte": summarize(first_byte),
+    }
+    for name, r in results.items():
+        print(f"{name:<32} median {r['median_ms']:>9.2f} ms   max {r['max_ms']:>9.2f} ms", file=sys.stderr)
+
+    report = {
+        "suite": "startup",
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {"runs": args.runs, "warm_up": args.warm_up},
+        "results": results,
+        "slowest_imports": slowest_imports(env, args.top),
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# auto-research-agent/benchmarks/run_suite.py
+"""
+Offline per-stage benchmark suite: times each agent and the whole workflow against
+stubbed Serper, Gemini and GCS backends, and writes the results as JSON.
+
+Usage (from auto-research-agent/):
+    python benchmarks/run_suite.py [--iterations 20] [--output results.json]
+    python benchmarks/run_suite.py --baseline results.json [--threshold 0.2]
+
+With --baseline, each benchmark's median is compared with the baseline run and
+the script exits with status 1 if any is more than `threshold` slower.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubGeminiModel, build_search_client, build_storage_client, sample_report
+from agents.analysis_agent import AnalysisAgent
+from agents.delivery_agent import DeliveryAgent
+from agents.reporting_agent import ReportingAgent
+from agents.research_agent import ResearchAgent
+from orchestrator.main_orchestrator import MainOrchestrator
+from utils.dedup import NearDuplicateFilter
+from utils.pdf_generator import generate_pdf_from_template
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+# name -> setup(args) returning the function to time; setup cost is not measured
+BENCHMARKS = {}
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@benchmark("web_search.search")
+def bench_search(args):
+    client = build_search_client(args.serper_latency, args.results, args.snippet_chars)
+    return lambda: client.search("solid-state batteries")
+
+@benchmark("research_agent.run")
+def bench_research(args):
+    storage, paths = build_storage_client(args.gcs_latency, args.documents, args.doc_chars)
+    agent = ResearchAgent(
+        search_client=build_search_client(args.serper_latency, args.results, args.snippet_chars),
+        storage_client=storage,
+    )
+    return lambda: agent.run("solid-state batteries", paths)
+
+@benchmark("near_duplicate_filter.dedup")
+def bench_dedup(args):
+    storage, paths = build_storage_client(args.gcs_latency, args.documents, args.doc_chars)
+    agent = ResearchAgent(
+        search_client=build_search_client(args.serper_latency, args.results, args.snippet_chars),
+        storage_client=storage,
+    )
+    content = agent.run("solid-state batteries", paths)
+    dedup = NearDuplicateFilter()
+    return lambda: dedup.dedup(content)
+
+@benchmark("analysis_agent.run")
+def bench_analysis(args):
+    agent = AnalysisAgent(model=StubGeminiModel(args.gemini_latency, args.insights))
+    agent.cache = None
+    content = "Web Search Results:\n" + "x" * args.doc_chars
+    return lambda: agent.run(content, mode="single")
+
+@benchmark("pdf.generate_pdf_from_template")
+def bench_pdf(args):
+    data = sample_report(args.insights)
+    output_path = os.path.join(tempfile.gettempdir(), "bench_suite_report.pdf")
+    return lambda: generate_pdf_from_template(data, "report_template.html", TEMPLATE_DIR, output_path)
+
+@benchmark("orchestrator.run")
+def bench_orchestrator(args):
+    storage, paths = build_storage_client(args.gcs_latency, args.documents, args.doc_chars)
+    analysis = AnalysisAgent(model=StubGeminiModel(args.gemini_latency, args.insights))
+    analysis.cache = None
+    delivery = DeliveryAgent(storage_client=storage)
+    delivery.bucket_name = "bench-reports"
+    orchestrator = MainOrchestrator(
+        research_agent=ResearchAgent(
+            search_client=build_search_client(args.serper_latency, args.results, args.snippet_chars),
+            storage_client=storage,
+        ),
+        analysis_agent=analysis,
+        reporting_agent=ReportingAgent(),
+        delivery_agent=delivery,
+        # Keeps the benchmark from filling TEMP_DIR with PDFs
+        in_memory_delivery=True,
+    )
+
+    def run():
+        result = orchestrator.run("solid-state batteries", paths, options={"analysis_mode": "single"})
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+    return run
+
+def measure(func, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "min_ms": round(timings[0], 3),
+        "max_ms": round(timings[-1], 3),
+        "stdev_ms": round(statistics.stdev(timings), 3) if len(timings) > 1 else 0.0,
+    }
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Prints median changes against the baseline and returns the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = current["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<32} {before['median_ms']:>12.2f} {current['median_ms']:>12.2f} {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--output", help="write results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed median slowdown (0.2 = 20%%)")
+    stubs = parser.add_argument_group("stubbed backends")
+    stubs.add_argument("--serper-latency", type=float, default=0.0, help="seconds per Serper request")
+    stubs.add_argument("--gemini-latency", type=float, default=0.0, help="seconds per Gemini call")
+    stubs.add_argument("--gcs-latency", type=float, default=0.0, help="seconds per GCS download/upload")
+    stubs.add_argument("--results", type=int, default=10, help="organic results per search")
+    stubs.add_argument("--snippet-chars", type=int, default=200)
+    stubs.add_argument("--documents", type=int, default=3, help="GCS documents per research run")
+    stubs.add_argument("--doc-chars", type=int, default=20_000)
+    stubs.add_argument("--insights", type=int, default=6, help="key insights in the Gemini report")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        # The agents log every step with print(); keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = measure(BENCHMARKS[name](args), args.iterations, args.warmup)
+        r = results[name]
+        print(f"{name:<32} median {r['median_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms", file=sys.stderr)
+
+    report = {
+        "suite": "offline",
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "only")},
+        "results": results,
+    }
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
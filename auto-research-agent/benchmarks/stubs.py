@@ -0,0 +1,135 @@
+# auto-research-agent/benchmarks/stubs.py
+"""
+Offline stand-ins for Serper, Gemini and GCS, with configurable latency and
+payload sizes, for benchmarking the agents without network access or API keys.
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from tests.fakes import FakeStorageClient
+from utils.api_clients import AsyncWebSearchClient, WebSearchClient
+
+WORDS = "solid state battery cells reach higher energy density with ceramic electrolytes and faster charging".split()
+
+def filler(chars: int, seed: int = 0) -> str:
+    """Deterministic prose of roughly `chars` characters."""
+    words, length, i = [], 0, seed
+    while length < chars:
+        word = WORDS[i % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+        i += 7
+    return " ".join(words)[:chars]
+
+class StubResponse:
+    """The parts of requests.Response (and httpx.Response) that the search clients use."""
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.content = body
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.is_success = self.ok
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class StubSerperSession:
+    """Replaces WebSearchClient.session: answers every POST with `results` organic hits after `latency` seconds."""
+    def __init__(self, latency: float = 0.0, results: int = 10, snippet_chars: int = 200):
+        self.latency = latency
+        self.results = results
+        self.snippet_chars = snippet_chars
+        self.headers = {}
+        self.calls = 0
+
+    def post(self, url, data=None, timeout=None) -> StubResponse:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._respond(data)
+
+    def _respond(self, payload: str) -> StubResponse:
+        query = json.loads(payload)["q"]
+        organic = [
+            {"title": f"{query} result {i}", "link": f"https://example.com/{i}", "snippet": filler(self.snippet_chars, i)}
+            for i in range(self.results)
+        ]
+        return StubResponse(json.dumps({"organic": organic}).encode("utf-8"))
+
+    def close(self) -> None:
+        pass
+
+class StubAsyncSerperClient(StubSerperSession):
+    """Replaces AsyncWebSearchClient.client (an httpx.AsyncClient); waits with asyncio.sleep."""
+    async def post(self, url, content=None) -> StubResponse:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._respond(content)
+
+    async def aclose(self) -> None:
+        pass
+
+def build_search_client(latency: float = 0.0, results: int = 10, snippet_chars: int = 200) -> WebSearchClient:
+    """A WebSearchClient with caching off whose HTTP session is a StubSerperSession."""
+    client = WebSearchClient(api_key="offline-benchmark")
+    client.cache = None
+    client.session.close()
+    client.session = StubSerperSession(latency, results, snippet_chars)
+    return client
+
+def build_async_search_client(latency: float = 0.0, results: int = 10, snippet_chars: int = 200) -> AsyncWebSearchClient:
+    """An AsyncWebSearchClient with caching off whose HTTP client is a StubAsyncSerperClient."""
+    client = AsyncWebSearchClient(api_key="offline-benchmark", client=StubAsyncSerperClient(latency, results, snippet_chars))
+    client.cache = None
+    return client
+
+def sample_report(insights: int = 6, chars: int = 300) -> dict:
+    """A report dict shaped like Gemini's JSON reply (see prompts/report_prompt.txt)."""
+    return {
+        "title": "Solid-State Battery Market Outlook",
+        "executive_summary": filler(chars * 2),
+        "key_insights": [
+            {"insight": f"Insight {i}: {filler(60, i)}", "explanation": filler(chars, i), "relevance_score": 8}
+            for i in range(insights)
+        ],
+        "source_analysis": {"sentiment": "Positive", "confidence": "High"},
+        "conclusion": filler(chars),
+    }
+
+class StubGeminiModel:
+    """Gemini-compatible model returning a fixed JSON report after `latency` seconds (streams in `chunk_chars` pieces)."""
+    model_name = "stub-gemini"
+
+    def __init__(self, latency: float = 0.0, insights: int = 6, chunk_chars: int = 64):
+        self.latency = latency
+        self.text = json.dumps(sample_report(insights))
+        self.chunk_chars = chunk_chars
+
+    def _usage(self, prompt: str) -> SimpleNamespace:
+        return SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(self.text) // 4)
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        time.sleep(self.latency)
+        if not stream:
+            return SimpleNamespace(text=self.text, usage_metadata=self._usage(prompt))
+        pieces = [self.text[i:i + self.chunk_chars] for i in range(0, len(self.text), self.chunk_chars)]
+        return iter([SimpleNamespace(text=piece, usage_metadata=self._usage(prompt)) for piece in pieces])
+
+    async def generate_content_async(self, prompt: str):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(text=self.text, usage_metadata=self._usage(prompt))
+
+def build_storage_client(latency: float = 0.0, documents: int = 3, doc_chars: int = 20_000,
+                         bucket: str = "bench-docs") -> tuple[FakeStorageClient, list[str]]:
+    """A fake GCS client preloaded with `documents` text files; returns it and their gs:// paths."""
+    client = FakeStorageClient(latency=latency)
+    paths = []
+    for i in range(documents):
+        client.objects[(bucket, f"doc{i}.txt")] = filler(doc_chars, i).encode("utf-8")
+        paths.append(f"gs://{bucket}/doc{i}.txt")
+    return client, paths
@@ -2,10 +2,25 @@
 
 import os
 import tempfile
-from dotenv import load_dotenv
 
-# Load environment variables from a .env file for local development
-load_dotenv()
+def _find_dotenv() -> str | None:
+    """The nearest .env file in this directory or a parent (where load_dotenv() would look)."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+# Load environment variables from a .env file for local development; deployed
+# services have none and skip importing python-dotenv
+_dotenv_path = _find_dotenv()
+if _dotenv_path:
+    from dotenv import load_dotenv
+    load_dotenv(_dotenv_path)
 
 # --- Google Cloud Configuration ---
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
@@ -15,9 +30,87 @@ GCP_REGION = os.getenv("GCP_REGION", "us-central1")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-2.5-flash" # Or another suitable model
 
+# --- Analysis Mode ---
+# "single" sends everything in one Gemini call; "map_reduce" summarizes chunks
+# concurrently and then builds the report from the summaries; "auto" picks
+# map_reduce when the content exceeds ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS.
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "single")
+ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS", "20000"))
+# Size of each chunk summarized in the map phase
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "8000"))
+# Maximum number of concurrent Gemini calls in the map phase
+ANALYSIS_MAP_CONCURRENCY = int(os.getenv("ANALYSIS_MAP_CONCURRENCY", "4"))
+# Token budget for research content in map-reduce mode (replaces CONTEXT_TOKEN_BUDGET)
+ANALYSIS_MAP_REDUCE_TOKEN_BUDGET = int(os.getenv("ANALYSIS_MAP_REDUCE_TOKEN_BUDGET", "200000"))
+
+# --- Analysis Result Cache ---
+# Reuses Gemini's report when model, prompt template and packed content are identical.
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "21600"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "512"))
+ANALYSIS_CACHE_MAX_MEMORY_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_MEMORY_BYTES", str(32 * 1024 * 1024)))
+# Optional on-disk tier; leave empty to keep the cache in memory only
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", "")
+ANALYSIS_CACHE_MAX_DISK_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))
+
+# --- Context Packing ---
+# Maximum (estimated) tokens of research content sent to Gemini per report.
+# Larger inputs are ranked against the query and the least relevant passages dropped.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "30000"))
+CONTEXT_MAX_PASSAGE_TOKENS = int(os.getenv("CONTEXT_MAX_PASSAGE_TOKENS", "300"))
+
+# --- Near-Duplicate Removal ---
+# Drops research passages that mostly repeat an earlier one (syndicated search
+# results, overlapping documents) before packing. A passage is a near-duplicate
+# when at least DEDUP_SIMILARITY_THRESHOLD of its word shingles already appear
+# in a kept passage.
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.7"))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "3"))
+
 # --- Web Search API (Serper) ---
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 
+# Connection pooling and retries for Serper requests
+SERPER_POOL_SIZE = int(os.getenv("SERPER_POOL_SIZE", "10"))
+SERPER_MAX_RETRIES = int(os.getenv("SERPER_MAX_RETRIES", "3"))
+SERPER_BACKOFF_BASE_SECONDS = float(os.getenv("SERPER_BACKOFF_BASE_SECONDS", "0.5"))
+SERPER_BACKOFF_MAX_SECONDS = float(os.getenv("SERPER_BACKOFF_MAX_SECONDS", "8"))
+SERPER_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SERPER_CONNECT_TIMEOUT_SECONDS", "3.05"))
+SERPER_READ_TIMEOUT_SECONDS = float(os.getenv("SERPER_READ_TIMEOUT_SECONDS", "10"))
+
+# --- Search Result Cache ---
+# Repeated queries are served from cache instead of calling Serper again.
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_MAX_MEMORY_BYTES = int(os.getenv("SEARCH_CACHE_MAX_MEMORY_BYTES", str(32 * 1024 * 1024)))
+# Optional on-disk tier (shared across restarts); leave empty to keep the cache in memory only
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR", "")
+SEARCH_CACHE_MAX_DISK_BYTES = int(os.getenv("SEARCH_CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))
+
+# --- Research Fan-Out ---
+# Number of search queries per report (1 = only the user's query). Can be
+# overridden per request with "fan_out" up to RESEARCH_MAX_FAN_OUT.
+RESEARCH_FAN_OUT = int(os.getenv("RESEARCH_FAN_OUT", "1"))
+RESEARCH_MAX_FAN_OUT = int(os.getenv("RESEARCH_MAX_FAN_OUT", "8"))
+# Maximum number of sub-queries searched at the same time for one request
+RESEARCH_MAX_CONCURRENCY = int(os.getenv("RESEARCH_MAX_CONCURRENCY", "4"))
+# Seconds to wait for each sub-query before giving up on it
+RESEARCH_PER_QUERY_TIMEOUT_SECONDS = float(os.getenv("RESEARCH_PER_QUERY_TIMEOUT_SECONDS", "15"))
+RESEARCH_RESULTS_PER_QUERY = int(os.getenv("RESEARCH_RESULTS_PER_QUERY", "5"))
+# Angles used to expand a query into sub-queries ({query} is replaced)
+RESEARCH_SUB_QUERY_TEMPLATES = [
+    "{query}",
+    "{query} latest news",
+    "{query} risks and challenges",
+    "{query} market size",
+    "{query} key players",
+    "{query} future outlook",
+    "{query} statistics",
+    "{query} expert analysis",
+]
+
 # --- Google Cloud Storage ---
 # Bucket to read source documents from (if any)
 GCS_SOURCE_BUCKET = os.getenv("GCS_SOURCE_BUCKET")
@@ -25,6 +118,11 @@ GCS_SOURCE_BUCKET = os.getenv("GCS_SOURCE_BUCKET")
 # Bucket to write the final PDF reports to
 GCS_REPORTS_BUCKET = os.getenv("GCS_REPORTS_BUCKET")
 
+# Maximum number of source documents downloaded at the same time for one request
+GCS_READ_MAX_CONCURRENCY = int(os.getenv("GCS_READ_MAX_CONCURRENCY", "8"))
+# Seconds allowed for each source document download
+GCS_READ_TIMEOUT_SECONDS = float(os.getenv("GCS_READ_TIMEOUT_SECONDS", "30"))
+
 # --- Project Constants ---
 # Path to the Gemini prompt template
 PROMPT_TEMPLATE_PATH = "prompts/report_prompt.txt"
@@ -33,4 +131,102 @@ PROMPT_TEMPLATE_PATH = "prompts/report_prompt.txt"
 REPORT_TEMPLATE_PATH = "templates/report_template.html"
 
 # Temporary directory for file operations - cross-platform compatible
-TEMP_DIR = tempfile.gettempdir()
\ No newline at end of file
+TEMP_DIR = tempfile.gettempdir()
+
+# --- Workflow Stages ---
+# Threads shared by all requests for running workflow stages (web search and
+# document reads of one request run side by side)
+ORCHESTRATOR_STAGE_WORKERS = int(os.getenv("ORCHESTRATOR_STAGE_WORKERS", "16"))
+# Per-stage timeouts in seconds (0 disables the timeout)
+RESEARCH_STAGE_TIMEOUT_SECONDS = float(os.getenv("RESEARCH_STAGE_TIMEOUT_SECONDS", "120"))
+ANALYSIS_STAGE_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_STAGE_TIMEOUT_SECONDS", "300"))
+REPORTING_STAGE_TIMEOUT_SECONDS = float(os.getenv("REPORTING_STAGE_TIMEOUT_SECONDS", "120"))
+DELIVERY_STAGE_TIMEOUT_SECONDS = float(os.getenv("DELIVERY_STAGE_TIMEOUT_SECONDS", "60"))
+# Return as soon as the local PDF exists and finish the GCS upload in the background
+# (the response then has no report_url)
+DELIVERY_IN_BACKGROUND = os.getenv("DELIVERY_IN_BACKGROUND", "false").lower() == "true"
+
+# --- PDF Rendering ---
+# Worker processes for rendering PDFs (0 renders on the request thread). Use
+# roughly one per core when several reports are generated at the same time.
+PDF_RENDER_PROCESSES = int(os.getenv("PDF_RENDER_PROCESSES", "0"))
+PDF_RENDER_TIMEOUT_SECONDS = float(os.getenv("PDF_RENDER_TIMEOUT_SECONDS", "60"))
+
+# --- Report Delivery ---
+# Render the PDF in memory and upload it straight to GCS (no temp file). The PDF
+# is only written to TEMP_DIR if the upload fails, so /download still works then.
+DELIVERY_IN_MEMORY = os.getenv("DELIVERY_IN_MEMORY", "false").lower() == "true"
+# Maximum concurrent uploads for DeliveryAgent.deliver_many
+DELIVERY_MAX_CONCURRENCY = int(os.getenv("DELIVERY_MAX_CONCURRENCY", "8"))
+
+# --- Report Store ---
+# Finished reports (view data and PDFs) are kept in this SQLite file and served
+# by /view, /download and /reports.
+REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", os.path.join(TEMP_DIR, "research_reports.sqlite3"))
+REPORT_STORE_MAX_AGE_SECONDS = float(os.getenv("REPORT_STORE_MAX_AGE_SECONDS", str(7 * 86400)))
+REPORT_STORE_MAX_BYTES = int(os.getenv("REPORT_STORE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# In-process LRU for recently viewed reports
+REPORT_STORE_CACHE_ENTRIES = int(os.getenv("REPORT_STORE_CACHE_ENTRIES", "128"))
+REPORT_STORE_CACHE_MAX_BYTES = int(os.getenv("REPORT_STORE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# --- Request Coalescing ---
+# Identical concurrent report requests (same normalized query, documents and
+# options) share one workflow run.
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+# Seconds a finished successful report is reused for identical requests (0 = only in-flight runs)
+COALESCE_REUSE_SECONDS = float(os.getenv("COALESCE_REUSE_SECONDS", "30"))
+
+# --- Batch Reports ---
+# Maximum number of queries accepted by one /batch request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+# Reports of a batch that run at the same time (their research overlaps)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+# Concurrent Gemini analyses and PDF renders per batch (renders default to
+# the number of render processes, when those are enabled)
+BATCH_ANALYSIS_WORKERS = int(os.getenv("BATCH_ANALYSIS_WORKERS", "4"))
+BATCH_RENDER_WORKERS = int(os.getenv("BATCH_RENDER_WORKERS", str(PDF_RENDER_PROCESSES or 2)))
+
+# --- Profiling ---
+# Lets a request ask for a CPU profile of its run (X-Profile header or ?profile=1).
+# Off by default; when PROFILING_TOKEN is set, the header/flag must carry that
+# token. The /debug/profiles endpoints always need the token (404 without one).
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(TEMP_DIR, "research_profiles"))
+# Oldest profiles are deleted beyond this many
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# --- Rate Limits ---
+# Provider quotas shared by every request in this process (0 = unlimited); set
+# them to your plan's limits so bursts queue here instead of failing with 429s.
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0"))
+GEMINI_TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "0"))
+SERPER_REQUESTS_PER_MINUTE = float(os.getenv("SERPER_REQUESTS_PER_MINUTE", "0"))
+# Upper bounds for the adaptive concurrency limits; a 429 halves the limit
+# (down to RATE_LIMIT_MIN_CONCURRENCY) and successful calls grow it back.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+SERPER_MAX_CONCURRENCY = int(os.getenv("SERPER_MAX_CONCURRENCY", str(SERPER_POOL_SIZE)))
+RATE_LIMIT_MIN_CONCURRENCY = int(os.getenv("RATE_LIMIT_MIN_CONCURRENCY", "1"))
+# Calls allowed to wait per provider, and how long each may wait, before the
+# request is rejected (503 when the queue is full, 429 when the wait runs out)
+RATE_LIMIT_MAX_QUEUE = int(os.getenv("RATE_LIMIT_MAX_QUEUE", "64"))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+
+# --- Agent Pool ---
+# Build the long-lived agents in the background as soon as the app starts,
+# so the first request does not pay for Gemini/GCS client setup.
+AGENT_POOL_WARM_UP = os.getenv("AGENT_POOL_WARM_UP", "true").lower() == "true"
+
+# --- Background Jobs ---
+# Number of reports generated concurrently by the job workers
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Jobs allowed to wait for a worker before new submissions are rejected (503)
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+# SQLite file holding job status and results
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(TEMP_DIR, "research_jobs.sqlite3"))
+
+# --- Async Pipeline ---
+# Threads the asyncio orchestrator (asgi.py) hands PDF renders to, so layout
+# never blocks the event loop (with PDF_RENDER_PROCESSES they only wait on the
+# render processes)
+ASYNC_RENDER_WORKERS = int(os.getenv("ASYNC_RENDER_WORKERS", str(PDF_RENDER_PROCESSES or 2)))
@@ -1,11 +1,141 @@
 # import functions_framework
-from flask import jsonify, send_from_directory
-from orchestrator.main_orchestrator import MainOrchestrator
-from flask import Flask, request, jsonify, render_template
+from io import BytesIO
+from agents.analysis_agent import ANALYSIS_MODES
+from orchestrator.agent_pool import get_agent_pool
+from orchestrator.job_manager import JobManager, JobQueueFull, SQLiteJobStore
+from utils.metrics import REGISTRY
+from utils.report_store import build_view_data, get_report_store
+from flask import Flask, Response, jsonify, redirect, render_template, request, send_file, send_from_directory, stream_with_context
+from config import AGENT_POOL_WARM_UP, BATCH_MAX_ITEMS, JOB_DB_PATH, JOB_QUEUE_SIZE, JOB_WORKERS, RESEARCH_MAX_FAN_OUT
+from config import PROFILE_DIR, PROFILING_ENABLED, PROFILING_TOKEN
+from utils.profiling import list_profiles, load_profile
+from utils.rate_limiter import RateLimitQueueFull, check_capacity
+import atexit
+import hmac
+import json
+import math
 import os
+import threading
+import time
 
 app = Flask(__name__)
 
+# Render worker processes (utils/render_pool.py) re-import this module as
+# __mp_main__; they only render PDFs, so they skip the agents and job workers.
+IS_RENDER_WORKER = __name__ == '__mp_main__'
+
+# Long-lived agents shared by every request (see orchestrator/agent_pool.py)
+agent_pool = get_agent_pool()
+if not IS_RENDER_WORKER:
+    atexit.register(agent_pool.shutdown)
+if AGENT_POOL_WARM_UP and not IS_RENDER_WORKER:
+    threading.Thread(target=agent_pool.warm_up, name="agent-pool-warm-up", daemon=True).start()
+
+
+def parse_run_options(request_json: dict) -> dict:
+    """
+    Extracts and validates the optional per-request settings from a request body.
+
+    Raises:
+        ValueError: If a setting has the wrong type or is out of range.
+    """
+    options = {}
+    if request_json.get('fan_out') is not None:
+        fan_out = request_json['fan_out']
+        if not isinstance(fan_out, int) or isinstance(fan_out, bool) or not 1 <= fan_out <= RESEARCH_MAX_FAN_OUT:
+            raise ValueError(f"'fan_out' must be an integer between 1 and {RESEARCH_MAX_FAN_OUT}.")
+        options['fan_out'] = fan_out
+    if request_json.get('sub_queries') is not None:
+        sub_queries = request_json['sub_queries']
+        if not isinstance(sub_queries, list) or not all(isinstance(q, str) and q.strip() for q in sub_queries):
+            raise ValueError("'sub_queries' must be a list of non-empty strings.")
+        options['sub_queries'] = sub_queries[:RESEARCH_MAX_FAN_OUT]
+    if request_json.get('per_query_timeout') is not None:
+        timeout = request_json['per_query_timeout']
+        if not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or not 0 < timeout <= 60:
+            raise ValueError("'per_query_timeout' must be a number of seconds between 0 and 60.")
+        options['per_query_timeout'] = float(timeout)
+    if request_json.get('token_budget') is not None:
+        budget = request_json['token_budget']
+        if not isinstance(budget, int) or isinstance(budget, bool) or not 500 <= budget <= 1_000_000:
+            raise ValueError("'token_budget' must be an integer between 500 and 1000000.")
+        options['token_budget'] = budget
+    if request_json.get('analysis_mode') is not None:
+        if request_json['analysis_mode'] not in ANALYSIS_MODES:
+            raise ValueError(f"'analysis_mode' must be one of {', '.join(ANALYSIS_MODES)}.")
+        options['analysis_mode'] = request_json['analysis_mode']
+    if request_json.get('refresh') is not None:
+        if not isinstance(request_json['refresh'], bool):
+            raise ValueError("'refresh' must be true or false.")
+        if request_json['refresh']:
+            options['refresh'] = True
+    return options
+
+
+def profiling_authorized(value: str | None) -> bool:
+    """Checks a profiling flag or token against PROFILING_ENABLED and PROFILING_TOKEN."""
+    if not PROFILING_ENABLED or not value:
+        return False
+    if PROFILING_TOKEN:
+        return hmac.compare_digest(value, PROFILING_TOKEN)
+    return value.lower() not in ('0', 'false', 'no')
+
+
+def profile_access_authorized(token: str | None) -> bool:
+    """Checks a /debug/profiles token; without a configured PROFILING_TOKEN the endpoints do not exist."""
+    return bool(PROFILING_TOKEN) and profiling_authorized(token)
+
+
+def rate_limited_response(message: str, queue_full: bool, retry_after: float):
+    """503 when a provider's wait queue is full, 429 when its quota did not free up in time; both with Retry-After."""
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 503 if queue_full else 429
+
+
+def parse_batch_items(items) -> list[tuple[str, list[str] | None]]:
+    """
+    Normalizes the 'items' of a /batch request into (query, gcs_paths) pairs.
+
+    Each item may be a query string, a {"query": ..., "gcs_paths": [...]} object
+    or a [query, gcs_paths] pair.
+
+    Raises:
+        ValueError: If the list is empty, too long or has a malformed item.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("'items' must be a non-empty list.")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"A batch may contain at most {BATCH_MAX_ITEMS} items.")
+    parsed = []
+    for i, item in enumerate(items):
+        if isinstance(item, str):
+            query, gcs_paths = item, None
+        elif isinstance(item, dict):
+            query, gcs_paths = item.get('query'), item.get('gcs_paths')
+        elif isinstance(item, list) and len(item) == 2:
+            query, gcs_paths = item
+        else:
+            raise ValueError(f"Item {i} must be a query, an object with 'query' or a [query, gcs_paths] pair.")
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError(f"Item {i} needs a non-empty query.")
+        if gcs_paths is not None and not (isinstance(gcs_paths, list) and all(isinstance(p, str) for p in gcs_paths)):
+            raise ValueError(f"Item {i}: 'gcs_paths' must be a list of strings.")
+        parsed.append((query, gcs_paths or None))
+    return parsed
+
+
+# Background workers for the asynchronous job API (/jobs)
+job_manager = None
+if not IS_RENDER_WORKER:
+    job_manager = JobManager(
+        store=SQLiteJobStore(JOB_DB_PATH),
+        orchestrator_provider=agent_pool.get_orchestrator,
+        max_workers=JOB_WORKERS,
+        max_queue_size=JOB_QUEUE_SIZE,
+    )
+    atexit.register(job_manager.shutdown)
+
 # Register as an HTTP-triggered function
 # @functions_framework.http
 
@@ -17,8 +147,20 @@ def research_report_agent():
     Expects a POST request with a JSON body:
     {
         "query": "Your research question",
-        "gcs_paths": ["gs://your-bucket/doc1.txt"] (optional)
+        "gcs_paths": ["gs://your-bucket/doc1.txt"] (optional),
+        "async": true (optional; return a job id right away, see /jobs),
+        "fan_out": 4 (optional; number of search queries to run),
+        "sub_queries": ["..."] (optional; extra queries to search),
+        "per_query_timeout": 10 (optional; seconds per search),
+        "token_budget": 20000 (optional; max research tokens sent to Gemini),
+        "analysis_mode": "map_reduce" (optional; "single", "map_reduce" or "auto"),
+        "refresh": true (optional; update this request's previous report with only
+            the new or changed sources, or return it as is if nothing changed)
     }
+
+    With PROFILING_ENABLED, an 'X-Profile' header (or ?profile=...) set to 1, or
+    to PROFILING_TOKEN when one is configured, profiles the run; the response
+    then includes a 'profile_id' for /debug/profiles/<id>.
     """
     if request.method == 'GET':
         return render_template('index.html') if hasattr(app, 'template_folder') else 'Auto-Research Report Agent API. Use POST method with JSON body containing "query" field.'
@@ -32,37 +174,33 @@ def research_report_agent():
 
     query = request_json['query']
     gcs_paths = request_json.get('gcs_paths') # Optional
+    try:
+        options = parse_run_options(request_json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     print(f"Received request for query: {query}")
 
+    # Clients that cannot hold the connection open can ask for a job id instead
+    if request_json.get('async'):
+        return submit_job(query, gcs_paths, options)
+
+    try:
+        # Refuse up front rather than start a run that would queue behind a full limiter
+        check_capacity()
+    except RateLimitQueueFull as e:
+        return rate_limited_response(str(e), True, e.retry_after)
+
     try:
-        orchestrator = MainOrchestrator()
-        result = orchestrator.run(query, gcs_paths)
+        orchestrator = agent_pool.get_orchestrator()
+        profile = profiling_authorized(request.headers.get('X-Profile') or request.args.get('profile'))
+        result = orchestrator.run(query, gcs_paths, options=options, profile=profile)
 
         if result['status'] == 'success':
-            # Save research data as JSON for the /view page
-            import os, json
-            from config import TEMP_DIR
-            local_pdf_path = result.get('local_pdf_path')
-            if local_pdf_path:
-                filename = os.path.basename(local_pdf_path)
-                json_path = os.path.join(TEMP_DIR, os.path.splitext(filename)[0] + '.json')
-                # Flatten the insights dict to match the template
-                insights = result.get('insights', {})
-                data = {
-                    "pdf_filename": filename,
-                    "title": insights.get("title", "Research Report"),
-                    "executive_summary": insights.get("executive_summary", ""),
-                    "key_insights": insights.get("key_insights", []),
-                    "source_analysis": insights.get("source_analysis", {"sentiment": "N/A", "confidence": "N/A"}),
-                    "conclusion": insights.get("conclusion", "")
-                }
-                try:
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                except Exception as e:
-                    print(f"Failed to save report data for view: {e}")
             return jsonify(result), 200
+        elif result.get('rate_limited'):
+            limited = result['rate_limited']
+            return rate_limited_response(result['message'], limited['queue_full'], limited['retry_after'])
         else:
             return jsonify({"error": result['message']}), 500
 
@@ -70,42 +208,265 @@ def research_report_agent():
         print(f"An unexpected error occurred: {e}")
         return jsonify({"error": "An internal server error occurred."}), 500
 
+
+def submit_job(query: str, gcs_paths: list[str] | None, options: dict | None = None):
+    """Queues a report job and returns 202 with its id, or 503 if the queue is full."""
+    try:
+        job_id = job_manager.submit(query, gcs_paths, options)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"}), 202
+
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Starts report generation in the background and returns a job id immediately.
+
+    Expects the same JSON body as POST /.
+    """
+    request_json = request.get_json(silent=True)
+    if not request_json or 'query' not in request_json:
+        return jsonify({"error": "Invalid request. JSON body with 'query' key is required."}), 400
+    try:
+        options = parse_run_options(request_json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return submit_job(request_json['query'], request_json.get('gcs_paths'), options)
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Returns a job's overall status, per-stage status and (once finished) its result."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(job), 200
+
+
+@app.route('/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Returns the job's result: 200 when done, 202 while pending, 500 if it failed."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    if job["status"] == "succeeded":
+        return jsonify(job["result"]), 200
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"] or "Job failed."}), 500
+    return jsonify({"job_id": job_id, "status": job["status"], "stages": job["stages"]}), 202
+
+
+def format_sse(event: dict) -> str:
+    """Formats an orchestrator stream event as a server-sent event."""
+    name = event.get('event', 'message')
+    data = {k: v for k, v in event.items() if k != 'event'}
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/stream', methods=['GET', 'POST'])
+def stream_report():
+    """
+    Runs the workflow and streams progress as server-sent events (text/event-stream).
+
+    Accepts the same JSON body as POST /, or for EventSource clients a GET with
+    ?query=...&gcs_paths=...&analysis_mode=... (numeric settings such as
+    token_budget and fan_out are also read from the query string).
+
+    Events: 'stage' on every stage change, 'insight' for each key insight and
+    'field' for each report field as soon as Gemini finishes writing it, then
+    'done' with the same payload POST / returns, or 'error'.
+    """
+    if request.method == 'GET':
+        request_json = {k: v for k, v in request.args.items() if k != 'gcs_paths'}
+        if request.args.getlist('gcs_paths'):
+            request_json['gcs_paths'] = request.args.getlist('gcs_paths')
+        for key in ('fan_out', 'token_budget', 'per_query_timeout'):
+            if key in request_json:
+                try:
+                    request_json[key] = float(request_json[key]) if key == 'per_query_timeout' else int(request_json[key])
+                except ValueError:
+                    return jsonify({"error": f"'{key}' must be a number."}), 400
+        if 'refresh' in request_json:
+            request_json['refresh'] = request_json['refresh'].lower() in ('1', 'true', 'yes')
+    else:
+        request_json = request.get_json(silent=True)
+    if not request_json or not request_json.get('query'):
+        return jsonify({"error": "Invalid request. A 'query' is required."}), 400
+    try:
+        options = parse_run_options(request_json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = request_json['query']
+    gcs_paths = request_json.get('gcs_paths')
+    try:
+        check_capacity()
+    except RateLimitQueueFull as e:
+        return rate_limited_response(str(e), True, e.retry_after)
+    print(f"Received streaming request for query: {query}")
+
+    def generate():
+        try:
+            orchestrator = agent_pool.get_orchestrator()
+            for event in orchestrator.run_stream(query, gcs_paths, options=options):
+                yield format_sse(event)
+        except Exception as e:
+            print(f"An unexpected error occurred while streaming: {e}")
+            yield format_sse({"event": "error", "message": "An internal server error occurred."})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Disable proxy buffering so each event reaches the client as soon as it is written
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/batch', methods=['POST'])
+def batch_reports():
+    """
+    Generates reports for many queries in one request.
+
+    Expects a JSON body with 'items' (see parse_batch_items) and optionally the
+    same settings as POST /, applied to every item. Responds with newline-
+    delimited JSON: one {"event": "item", "index", "query", "result"} line per
+    report as it finishes, then {"event": "done", "total", "succeeded", "elapsed_seconds"}.
+    """
+    request_json = request.get_json(silent=True)
+    if not request_json or 'items' not in request_json:
+        return jsonify({"error": "Invalid request. JSON body with 'items' key is required."}), 400
+    try:
+        items = parse_batch_items(request_json['items'])
+        options = parse_run_options(request_json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        check_capacity()
+    except RateLimitQueueFull as e:
+        return rate_limited_response(str(e), True, e.retry_after)
+    print(f"Received batch request with {len(items)} item(s).")
+
+    def generate():
+        start = time.perf_counter()
+        succeeded = 0
+        try:
+            orchestrator = agent_pool.get_orchestrator()
+            for index, result in orchestrator.run_batch(items, options=options):
+                succeeded += result['status'] == 'success'
+                line = {"event": "item", "index": index, "query": items[index][0], "result": result}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except Exception as e:
+            print(f"An unexpected error occurred during the batch: {e}")
+            yield json.dumps({"event": "error", "message": "An internal server error occurred."}) + "\n"
+            return
+        done = {"event": "done", "total": len(items), "succeeded": succeeded,
+                "elapsed_seconds": round(time.perf_counter() - start, 2)}
+        yield json.dumps(done) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
 @app.route('/view')
 def view_report():
-    # Accept ?filename=... as query parameter
-    from config import TEMP_DIR
-    import os, json
+    """Renders a stored report, looked up by ?id=... or by its PDF ?filename=..."""
+    store = get_report_store()
+    report_id = request.args.get('id')
     filename = request.args.get('filename')
-    data = None
-    if filename:
-        # Try to load a corresponding JSON data file (same name as PDF, but .json)
-        json_path = os.path.join(TEMP_DIR, os.path.splitext(filename)[0] + '.json')
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                # Ensure all required fields exist for the template
-                data.setdefault("pdf_filename", filename)
-                data.setdefault("title", "Research Report")
-                data.setdefault("key_insights", [])
-                data.setdefault("source_analysis", {"sentiment": "N/A", "confidence": "N/A"})
-                data.setdefault("executive_summary", "")
-                data.setdefault("conclusion", "")
-            except Exception as e:
-                print(f"Failed to load report data: {e}")
-                data = None
-        if data is None:
-            # If no JSON, just provide minimal data with pdf_filename
-            data = {"pdf_filename": filename, "title": "Research Report", "key_insights": [], "source_analysis": {"sentiment": "N/A", "confidence": "N/A"}, "executive_summary": "", "conclusion": ""}
+    report = store.get(report_id) if report_id else store.find_by_filename(filename) if filename else None
+    if report:
+        data = report['view']
+    elif filename:
+        data = build_view_data({}, filename)
     else:
-        data = {"pdf_filename": None, "title": "No Report Selected", "key_insights": [], "source_analysis": {"sentiment": "N/A", "confidence": "N/A"}, "executive_summary": "", "conclusion": ""}
-    print(f"Loaded data for /view: {data}")  # Print to ensure data is valid
+        data = build_view_data({"title": "No Report Selected"}, None)
     return render_template('report_template.html', data=data) if hasattr(app, 'template_folder') else 'Auto-Research Report Agent API. Use POST method with JSON body containing "query" field.'
 
 
+@app.route('/reports')
+def list_reports():
+    """
+    Lists stored reports, newest first.
+
+    Query parameters: limit (1-100, default 20), offset (default 0) and
+    query (optional substring filter on the research question).
+    """
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "'limit' and 'offset' must be integers."}), 400
+    if not 1 <= limit <= 100 or offset < 0:
+        return jsonify({"error": "'limit' must be between 1 and 100 and 'offset' must not be negative."}), 400
+    page = get_report_store().list_reports(limit=limit, offset=offset, query=request.args.get('query'))
+    next_offset = offset + limit if offset + limit < page['total'] else None
+    return jsonify({**page, "limit": limit, "offset": offset, "next_offset": next_offset}), 200
+
+
+@app.route('/reports/<report_id>')
+def get_report(report_id):
+    """Returns a stored report's metadata and view data."""
+    report = get_report_store().get(report_id)
+    if report is None:
+        return jsonify({"error": "Report not found."}), 404
+    return jsonify(report), 200
+
+
+@app.route('/health')
+def health():
+    """Reports whether the shared agents are built and ready to serve requests."""
+    status = agent_pool.health()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.route('/metrics')
+def metrics():
+    """Exposes stage and external-call metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/debug/profiles')
+def debug_profiles():
+    """Lists captured profiles (404 unless profiling is enabled and PROFILING_TOKEN is set and matches)."""
+    if not profile_access_authorized(request.headers.get('X-Profile-Token') or request.args.get('token')):
+        return jsonify({"error": "Not found."}), 404
+    return jsonify({"profiles": list_profiles(PROFILE_DIR)}), 200
+
+
+@app.route('/debug/profiles/<profile_id>')
+def debug_profile(profile_id):
+    """
+    Returns a profile's stage timings, time breakdown and top functions as JSON,
+    or with ?format=pstats the raw cProfile data (for pstats, snakeviz, ...).
+    """
+    if not profile_access_authorized(request.headers.get('X-Profile-Token') or request.args.get('token')):
+        return jsonify({"error": "Not found."}), 404
+    summary = load_profile(PROFILE_DIR, profile_id)
+    if summary is None:
+        return jsonify({"error": "Profile not found."}), 404
+    if request.args.get('format') == 'pstats':
+        if not summary.get('has_pstats'):
+            return jsonify({"error": "No CPU profile was captured for this run."}), 404
+        return send_from_directory(PROFILE_DIR, f"{profile_id}.prof", as_attachment=True)
+    return jsonify(summary), 200
+
+
 @app.route('/download/<filename>')
 def download_report(filename):
     from config import TEMP_DIR
+    store = get_report_store()
+    report = store.find_by_filename(filename)
+    if report:
+        pdf = store.get_pdf(report['id'])
+        if pdf is not None:
+            return send_file(BytesIO(pdf), mimetype='application/pdf', as_attachment=True, download_name=filename)
+        if report.get('report_url'):
+            return redirect(report['report_url'])
+    # Reports that were never archived (e.g. the store failed) stay in TEMP_DIR
     return send_from_directory(TEMP_DIR, filename, as_attachment=True)
 
 
@@ -0,0 +1,189 @@
+# auto-research-agent/orchestrator/agent_pool.py
+
+import threading
+import time
+from agents.research_agent import AsyncResearchAgent, ResearchAgent
+from agents.analysis_agent import AsyncAnalysisAgent, AnalysisAgent
+from agents.reporting_agent import ReportingAgent
+from agents.delivery_agent import AsyncDeliveryAgent, DeliveryAgent
+from orchestrator.async_orchestrator import AsyncOrchestrator
+from orchestrator.coalescer import RequestCoalescer
+from orchestrator.main_orchestrator import MainOrchestrator
+from utils.api_clients import get_storage_client, close_storage_client
+from utils.lazy import IMPORT_SECONDS, preload_all
+from utils.rate_limiter import rate_limiter_stats
+from utils.render_pool import close_render_pool
+from utils.report_store import get_report_store
+from config import COALESCE_REQUESTS, COALESCE_REUSE_SECONDS
+
+class AgentPool:
+    """
+    Process-wide holder of long-lived, thread-safe agent instances.
+
+    Building the agents is expensive (Gemini configuration, model creation, prompt
+    loading, GCS client setup), so the pool does it once and hands the same
+    MainOrchestrator to every request. Per-run data lives in a RunContext created
+    by MainOrchestrator.run, which keeps concurrent requests isolated.
+
+    The asyncio entry point (asgi.py) gets its own AsyncOrchestrator from
+    get_async_orchestrator(), sharing the GCS client and report store.
+
+    Lifecycle:
+        warm_up():  build the agents eagerly (e.g. at process start).
+        health():   report whether the agents are ready and which backends are up.
+        shutdown(): release shared clients; the next request rebuilds everything.
+    """
+    def __init__(self, orchestrator_factory=None, async_orchestrator_factory=None):
+        self._orchestrator_factory = orchestrator_factory or self._build_orchestrator
+        self._async_orchestrator_factory = async_orchestrator_factory or self._build_async_orchestrator
+        self._lock = threading.Lock()
+        self._orchestrator = None
+        self._async_orchestrator = None
+        self._last_error = None
+        self._ready_at = None
+
+    @staticmethod
+    def _build_orchestrator() -> MainOrchestrator:
+        """Creates the agents, sharing one GCS client between research and delivery."""
+        storage_client = get_storage_client()
+        return MainOrchestrator(
+            research_agent=ResearchAgent(storage_client=storage_client),
+            analysis_agent=AnalysisAgent(),
+            reporting_agent=ReportingAgent(),
+            delivery_agent=DeliveryAgent(storage_client=storage_client),
+            report_store=get_report_store(),
+            coalescer=RequestCoalescer(reuse_seconds=COALESCE_REUSE_SECONDS) if COALESCE_REQUESTS else None,
+        )
+
+    @staticmethod
+    def _build_async_orchestrator() -> AsyncOrchestrator:
+        storage_client = get_storage_client()
+        return AsyncOrchestrator(
+            research_agent=AsyncResearchAgent(storage_client=storage_client),
+            analysis_agent=AsyncAnalysisAgent(),
+            reporting_agent=ReportingAgent(),
+            delivery_agent=AsyncDeliveryAgent(storage_client=storage_client),
+            report_store=get_report_store(),
+        )
+
+    def get_async_orchestrator(self) -> AsyncOrchestrator:
+        """
+        Returns the shared AsyncOrchestrator, building it on first use. Building
+        blocks (client setup), so call this from a thread, not the event loop.
+        """
+        orchestrator = self._async_orchestrator
+        if orchestrator is not None:
+            return orchestrator
+        with self._lock:
+            if self._async_orchestrator is None:
+                print("AgentPool: Building async agents...")
+                self._async_orchestrator = self._async_orchestrator_factory()
+            return self._async_orchestrator
+
+    async def aclose_async_orchestrator(self) -> None:
+        """Closes the AsyncOrchestrator from its event loop (e.g. on ASGI lifespan shutdown)."""
+        with self._lock:
+            orchestrator, self._async_orchestrator = self._async_orchestrator, None
+        if orchestrator is not None:
+            await orchestrator.aclose()
+
+    def get_orchestrator(self) -> MainOrchestrator:
+        """
+        Returns the shared orchestrator, building it on first use.
+
+        Raises:
+            Exception: Whatever the agent constructors raise (e.g. a missing API key).
+        """
+        orchestrator = self._orchestrator
+        if orchestrator is not None:
+            return orchestrator
+        with self._lock:
+            if self._orchestrator is None:
+                print("AgentPool: Building agents...")
+                try:
+                    self._orchestrator = self._orchestrator_factory()
+                except Exception as e:
+                    self._last_error = str(e)
+                    raise
+                self._last_error = None
+                self._ready_at = time.time()
+                print("AgentPool: Agents ready.")
+            return self._orchestrator
+
+    def warm_up(self) -> bool:
+        """
+        Builds the agents and imports the lazily loaded dependencies ahead of the
+        first request.
+
+        Returns:
+            True if the pool is ready, False if building the agents failed. A failed
+            warm-up is retried on the next call to get_orchestrator().
+        """
+        try:
+            self.get_orchestrator()
+            preload_all()
+            return True
+        except Exception as e:
+            print(f"AgentPool: Warm-up failed: {e}")
+            return False
+
+    def health(self) -> dict:
+        """Returns a JSON-serializable summary of the pool's state."""
+        orchestrator = self._orchestrator
+        status = {
+            "ready": orchestrator is not None,
+            "async_ready": self._async_orchestrator is not None,
+            "uptime_seconds": round(time.time() - self._ready_at, 1) if self._ready_at else None,
+            "last_error": self._last_error,
+        }
+        delivery_agent = getattr(orchestrator, "delivery_agent", None)
+        if delivery_agent is not None:
+            status["gcs_available"] = delivery_agent.storage_client is not None
+        research_agent = getattr(orchestrator, "research_agent", None)
+        if research_agent is not None:
+            status["search_cache"] = research_agent.search_client.cache_info()
+            status["search_client"] = research_agent.search_client.stats()
+        analysis_agent = getattr(orchestrator, "analysis_agent", None)
+        if analysis_agent is not None:
+            status["analysis_cache"] = analysis_agent.cache_info()
+        coalescer = getattr(orchestrator, "coalescer", None)
+        if coalescer is not None:
+            status["coalescer"] = coalescer.stats()
+        status["rate_limits"] = rate_limiter_stats()
+        # Heavy dependencies loaded so far and what each import cost (see utils/lazy.py)
+        status["lazy_imports"] = dict(IMPORT_SECONDS)
+        return status
+
+    def shutdown(self) -> None:
+        """Drops the shared agents, waiting for background stages, and closes the shared clients and render processes."""
+        with self._lock:
+            async_orchestrator, self._async_orchestrator = self._async_orchestrator, None
+            if self._orchestrator is None and async_orchestrator is None:
+                return
+            print("AgentPool: Shutting down agents...")
+            orchestrator = self._orchestrator
+            self._orchestrator = None
+            self._ready_at = None
+        if async_orchestrator is not None:
+            # Its event loop is gone (or never ran the lifespan shutdown), so only the threads are stopped
+            async_orchestrator.close()
+        close = getattr(orchestrator, "close", None)
+        if close is not None:
+            close()  # lets background deliveries finish
+        research_agent = getattr(orchestrator, "research_agent", None)
+        if research_agent is not None:
+            research_agent.search_client.close()
+        close_storage_client()
+        close_render_pool()
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_agent_pool() -> AgentPool:
+    """Returns the process-wide AgentPool."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = AgentPool()
+    return _default_pool
@@ -0,0 +1,116 @@
+# auto-research-agent/orchestrator/async_orchestrator.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from agents.research_agent import AsyncResearchAgent
+from agents.analysis_agent import AsyncAnalysisAgent
+from agents.reporting_agent import ReportingAgent
+from agents.delivery_agent import AsyncDeliveryAgent
+from orchestrator.main_orchestrator import OrchestratorBase
+from orchestrator.run_context import RunContext
+from utils.context_packer import ContextPacker
+from utils.dedup import NearDuplicateFilter
+from utils.report_store import SQLiteReportStore
+from config import ASYNC_RENDER_WORKERS
+
+class AsyncOrchestrator(OrchestratorBase):
+    """
+    The research-to-report workflow on an asyncio event loop (see asgi.py).
+
+    Web search, document reads, analysis and delivery are coroutine stages, so
+    a report waiting on Serper, GCS or Gemini holds no thread and one loop can
+    carry many reports at once. The remaining stages are CPU work or local I/O
+    and run on executors: PDF rendering on its own ASYNC_RENDER_WORKERS threads
+    (handing off to the render processes when PDF_RENDER_PROCESSES is set), the
+    rest on the stage threads. The GCS SDK has no async API, so the research
+    and delivery agents run its calls on their own bounded executors.
+
+    The workflow graph and the non-I/O stages are shared with MainOrchestrator
+    (OrchestratorBase). PDFs are always rendered in memory and uploaded before
+    the run returns. Runs are not coalesced, and streaming, batches and
+    profiling are only offered by MainOrchestrator.
+    """
+    def __init__(
+        self,
+        research_agent: AsyncResearchAgent | None = None,
+        analysis_agent: AsyncAnalysisAgent | None = None,
+        reporting_agent: ReportingAgent | None = None,
+        delivery_agent: AsyncDeliveryAgent | None = None,
+        context_packer: ContextPacker | None = None,
+        deduplicator: NearDuplicateFilter | None = None,
+        report_store: SQLiteReportStore | None = None,
+        render_workers: int = ASYNC_RENDER_WORKERS,
+    ):
+        super().__init__(
+            research_agent=research_agent or AsyncResearchAgent(),
+            analysis_agent=analysis_agent or AsyncAnalysisAgent(),
+            reporting_agent=reporting_agent,
+            delivery_agent=delivery_agent or AsyncDeliveryAgent(),
+            context_packer=context_packer,
+            deduplicator=deduplicator,
+            in_memory_delivery=True,
+            report_store=report_store,
+        )
+        self.render_executor = ThreadPoolExecutor(max_workers=max(1, render_workers), thread_name_prefix="async-render")
+
+    async def run(
+        self,
+        query: str,
+        gcs_paths: list[str] | None = None,
+        on_stage: Callable[[str, str], None] | None = None,
+        options: dict | None = None,
+    ) -> dict:
+        """
+        Executes the full workflow on the running event loop.
+
+        Args and result are those of MainOrchestrator.run (without profiling),
+        but the call is a coroutine.
+        on_stage is called on the event loop for coroutine stages and on a
+        worker thread for the others.
+        """
+        ctx = RunContext(query=query, gcs_paths=gcs_paths, options=options or {}, on_stage=on_stage)
+        print(f"Orchestrator: Starting async workflow {ctx.run_id} for query: '{ctx.query}'")
+        start = time.perf_counter()
+        outcome = await self.graph.run_async(ctx, self.executor, {"reporting": self.render_executor})
+        return self._finish(ctx, outcome, start)
+
+    async def _in_executor(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _search_web(self, ctx: RunContext) -> bool:
+        ctx.web_content = await self.research_agent.search_web(ctx.query, **self._research_options(ctx))
+        return True
+
+    async def _read_documents(self, ctx: RunContext) -> bool:
+        if ctx.gcs_paths and not ctx.documents:
+            ctx.documents = await self.research_agent.read_documents(ctx.gcs_paths)
+        return True
+
+    async def _analyze(self, ctx: RunContext) -> bool:
+        analysis = await self.analysis_agent.analyze(
+            ctx.packed_content, self._analysis_mode(ctx), **self._refresh_options(ctx))
+        return self._record_analysis(ctx, analysis)
+
+    async def _deliver(self, ctx: RunContext) -> bool:
+        ctx.final_report_url = await self.delivery_agent.deliver_bytes(ctx.report_bytes, ctx.report_filename)
+        # Report store writes and the fallback file are blocking I/O
+        return await self._in_executor(self._record_upload, ctx)
+
+    def close(self) -> None:
+        """Stops the stage, render, download and upload threads (see aclose())."""
+        super().close()
+        self.render_executor.shutdown(wait=True)
+        for agent in (self.research_agent, self.delivery_agent):
+            close = getattr(agent, "close", None)
+            if close is not None:
+                close()
+
+    async def aclose(self) -> None:
+        """Waits for background stages, closes the search client's connections and stops the threads."""
+        await self.graph.wait_background()
+        aclose = getattr(self.research_agent.search_client, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
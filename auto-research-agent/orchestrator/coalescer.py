@@ -0,0 +1,129 @@
+# auto-research-agent/orchestrator/coalescer.py
+
+import threading
+from typing import Callable
+from utils.cache import LRUCache, make_cache_key
+
+def coalesce_key(query: str, gcs_paths: list[str] | None = None, options: dict | None = None) -> str:
+    """
+    Builds the key under which identical report requests are coalesced.
+
+    The query is case-folded with whitespace collapsed, and the document paths
+    are de-duplicated and sorted, so trivially different spellings of the same
+    request share one run.
+    """
+    normalized = " ".join(query.casefold().split())
+    return make_cache_key(normalized, sorted(set(gcs_paths or [])), options or {})
+
+class _Flight:
+    """One in-flight run and the callers waiting on it."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Stage events seen so far, replayed to callers that join late
+        self.events = []
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def notify(self, stage: str, status: str) -> None:
+        with self.lock:
+            self.events.append((stage, status))
+            for listener in self.listeners:
+                _safe_call(listener, stage, status)
+
+    def subscribe(self, listener: Callable[[str, str], None]) -> None:
+        with self.lock:
+            for stage, status in self.events:
+                _safe_call(listener, stage, status)
+            self.listeners.append(listener)
+
+def _safe_call(listener: Callable[[str, str], None], stage: str, status: str) -> None:
+    # One caller's broken progress callback must not fail the run for everyone
+    try:
+        listener(stage, status)
+    except Exception as e:
+        print(f"RequestCoalescer: Stage callback failed: {e}")
+
+class RequestCoalescer:
+    """
+    Single-flight execution of identical report requests.
+
+    The first caller for a key runs the workflow. Callers arriving with the same
+    key while it runs wait for it and receive the same result (or exception),
+    along with its stage events. Successful results are kept for `reuse_seconds`
+    after they finish, so requests arriving just after a run also share it.
+    """
+    def __init__(self, reuse_seconds: float = 30.0, max_recent: int = 256):
+        self.reuse_seconds = reuse_seconds
+        self._recent = LRUCache(max_entries=max_recent, ttl_seconds=reuse_seconds) if reuse_seconds > 0 else None
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._counts = {"executed": 0, "joined": 0, "reused": 0, "failed": 0}
+
+    def run(
+        self,
+        key: str,
+        func: Callable[[Callable[[str, str], None]], dict],
+        on_stage: Callable[[str, str], None] | None = None,
+    ) -> dict:
+        """
+        Runs func once per key among concurrent callers.
+
+        Args:
+            key: Coalescing key, usually from coalesce_key().
+            func: Runs the workflow. It is passed a callback to report stage
+                changes with, which forwards them to every waiting caller.
+            on_stage: Optional progress callback for this caller.
+
+        Returns:
+            The workflow result. Callers other than the one that ran it get a
+            shallow copy.
+        """
+        with self._lock:
+            if self._recent is not None:
+                cached = self._recent.get(key)
+                if cached is not None:
+                    self._counts["reused"] += 1
+                    return dict(cached)
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self._counts["executed"] += 1
+            else:
+                self._counts["joined"] += 1
+
+        if on_stage:
+            flight.subscribe(on_stage)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return dict(flight.result)
+
+        try:
+            flight.result = func(flight.notify)
+            return flight.result
+        except BaseException as e:
+            # SystemExit and KeyboardInterrupt too: followers must not wait forever
+            flight.error = e
+            raise
+        finally:
+            try:
+                with self._lock:
+                    del self._in_flight[key]
+                    if flight.error is not None or flight.result.get("status") != "success":
+                        self._counts["failed"] += 1
+                    elif self._recent is not None:
+                        self._recent.set(key, flight.result)
+            finally:
+                flight.done.set()
+
+    def stats(self) -> dict:
+        """Returns the coalescing counters; `saved_runs` is how many requests did not run the workflow."""
+        with self._lock:
+            stats = dict(self._counts)
+            stats["in_flight"] = len(self._in_flight)
+        stats["saved_runs"] = stats["joined"] + stats["reused"]
+        return stats
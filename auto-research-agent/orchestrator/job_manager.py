@@ -0,0 +1,301 @@
+# auto-research-agent/orchestrator/job_manager.py
+
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable
+from orchestrator.run_context import STAGES
+
+# How often idle workers check whether shutdown() was called
+WORKER_POLL_SECONDS = 0.5
+# Tells this process's jobs apart from those of an earlier process that had the same pid
+PROCESS_STARTED_AT = time.time()
+
+class JobQueueFull(Exception):
+    """Raised when a job cannot be accepted because the queue is at capacity."""
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, but belongs to another user
+    return True
+
+class SQLiteJobStore:
+    """
+    Persists job status, per-stage progress and results in a local SQLite file.
+
+    A single connection is shared by all worker threads and guarded by a lock,
+    which is plenty for the handful of writes each job makes. Each job records
+    the process that accepted it (host, pid and start time), so several worker
+    processes can share one file.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    gcs_paths TEXT,
+                    stages TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    options TEXT
+                )
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "options" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT")
+            if "owner_host" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner_host TEXT")
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN owner_started_at REAL")
+            self._fail_orphaned_jobs()
+
+    def _fail_orphaned_jobs(self) -> None:
+        """
+        Fails jobs left queued/running by a process on this host that has exited
+        (they will never be picked up again). Jobs of live sibling processes, and
+        of other hosts, are left alone.
+        """
+        rows = self._conn.execute(
+            "SELECT DISTINCT owner_pid, owner_started_at FROM jobs WHERE status IN ('queued', 'running') "
+            "AND (owner_host = ? OR owner_host IS NULL)",
+            (self.host,),
+        ).fetchall()
+        for row in rows:
+            pid, started_at = row["owner_pid"], row["owner_started_at"]
+            if pid == self.pid:
+                alive = started_at == PROCESS_STARTED_AT
+            else:
+                alive = pid is not None and _process_alive(pid)
+            if alive:
+                continue
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', finished_at = ? "
+                "WHERE status IN ('queued', 'running') AND (owner_host = ? OR owner_host IS NULL) "
+                "AND owner_pid IS ? AND owner_started_at IS ?",
+                (time.time(), self.host, pid, started_at),
+            )
+
+    def create(self, job_id: str, query: str, gcs_paths: list[str] | None, options: dict | None = None) -> None:
+        """Records a new job in the 'queued' state."""
+        stages = {stage: "pending" for stage in STAGES}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, query, gcs_paths, stages, created_at, options, "
+                "owner_host, owner_pid, owner_started_at) VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, query, json.dumps(gcs_paths), json.dumps(stages), time.time(), json.dumps(options or {}),
+                 self.host, self.pid, PROCESS_STARTED_AT),
+            )
+
+    def mark_running(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def update_stage(self, job_id: str, stage: str, status: str) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row["stages"])
+            stages[stage] = status
+            self._conn.execute("UPDATE jobs SET stages = ? WHERE id = ?", (json.dumps(stages), job_id))
+
+    def finish(self, job_id: str, status: str, result: dict | None = None, error: str | None = None) -> None:
+        """Stores the final status ('succeeded' or 'failed') with the result or error."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> dict | None:
+        """Returns the job as a JSON-serializable dict, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "query": row["query"],
+            "gcs_paths": json.loads(row["gcs_paths"]) if row["gcs_paths"] else None,
+            "options": json.loads(row["options"]) if row["options"] else {},
+            "stages": json.loads(row["stages"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class JobManager:
+    """
+    Runs report generation jobs on a bounded pool of background worker threads.
+
+    Jobs are accepted into an in-process queue with a fixed capacity and executed
+    by `max_workers` threads, each calling MainOrchestrator.run. Progress and
+    results are written to the job store so the HTTP layer can answer status
+    requests without blocking on the pipeline.
+    """
+    def __init__(
+        self,
+        store: SQLiteJobStore,
+        orchestrator_provider: Callable,
+        max_workers: int = 4,
+        max_queue_size: int = 100,
+        on_success: Callable[[dict], None] | None = None,
+    ):
+        """
+        Args:
+            store: Where job state is persisted.
+            orchestrator_provider: Zero-argument callable returning the orchestrator
+                to run jobs with (e.g. AgentPool.get_orchestrator).
+            max_workers: Number of jobs executed concurrently.
+            max_queue_size: Number of jobs that may wait for a worker before
+                submit() starts rejecting new ones.
+            on_success: Optional callback invoked with each successful result.
+        """
+        self.store = store
+        self.orchestrator_provider = orchestrator_provider
+        self.max_workers = max_workers
+        self.on_success = on_success
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._workers = []
+        self._workers_lock = threading.Lock()
+        self._stopping = False
+
+    def _ensure_workers(self) -> None:
+        """Starts the worker threads on first use."""
+        if self._workers:
+            return
+        with self._workers_lock:
+            if self._workers:
+                return
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, query: str, gcs_paths: list[str] | None = None, options: dict | None = None) -> str:
+        """
+        Queues a report generation job.
+
+        Args:
+            query: The user's research query.
+            gcs_paths: Optional list of GCS document paths.
+            options: Optional per-request settings passed to MainOrchestrator.run.
+
+        Returns:
+            The new job's id.
+
+        Raises:
+            JobQueueFull: If the queue is at capacity.
+        """
+        self._ensure_workers()
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, query, gcs_paths, options)
+        try:
+            self._queue.put_nowait((job_id, query, gcs_paths, options or {}))
+        except queue.Full:
+            self.store.finish(job_id, "failed", error="Job queue is full")
+            raise JobQueueFull("Job queue is full, try again later.")
+        print(f"JobManager: Queued job {job_id} for query: '{query}'")
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        return self.store.get(job_id)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _worker_loop(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=WORKER_POLL_SECONDS)
+            except queue.Empty:
+                if self._stopping:
+                    return
+                continue
+            if item is None:
+                self._queue.task_done()
+                return
+            try:
+                self._run_job(*item)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job_id: str, query: str, gcs_paths: list[str] | None, options: dict) -> None:
+        print(f"JobManager: Running job {job_id}")
+        self.store.mark_running(job_id)
+        try:
+            orchestrator = self.orchestrator_provider()
+            result = orchestrator.run(
+                query,
+                gcs_paths,
+                on_stage=lambda stage, status: self.store.update_stage(job_id, stage, status),
+                options=options,
+            )
+        except Exception as e:
+            print(f"JobManager: Job {job_id} crashed: {e}")
+            self.store.finish(job_id, "failed", error=str(e))
+            return
+
+        if result.get("status") != "success":
+            self.store.finish(job_id, "failed", result=result, error=result.get("message"))
+            return
+
+        if self.on_success:
+            try:
+                self.on_success(result)
+            except Exception as e:
+                print(f"JobManager: on_success callback failed for job {job_id}: {e}")
+        self.store.finish(job_id, "succeeded", result=result)
+        print(f"JobManager: Job {job_id} succeeded")
+
+    def wait_idle(self) -> None:
+        """Blocks until every queued job has been processed (used by tests)."""
+        self._queue.join()
+
+    def shutdown(self) -> None:
+        """Stops the workers once the jobs already queued have finished."""
+        with self._workers_lock:
+            if self._stopping:
+                return
+            self._stopping = True
+            # The sentinels only wake idle workers sooner; with a full queue the
+            # workers see the stop flag once they have drained it
+            for _ in self._workers:
+                try:
+                    self._queue.put_nowait(None)
+                except queue.Full:
+                    break
+        for worker in self._workers:
+            worker.join(timeout=5)
@@ -1,77 +1,533 @@
 # auto-research-agent/orchestrator/main_orchestrator.py
 
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 from agents.research_agent import ResearchAgent
 from agents.analysis_agent import AnalysisAgent
 from agents.reporting_agent import ReportingAgent
 from agents.delivery_agent import DeliveryAgent
+from orchestrator.coalescer import RequestCoalescer, coalesce_key
+from orchestrator.refresh import (
+    build_changed_content,
+    diff_sources,
+    hash_sources,
+    insights_from_view,
+    refresh_key,
+    split_sources,
+)
+from orchestrator.run_context import RunContext
+from orchestrator.stage_graph import GraphOutcome, Stage, StageGraph
+from utils.context_packer import ContextPacker
+from utils.dedup import NearDuplicateFilter
+from utils.metrics import DEDUP_PASSAGES, DEDUP_SAVED, RUN_SECONDS, RUNS
+from utils.profiling import ProfileSession
+from utils.rate_limiter import RateLimitError, RateLimitQueueFull
+from utils.report_store import SQLiteReportStore
+from config import (
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_MAX_PASSAGE_TOKENS,
+    DEDUP_ENABLED,
+    ANALYSIS_MODE,
+    ANALYSIS_MAP_REDUCE_TOKEN_BUDGET,
+    ORCHESTRATOR_STAGE_WORKERS,
+    RESEARCH_STAGE_TIMEOUT_SECONDS,
+    ANALYSIS_STAGE_TIMEOUT_SECONDS,
+    REPORTING_STAGE_TIMEOUT_SECONDS,
+    DELIVERY_STAGE_TIMEOUT_SECONDS,
+    DELIVERY_IN_BACKGROUND,
+    DELIVERY_IN_MEMORY,
+    TEMP_DIR,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_ANALYSIS_WORKERS,
+    BATCH_RENDER_WORKERS,
+    PROFILE_DIR,
+    PROFILE_MAX_FILES,
+)
+from typing import Callable
 
-class MainOrchestrator:
+# Request options forwarded to ResearchAgent.search_web
+RESEARCH_OPTIONS = ("fan_out", "sub_queries", "per_query_timeout")
+
+class OrchestratorBase:
     """
-    Orchestrates the entire research-to-report workflow by coordinating agents.
+    The workflow graph and the stages shared by MainOrchestrator and
+    AsyncOrchestrator: consolidation, source comparison, deduplication,
+    packing, rendering, archiving and turning the outcome into the result dict.
+
+    Subclasses provide the stages that wait on remote services (_search_web,
+    _read_documents, _analyze and _deliver), as plain methods or coroutines.
     """
-    def __init__(self):
-        self.research_agent = ResearchAgent()
-        self.analysis_agent = AnalysisAgent()
-        self.reporting_agent = ReportingAgent()
-        self.delivery_agent = DeliveryAgent()
-        self.state = {}
-
-    def _reset_state(self):
-        """Resets the internal state for a new run."""
-        self.state = {
-            "query": None,
-            "gcs_paths": None,
-            "raw_content": None,
-            "insights": None,
-            "local_report_path": None,
-            "final_report_url": None,
+    def __init__(
+        self,
+        research_agent,
+        analysis_agent,
+        reporting_agent: ReportingAgent | None = None,
+        delivery_agent=None,
+        context_packer: ContextPacker | None = None,
+        deduplicator: NearDuplicateFilter | None = None,
+        background_delivery: bool | None = None,
+        in_memory_delivery: bool | None = None,
+        report_store: SQLiteReportStore | None = None,
+    ):
+        self.research_agent = research_agent
+        self.analysis_agent = analysis_agent
+        self.reporting_agent = reporting_agent or ReportingAgent()
+        self.delivery_agent = delivery_agent
+        self.context_packer = context_packer or ContextPacker(CONTEXT_TOKEN_BUDGET, CONTEXT_MAX_PASSAGE_TOKENS)
+        if deduplicator is None and DEDUP_ENABLED:
+            deduplicator = NearDuplicateFilter()
+        self.deduplicator = deduplicator
+        if background_delivery is None:
+            background_delivery = DELIVERY_IN_BACKGROUND
+        self.in_memory_delivery = DELIVERY_IN_MEMORY if in_memory_delivery is None else in_memory_delivery
+        self.report_store = report_store
+        if self.in_memory_delivery:
+            # The in-memory PDF only reaches disk if the upload fails, so the
+            # response has to wait for the upload to know where the report is
+            background_delivery = False
+        self.graph = self._build_graph(background_delivery)
+        self.executor = ThreadPoolExecutor(max_workers=ORCHESTRATOR_STAGE_WORKERS, thread_name_prefix="stage")
+
+    def _build_graph(self, background_delivery: bool) -> StageGraph:
+        def timeout(seconds: float) -> float | None:
+            return seconds if seconds > 0 else None
+
+        def reused(ctx: RunContext) -> bool:
+            return ctx.reused_report is not None
+
+        stages = [
+            Stage("web_search", self._search_web, timeout=timeout(RESEARCH_STAGE_TIMEOUT_SECONDS),
+                  report_as="research", error_message="Research phase failed to gather content."),
+            Stage("documents", self._read_documents, timeout=timeout(RESEARCH_STAGE_TIMEOUT_SECONDS),
+                  policy="optional", report_as="research"),
+            Stage("research", self._consolidate, deps=("web_search", "documents"),
+                  error_message="Research phase failed to gather content."),
+        ]
+        if self.report_store is not None:
+            # A failed comparison only costs the savings: the run continues as a full one
+            stages.append(Stage("sources", self._compare_sources, deps=("research",), policy="optional",
+                                report_as="research"))
+        if self.deduplicator is not None:
+            # On failure the full research content goes on to packing
+            stages.append(Stage("dedup", self._dedup, deps=(stages[-1].name,), policy="optional",
+                                report_as="packing", skip_if=reused))
+        stages += [
+            Stage("packing", self._pack, deps=(stages[-1].name,), skip_if=reused,
+                  error_message="Context packing failed."),
+            Stage("analysis", self._analyze, deps=("packing",), timeout=timeout(ANALYSIS_STAGE_TIMEOUT_SECONDS),
+                  skip_if=reused, error_message="Analysis phase failed to generate insights."),
+            Stage("reporting", self._report, deps=("analysis",), timeout=timeout(REPORTING_STAGE_TIMEOUT_SECONDS),
+                  skip_if=reused, error_message="Reporting phase failed to create PDF."),
+        ]
+        if self.report_store is not None:
+            stages.append(Stage("archive", self._archive, deps=("reporting",), policy="optional",
+                                report_as="reporting", skip_if=reused))
+        stages.append(Stage("delivery", self._deliver, deps=(stages[-1].name,),
+                            timeout=timeout(DELIVERY_STAGE_TIMEOUT_SECONDS), skip_if=reused,
+                            policy="background" if background_delivery else "optional"))
+        return StageGraph(stages)
+
+    def close(self) -> None:
+        """Waits for background stages (e.g. deliveries) to finish and stops the stage threads."""
+        self.executor.shutdown(wait=True)
+
+    def _finish(self, ctx: RunContext, outcome: GraphOutcome, start: float) -> dict:
+        """Records the run's metrics and turns its outcome into the result (or error) dict."""
+        RUN_SECONDS.labels().observe(time.perf_counter() - start)
+        RUNS.labels("success" if outcome.ok else "error").inc()
+        if not outcome.ok:
+            stage = outcome.failed_stage
+            message = stage.error_message or f"Stage '{stage.name}' failed."
+            error = outcome.exceptions.get(stage.name)
+            if outcome.status.get(stage.name) == "timed_out" or isinstance(error, RateLimitError):
+                message += f" ({outcome.errors[stage.name]})"
+            result = {"status": "error", "message": message}
+            if isinstance(error, RateLimitError):
+                # Lets the HTTP layer answer 503/429 with a Retry-After instead of 500
+                result["rate_limited"] = {
+                    "provider": error.provider,
+                    "queue_full": isinstance(error, RateLimitQueueFull),
+                    "retry_after": error.retry_after,
+                }
+        else:
+            result = self._build_result(ctx, outcome)
+        if ctx.profiler is not None:
+            try:
+                ctx.profiler.save(outcome, PROFILE_DIR, PROFILE_MAX_FILES)
+                result["profile_id"] = ctx.profiler.profile_id
+            except OSError as e:
+                print(f"Orchestrator: Could not save profile for {ctx.run_id}: {e}")
+        return result
+
+    @staticmethod
+    def _research_options(ctx: RunContext) -> dict:
+        return {k: v for k, v in ctx.options.items() if k in RESEARCH_OPTIONS}
+
+    def _consolidate(self, ctx: RunContext) -> bool:
+        research = self.research_agent.consolidate(ctx.query, ctx.web_content, ctx.documents)
+        ctx.raw_content = research.content
+        ctx.document_errors = research.document_errors
+        return bool(ctx.raw_content)
+
+    def _compare_sources(self, ctx: RunContext) -> bool:
+        """
+        Hashes the research sources and, for refresh runs, compares them with the
+        ones behind the request's previous report.
+        """
+        sources = split_sources(ctx.web_content, ctx.documents)
+        ctx.source_hashes = hash_sources(sources)
+        if not ctx.options.get("refresh"):
+            return True
+        previous = self.report_store.get_source_hashes(refresh_key(ctx.query, ctx.gcs_paths, ctx.options))
+        report = self.report_store.get(previous["report_id"]) if previous else None
+        if report is None:
+            print("Orchestrator: No previous report to refresh; running in full.")
+            ctx.refresh = {"reused": False, "previous_report_id": None}
+            return True
+
+        diff = diff_sources(previous["sources"], ctx.source_hashes)
+        ctx.refresh = {"reused": not diff.has_changes, "previous_report_id": report["id"], **diff.summary()}
+        if not diff.has_changes:
+            print(f"Orchestrator: Sources unchanged; reusing report {report['id']}.")
+            ctx.reused_report = report
+            ctx.insights = insights_from_view(report["view"])
+            ctx.report_id = report["id"]
+            ctx.report_filename = report["filename"]
+            ctx.final_report_url = report["report_url"]
+            return True
+
+        print(f"Orchestrator: Refreshing report {report['id']} with {len(diff.added)} new and "
+              f"{len(diff.changed)} changed of {len(sources)} sources.")
+        ctx.previous_insights = insights_from_view(report["view"])
+        ctx.raw_content = build_changed_content(ctx.query, sources, diff.added + diff.changed)
+        return True
+
+    def _analysis_mode(self, ctx: RunContext) -> str:
+        return ctx.options.get("analysis_mode") or ANALYSIS_MODE
+
+    def _dedup(self, ctx: RunContext) -> bool:
+        """Drops near-duplicate passages from the research content before it is packed."""
+        result = self.deduplicator.dedup(ctx.raw_content)
+        ctx.raw_content = result.content
+        ctx.dedup_summary = result.summary()
+        DEDUP_PASSAGES.labels().inc(len(result.dropped))
+        DEDUP_SAVED.labels("chars").inc(result.chars_saved)
+        DEDUP_SAVED.labels("tokens").inc(result.tokens_saved)
+        return True
+
+    def _pack(self, ctx: RunContext) -> bool:
+        """Fits the research content into the token budget."""
+        token_budget = ctx.options.get("token_budget")
+        if token_budget is None and self._analysis_mode(ctx) != "single":
+            # Map-reduce exists to handle large inputs, so give it a larger budget
+            token_budget = ANALYSIS_MAP_REDUCE_TOKEN_BUDGET
+        packed = self.context_packer.pack(ctx.raw_content, ctx.query, token_budget)
+        ctx.packed_content = packed.content
+        ctx.packing_summary = packed.summary()
+        return True
+
+    @staticmethod
+    def _refresh_options(ctx: RunContext) -> dict:
+        # Only refresh runs pass previous insights, so stub agents without the argument keep working
+        return {"previous_insights": ctx.previous_insights} if ctx.previous_insights is not None else {}
+
+    @staticmethod
+    def _record_analysis(ctx: RunContext, analysis) -> bool:
+        ctx.insights = analysis.insights if analysis else {}
+        ctx.analysis_meta = analysis.metadata() if analysis else None
+        return bool(ctx.insights) and "error" not in ctx.insights
+
+    def _report(self, ctx: RunContext) -> bool:
+        if self.in_memory_delivery:
+            rendered = self.reporting_agent.render_bytes(ctx.insights, ctx.query)
+            if rendered:
+                ctx.report_filename, ctx.report_bytes = rendered
+            return rendered is not None
+        ctx.local_report_path = self.reporting_agent.run(ctx.insights, ctx.query)
+        return bool(ctx.local_report_path)
+
+    def _archive(self, ctx: RunContext) -> bool:
+        """Saves the report to the report store and drops the temp PDF, which delivery no longer needs."""
+        pdf_bytes = ctx.report_bytes
+        if pdf_bytes is None:
+            with open(ctx.local_report_path, "rb") as f:
+                pdf_bytes = f.read()
+        filename = ctx.report_filename or os.path.basename(ctx.local_report_path)
+        ctx.report_id = self.report_store.save(ctx.query, filename, ctx.insights, pdf_bytes)
+        ctx.report_filename = filename
+        if ctx.source_hashes is not None:
+            self.report_store.set_source_hashes(
+                refresh_key(ctx.query, ctx.gcs_paths, ctx.options), ctx.report_id, ctx.source_hashes)
+        if ctx.local_report_path:
+            ctx.report_bytes = pdf_bytes
+            os.remove(ctx.local_report_path)
+            ctx.local_report_path = None
+        return True
+
+    def _record_upload(self, ctx: RunContext) -> bool:
+        """Stores the uploaded report's URL, or keeps the PDF on disk if the upload failed."""
+        if ctx.final_report_url and ctx.report_id:
+            self.report_store.set_report_url(ctx.report_id, ctx.final_report_url)
+        elif not ctx.final_report_url and not ctx.report_id:
+            # Keep the report reachable through /download
+            ctx.local_report_path = os.path.join(TEMP_DIR, ctx.report_filename)
+            with open(ctx.local_report_path, "wb") as f:
+                f.write(ctx.report_bytes)
+            print(f"Orchestrator: Upload failed; saved report to {ctx.local_report_path}")
+        return bool(ctx.final_report_url)
+
+    def _build_result(self, ctx: RunContext, outcome: GraphOutcome) -> dict:
+        # Return success even if GCS upload fails, as long as local PDF was created
+        print("Orchestrator: Workflow completed successfully.")
+        result = {
+            "status": "success",
+            "local_pdf_path": ctx.local_report_path,
+            "insights": ctx.insights
         }
+        if ctx.report_filename or ctx.local_report_path:
+            result["report_filename"] = ctx.report_filename or os.path.basename(ctx.local_report_path)
+        if ctx.report_id:
+            result["report_id"] = ctx.report_id
+        if ctx.document_errors:
+            result["document_errors"] = ctx.document_errors
+        if ctx.analysis_meta:
+            result["analysis"] = ctx.analysis_meta
+        if ctx.dedup_summary is not None:
+            result["deduplication"] = ctx.dedup_summary
+        if ctx.packing_summary and ctx.packing_summary["kept_passages"] is not None:
+            result["context_packing"] = ctx.packing_summary
+        if ctx.refresh is not None:
+            result["refresh"] = ctx.refresh
+
+        if ctx.reused_report is not None:
+            if ctx.final_report_url:
+                result["report_url"] = ctx.final_report_url
+            result["message"] = "Sources unchanged since the previous report; returning it as is."
+        elif ctx.final_report_url:
+            result["report_url"] = ctx.final_report_url
+        elif outcome.status.get("delivery") == "running":
+            result["message"] = "Report generated successfully; the GCS upload is finishing in the background."
+        elif ctx.report_id:
+            result["message"] = (f"Report generated successfully but GCS upload failed. "
+                                 f"Download it from /download/{ctx.report_filename}.")
+        else:
+            result["message"] = "Report generated successfully but GCS upload failed. Check local PDF path."
 
-    def run(self, query: str, gcs_paths: list[str] | None = None) -> dict:
+        return result
+
+class MainOrchestrator(OrchestratorBase):
+    """
+    Orchestrates the entire research-to-report workflow by coordinating agents.
+
+    The workflow is a StageGraph: web search and document reads run side by side,
+    then near-duplicate removal (DEDUP_ENABLED), packing, analysis and reporting
+    follow in order, and delivery can finish in the background
+    (DELIVERY_IN_BACKGROUND). With DELIVERY_IN_MEMORY the PDF
+    goes from the renderer straight to GCS without a temp file. Given a report
+    store, finished reports are archived there before delivery and the temp
+    PDF is removed, together with a content hash of every research source; a
+    run with the "refresh" option then sends only new or changed sources to
+    Gemini (with the previous report as context), or returns the stored report
+    unchanged if no source changed. Given a RequestCoalescer, identical
+    concurrent run() calls share a single workflow run.
+
+    The orchestrator keeps no per-run state; everything a run produces lives in a
+    RunContext, so one instance (and its agents) can be shared across requests.
+    """
+    def __init__(
+        self,
+        research_agent: ResearchAgent | None = None,
+        analysis_agent: AnalysisAgent | None = None,
+        reporting_agent: ReportingAgent | None = None,
+        delivery_agent: DeliveryAgent | None = None,
+        context_packer: ContextPacker | None = None,
+        deduplicator: NearDuplicateFilter | None = None,
+        background_delivery: bool | None = None,
+        in_memory_delivery: bool | None = None,
+        report_store: SQLiteReportStore | None = None,
+        coalescer: RequestCoalescer | None = None,
+    ):
+        super().__init__(
+            research_agent=research_agent or ResearchAgent(),
+            analysis_agent=analysis_agent or AnalysisAgent(),
+            reporting_agent=reporting_agent,
+            delivery_agent=delivery_agent or DeliveryAgent(),
+            context_packer=context_packer,
+            deduplicator=deduplicator,
+            background_delivery=background_delivery,
+            in_memory_delivery=in_memory_delivery,
+            report_store=report_store,
+        )
+        self.coalescer = coalescer
+
+    def run(
+        self,
+        query: str,
+        gcs_paths: list[str] | None = None,
+        on_stage: Callable[[str, str], None] | None = None,
+        options: dict | None = None,
+        profile: bool = False,
+    ) -> dict:
         """
         Executes the full agentic workflow from research to delivery.
 
         Args:
             query: The user's research query.
             gcs_paths: Optional list of GCS document paths.
+            on_stage: Optional callback invoked as on_stage(stage, status) when a
+                stage starts, completes or fails.
+            options: Optional per-request settings, e.g. {"fan_out": 4}.
+            profile: Capture a CPU profile of this run; the result then carries a
+                "profile_id" for /debug/profiles. Profiled runs are never coalesced.
 
         Returns:
             A dictionary containing the final report URL and status.
         """
-        self._reset_state()
-        self.state["query"] = query
-        self.state["gcs_paths"] = gcs_paths
-        print(f"Orchestrator: Starting workflow for query: '{query}'")
-
-        # 1. Research Step
-        self.state["raw_content"] = self.research_agent.run(query, gcs_paths)
-        if not self.state["raw_content"]:
-            return {"status": "error", "message": "Research phase failed to gather content."}
-
-        # 2. Analysis Step
-        self.state["insights"] = self.analysis_agent.run(self.state["raw_content"])
-        if not self.state["insights"] or "error" in self.state["insights"]:
-            return {"status": "error", "message": "Analysis phase failed to generate insights."}
-
-        # 3. Reporting Step
-        self.state["local_report_path"] = self.reporting_agent.run(self.state["insights"], query)
-        if not self.state["local_report_path"]:
-            return {"status": "error", "message": "Reporting phase failed to create PDF."}
-
-        # 4. Delivery Step (Optional - GCS upload)
-        self.state["final_report_url"] = self.delivery_agent.run(self.state["local_report_path"])
-        
-        # Return success even if GCS upload fails, as long as local PDF was created
-        print("Orchestrator: Workflow completed successfully.")
-        result = {
-            "status": "success",
-            "local_pdf_path": self.state["local_report_path"],
-            "insights": self.state["insights"]
+        if profile:
+            ctx = RunContext(query=query, gcs_paths=gcs_paths, options=options or {}, on_stage=on_stage)
+            ctx.profiler = ProfileSession(ctx.run_id, query)
+            return self._execute(ctx)
+        if self.coalescer is None:
+            return self._execute(RunContext(query=query, gcs_paths=gcs_paths, options=options or {}, on_stage=on_stage))
+        return self.coalescer.run(
+            coalesce_key(query, gcs_paths, options),
+            lambda notify: self._execute(
+                RunContext(query=query, gcs_paths=gcs_paths, options=options or {}, on_stage=notify)),
+            on_stage=on_stage,
+        )
+
+    def run_stream(self, query: str, gcs_paths: list[str] | None = None, options: dict | None = None):
+        """
+        Executes the workflow like run(), streaming the report as Gemini writes it.
+        Streams are never coalesced, since each one relays its own model output.
+
+        Yields event dicts, in order:
+            {"event": "stage", "stage": ..., "status": ...} on every stage change,
+            {"event": "insight", "index": ..., "value": ...} for each key_insights entry,
+            {"event": "field", "key": ..., "value": ...} for each completed report field,
+            and finally {"event": "done", "result": ...} or {"event": "error", "message": ...}.
+        """
+        events = queue.Queue()
+        ctx = RunContext(
+            query=query, gcs_paths=gcs_paths, options=options or {},
+            on_stage=lambda stage, status: events.put({"event": "stage", "stage": stage, "status": status}),
+            on_event=events.put,
+        )
+
+        def produce():
+            try:
+                result = self._execute(ctx)
+                if result["status"] == "success":
+                    events.put({"event": "done", "result": result})
+                else:
+                    events.put({"event": "error", "message": result["message"]})
+            except Exception as e:
+                print(f"Orchestrator: Streamed workflow {ctx.run_id} crashed: {e}")
+                events.put({"event": "error", "message": "An internal server error occurred."})
+            finally:
+                events.put(None)
+
+        threading.Thread(target=produce, name=f"stream-{ctx.run_id[:8]}", daemon=True).start()
+        while (event := events.get()) is not None:
+            yield event
+
+    def run_batch(
+        self,
+        items: list[tuple[str, list[str] | None]],
+        options: dict | None = None,
+        max_concurrency: int | None = None,
+        analysis_workers: int | None = None,
+        render_workers: int | None = None,
+    ):
+        """
+        Runs the workflow for many (query, gcs_paths) items, yielding results as they finish.
+
+        Documents named by several items are read from GCS once for the whole
+        batch. Up to `max_concurrency` items run at a time, and their research
+        overlaps on the shared stage threads. Analysis and rendering go through
+        two small pools shared by the batch, so a large batch cannot flood
+        Gemini or saturate the CPU with ReportLab layout.
+
+        Yields:
+            (index, result) tuples in completion order, where result is what
+            run() would have returned for items[index].
+        """
+        options = options or {}
+        documents = {}
+        paths = sorted({path for _, gcs_paths in items for path in gcs_paths or []})
+        if paths:
+            documents = {doc.path: doc for doc in self.research_agent.read_documents(paths)}
+        print(f"Orchestrator: Starting batch of {len(items)} report(s), {len(paths)} shared document(s).")
+
+        executors = {
+            "analysis": ThreadPoolExecutor(analysis_workers or BATCH_ANALYSIS_WORKERS, thread_name_prefix="batch-analysis"),
+            "reporting": ThreadPoolExecutor(render_workers or BATCH_RENDER_WORKERS, thread_name_prefix="batch-render"),
         }
-        
-        if self.state["final_report_url"]:
-            result["report_url"] = self.state["final_report_url"]
+        item_pool = ThreadPoolExecutor(max_concurrency or BATCH_MAX_CONCURRENCY, thread_name_prefix="batch-item")
+
+        def run_item(query: str, gcs_paths: list[str] | None) -> dict:
+            def execute(on_stage=None) -> dict:
+                ctx = RunContext(query=query, gcs_paths=gcs_paths, options=options, on_stage=on_stage,
+                                 documents=[documents[path] for path in gcs_paths or [] if path in documents])
+                return self._execute(ctx, executors)
+            try:
+                if self.coalescer is None:
+                    return execute()
+                return self.coalescer.run(coalesce_key(query, gcs_paths, options), execute)
+            except Exception as e:
+                print(f"Orchestrator: Batch item for query '{query}' crashed: {e}")
+                return {"status": "error", "message": "An internal server error occurred."}
+
+        start = time.perf_counter()
+        try:
+            futures = {item_pool.submit(run_item, query, gcs_paths): i for i, (query, gcs_paths) in enumerate(items)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # A client that stops reading cancels the items that have not started
+            item_pool.shutdown(wait=False, cancel_futures=True)
+            for pool in executors.values():
+                pool.shutdown(wait=False)
+        print(f"Orchestrator: Batch of {len(items)} finished in {time.perf_counter() - start:.1f}s.")
+
+    def _execute(self, ctx: RunContext, executors: dict[str, Executor] | None = None) -> dict:
+        print(f"Orchestrator: Starting workflow {ctx.run_id} for query: '{ctx.query}'")
+        start = time.perf_counter()
+        outcome = self.graph.run(ctx, self.executor, executors)
+        return self._finish(ctx, outcome, start)
+
+    def _search_web(self, ctx: RunContext) -> bool:
+        ctx.web_content = self.research_agent.search_web(ctx.query, **self._research_options(ctx))
+        return True
+
+    def _read_documents(self, ctx: RunContext) -> bool:
+        # Batches read every shared document up front and pass them in
+        if ctx.gcs_paths and not ctx.documents:
+            ctx.documents = self.research_agent.read_documents(ctx.gcs_paths)
+        return True
+
+    def _analyze(self, ctx: RunContext) -> bool:
+        refresh = self._refresh_options(ctx)
+        if ctx.on_event is None:
+            analysis = self.analysis_agent.analyze(ctx.packed_content, self._analysis_mode(ctx), **refresh)
         else:
-            result["message"] = "Report generated successfully but GCS upload failed. Check local PDF path."
-        
-        return result
\ No newline at end of file
+            analysis = None
+            for event in self.analysis_agent.stream(ctx.packed_content, self._analysis_mode(ctx), **refresh):
+                if event[0] == "result":
+                    analysis = event[1]
+                elif event[0] == "item" and event[1] == "key_insights":
+                    ctx.on_event({"event": "insight", "index": event[2], "value": event[3]})
+                elif event[0] == "field":
+                    ctx.on_event({"event": "field", "key": event[1], "value": event[2]})
+        return self._record_analysis(ctx, analysis)
+
+    def _deliver(self, ctx: RunContext) -> bool:
+        if ctx.report_bytes is None:
+            ctx.final_report_url = self.delivery_agent.run(ctx.local_report_path)
+            return bool(ctx.final_report_url)
+
+        ctx.final_report_url = self.delivery_agent.deliver_bytes(ctx.report_bytes, ctx.report_filename)
+        return self._record_upload(ctx)
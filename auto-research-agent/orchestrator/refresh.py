@@ -0,0 +1,84 @@
+# auto-research-agent/orchestrator/refresh.py
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+from orchestrator.coalescer import coalesce_key
+
+def refresh_key(query: str, gcs_paths: list[str] | None = None, options: dict | None = None) -> str:
+    """Key under which a request's source hashes are kept; the same request with or without "refresh" shares it."""
+    return coalesce_key(query, gcs_paths, {k: v for k, v in (options or {}).items() if k != "refresh"})
+
+def split_sources(web_content: str | None, documents: list) -> dict[str, str]:
+    """
+    Splits research output into source id -> text.
+
+    Web results are the "Title: ...\\nSnippet: ..." blocks of format_search_results
+    (id "web:<title line>"); readable documents are keyed "doc:<path>".
+    """
+    sources = {}
+    for block in (web_content or "").split("\n---"):
+        block = block.strip()
+        if not block:
+            continue
+        source_id = "web:" + block.splitlines()[0]
+        if source_id in sources:
+            source_id += f"#{len(sources)}"
+        sources[source_id] = block
+    for document in documents:
+        if document.ok and document.content:
+            sources["doc:" + document.path] = document.content
+    return sources
+
+def hash_sources(sources: dict[str, str]) -> dict[str, str]:
+    """Content hash per source, ignoring whitespace changes."""
+    return {
+        source_id: hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+        for source_id, text in sources.items()
+    }
+
+@dataclass
+class SourceDiff:
+    """How a request's sources changed since its previous report."""
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        # Sources that dropped out (e.g. a result falling off the first page) do not invalidate the report
+        return bool(self.added or self.changed)
+
+    def summary(self) -> dict:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+            "unchanged": len(self.unchanged),
+        }
+
+def diff_sources(previous: dict[str, str], current: dict[str, str]) -> SourceDiff:
+    diff = SourceDiff(removed=[source_id for source_id in previous if source_id not in current])
+    for source_id, digest in current.items():
+        if source_id not in previous:
+            diff.added.append(source_id)
+        elif previous[source_id] != digest:
+            diff.changed.append(source_id)
+        else:
+            diff.unchanged.append(source_id)
+    return diff
+
+def build_changed_content(query: str, sources: dict[str, str], source_ids: list[str]) -> str:
+    """The research text for just these sources, laid out like ResearchAgent.consolidate."""
+    web = [sources[s] + "\n---" for s in source_ids if s.startswith("web:")]
+    docs = [f"Source Document: {os.path.basename(s[len('doc:'):])}\n{sources[s]}\n---"
+            for s in source_ids if s.startswith("doc:")]
+    content = f"Web Search Results for query '{query}':\n" + "\n".join(web) + "\n\n"
+    if docs:
+        content += "Internal Document Content:\n" + "\n".join(docs)
+    return content
+
+def insights_from_view(view: dict) -> dict:
+    """The report fields of stored view data (see utils/report_store.build_view_data)."""
+    return {k: v for k, v in view.items() if k != "pdf_filename"}
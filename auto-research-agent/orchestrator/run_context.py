@@ -0,0 +1,85 @@
+# auto-research-agent/orchestrator/run_context.py
+
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable
+from utils.profiling import ProfileSession
+
+# Workflow stages, in execution order. Stage status callbacks receive one of these.
+STAGES = ("research", "packing", "analysis", "reporting", "delivery")
+
+# The graph stage running in the current thread or task (set by StageGraph), so a
+# stage the graph has given up on can be kept from changing the context
+current_stage: ContextVar[str | None] = ContextVar("current_stage", default=None)
+
+@dataclass
+class RunContext:
+    """
+    Per-request state for a single run of the research-to-report workflow.
+
+    A new context is created for every call to MainOrchestrator.run, so concurrent
+    requests served by the same (shared) orchestrator never see each other's data.
+    """
+    query: str
+    gcs_paths: list[str] | None = None
+    # Per-request tuning knobs (e.g. "fan_out"), validated by the HTTP layer
+    options: dict = field(default_factory=dict)
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # Outputs of the two research halves, joined into raw_content
+    web_content: str | None = None
+    documents: list = field(default_factory=list)
+    raw_content: str | None = None
+    # Source documents that could not be read ({"path", "error"} dicts)
+    document_errors: list[dict] = field(default_factory=list)
+    # Content hash per research source, kept with the archived report (see orchestrator/refresh.py)
+    source_hashes: dict | None = None
+    # Refresh runs ("refresh" option): what changed since the previous report, that
+    # report's insights (context for Gemini), or the stored report itself when nothing changed
+    refresh: dict | None = None
+    previous_insights: dict | None = None
+    reused_report: dict | None = None
+    # What near-duplicate removal dropped from raw_content (see utils/dedup.py)
+    dedup_summary: dict | None = None
+    # Research content trimmed to the token budget, and what was dropped
+    packed_content: str | None = None
+    packing_summary: dict | None = None
+    insights: dict | None = None
+    # How the insights were produced (mode, chunk counts)
+    analysis_meta: dict | None = None
+    local_report_path: str | None = None
+    # In-memory report (DELIVERY_IN_MEMORY); only written to disk if the upload fails
+    report_filename: str | None = None
+    report_bytes: bytes | None = None
+    # Id of the report in the report store, once archived
+    report_id: str | None = None
+    final_report_url: str | None = None
+    # Optional callback invoked as on_stage(stage, status) with status one of
+    # "running", "completed" or "failed" (used by the job API to report progress).
+    on_stage: Callable[[str, str], None] | None = None
+    # Optional sink for streamed analysis events ("field"/"insight" dicts, see run_stream)
+    on_event: Callable[[dict], None] | None = None
+    # Set for runs that asked to be profiled (see utils/profiling.py)
+    profiler: ProfileSession | None = None
+    # Stages that timed out or were abandoned; their threads may run on, but their writes are dropped
+    cancelled_stages: set[str] = field(default_factory=set)
+
+    def __setattr__(self, name: str, value) -> None:
+        stage = current_stage.get()
+        if stage is not None and stage in self.__dict__.get("cancelled_stages", ()):
+            print(f"RunContext: Ignoring '{name}' from cancelled stage '{stage}' of run {self.run_id}")
+            return
+        super().__setattr__(name, value)
+
+    def cancel_stage(self, stage: str) -> None:
+        """Stops `stage` from changing this context (its results are no longer wanted)."""
+        self.cancelled_stages.add(stage)
+
+    def mark_stage(self, stage: str, status: str) -> None:
+        """Notifies the stage callback (if any); callback errors never break the run."""
+        if self.on_stage is None:
+            return
+        try:
+            self.on_stage(stage, status)
+        except Exception as e:
+            print(f"RunContext: Stage callback failed for {stage}={status}: {e}")
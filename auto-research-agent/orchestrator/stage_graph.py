@@ -0,0 +1,466 @@
+# auto-research-agent/orchestrator/stage_graph.py
+
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from typing import Callable
+from orchestrator.run_context import RunContext, current_stage
+from utils.metrics import STAGE_FAILURES, STAGE_SECONDS, STAGES_IN_FLIGHT
+
+# How a stage's failure (returning False, raising or timing out) affects the run:
+#   required    the run stops and no dependent stage starts
+#   optional    the failure is recorded and dependents still run
+#   background  like optional, but the run returns without waiting for the stage
+STAGE_POLICIES = ("required", "optional", "background")
+
+# How often the coordinator checks whether a queued stage has started, so its
+# timeout (which counts from the start) is enforced
+QUEUE_POLL_SECONDS = 0.1
+
+@dataclass
+class Stage:
+    """One node of the workflow graph."""
+    name: str
+    # Does the stage's work on the RunContext; returns False (or raises) on failure.
+    # May be a coroutine function when the graph is run with run_async()
+    func: Callable[[RunContext], bool | None]
+    deps: tuple[str, ...] = ()
+    # Seconds the stage may run before it counts as failed (None waits forever);
+    # time spent queued for an executor thread does not count
+    timeout: float | None = None
+    policy: str = "required"
+    # Public stage (see run_context.STAGES) whose progress this node reports; defaults to name
+    report_as: str | None = None
+    # Message returned to the caller when a required stage fails
+    error_message: str | None = None
+    # Checked when the stage is due; if it returns True the stage counts as done without running
+    skip_if: Callable[[RunContext], bool] | None = None
+
+@dataclass
+class GraphOutcome:
+    """What happened to each stage in one run of a StageGraph."""
+    # Stage name -> "completed", "failed", "timed_out", "running" (background) or "skipped"
+    # (never reached, abandoned, or passed over by its skip_if)
+    status: dict[str, str] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    # Stage name -> the exception a stage raised (its message is in `errors`)
+    exceptions: dict[str, Exception] = field(default_factory=dict)
+    durations: dict[str, float] = field(default_factory=dict)
+    # Stage name -> time.monotonic() when the stage began running
+    started: dict[str, float] = field(default_factory=dict)
+    # The required stage that stopped the run, if any
+    failed_stage: Stage | None = None
+    # Futures (tasks under run_async) of background stages still allowed to finish after run() returned
+    background: dict[str, Future | asyncio.Task] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_stage is None
+
+class _Progress:
+    """
+    Reports node progress to ctx.mark_stage, grouped by each node's public stage.
+
+    A group fails when a required member fails; optional members only fail a
+    group that has no required member (e.g. delivery on its own).
+    """
+    def __init__(self, ctx: RunContext, groups: dict[str, list[Stage]]):
+        self.ctx = ctx
+        self.remaining = {group: len(members) for group, members in groups.items()}
+        self.has_required = {
+            group: any(stage.policy == "required" for stage in members) for group, members in groups.items()
+        }
+        self.started = set()
+        self.failed = set()
+        self.lock = threading.Lock()
+
+    def start(self, group: str) -> None:
+        with self.lock:
+            if group in self.started:
+                return
+            self.started.add(group)
+        self.ctx.mark_stage(group, "running")
+
+    def finish(self, group: str, ok: bool, required: bool = True) -> None:
+        with self.lock:
+            self.remaining[group] -= 1
+            if not ok and (required or not self.has_required[group]):
+                if group in self.failed:
+                    return
+                self.failed.add(group)
+                status = "failed"
+            elif self.remaining[group] == 0 and group not in self.failed:
+                status = "completed"
+            else:
+                return
+        self.ctx.mark_stage(group, status)
+
+class StageGraph:
+    """
+    Runs a workflow as a dependency graph of stages.
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages (e.g. web search and document reads) run concurrently on
+    the executor. Stages can be routed to their own executors (e.g. a small pool
+    bounding concurrent analyses across a batch). The calling thread only
+    coordinates. A stage that times out
+    cannot be interrupted; its thread runs on while the graph treats the stage
+    as failed, and anything it still writes to the RunContext is dropped.
+
+    run_async() runs the same graph on an asyncio event loop: coroutine stages
+    run as tasks on the loop (and are cancelled when they time out), while
+    plain stages still go to the executors.
+    """
+    def __init__(self, stages: list[Stage]):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage '{stage.name}'.")
+            if stage.policy not in STAGE_POLICIES:
+                raise ValueError(f"Stage '{stage.name}' has unknown policy '{stage.policy}'.")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'.")
+                if self.stages[dep].policy == "background":
+                    raise ValueError(f"Stage '{stage.name}' cannot depend on background stage '{dep}'.")
+        self._check_acyclic()
+        self.groups = {}
+        for stage in stages:
+            self.groups.setdefault(stage.report_as or stage.name, []).append(stage)
+        # Watchers of background stages started by run_async(), kept referenced until done
+        self._background_tasks = set()
+
+    def _check_acyclic(self) -> None:
+        visiting, visited = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through '{name}'.")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def run(self, ctx: RunContext, executor: Executor, executors: dict[str, Executor] | None = None) -> GraphOutcome:
+        """
+        Runs every stage and returns once all foreground stages have finished or a
+        required stage has failed.
+
+        Args:
+            ctx: The run's context, passed to every stage.
+            executor: Runs stages that have no entry in `executors`.
+            executors: Optional stage name -> executor overrides.
+        """
+        outcome = GraphOutcome()
+        progress = _Progress(ctx, self.groups)
+        executors = executors or {}
+        waiting = dict(self.stages)
+        running = {}  # future -> stage
+        # Stages whose outcome the coordinator has processed (workers may record status earlier)
+        settled = set()
+
+        while True:
+            if outcome.ok:
+                for stage in self._ready(waiting, settled):
+                    del waiting[stage.name]
+                    progress.start(stage.report_as or stage.name)
+                    stage_executor = executors.get(stage.name, executor)
+                    if stage.policy == "background":
+                        self._run_in_background(stage, stage_executor, ctx, outcome, progress)
+                    else:
+                        running[stage_executor.submit(self._invoke, stage, ctx, outcome)] = stage
+            if not running:
+                break
+
+            wait(list(running), timeout=self._wait_timeout(running, outcome), return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future, stage in list(running.items()):
+                deadline = self._deadline(stage, outcome)
+                if future.done():
+                    ok = future.result()
+                elif deadline is not None and now >= deadline:
+                    self._timed_out(stage, ctx, outcome)
+                    ok = False
+                else:
+                    continue
+                del running[future]
+                settled.add(stage.name)
+                progress.finish(stage.report_as or stage.name, ok, stage.policy == "required")
+                if not ok and stage.policy == "required" and outcome.ok:
+                    outcome.failed_stage = stage
+
+            if not outcome.ok:
+                # Stop at the first required failure; stages still running are abandoned
+                for future, stage in running.items():
+                    future.cancel()
+                    ctx.cancel_stage(stage.name)
+                    outcome.status.setdefault(stage.name, "skipped")
+                break
+
+        for name in waiting:
+            outcome.status[name] = "skipped"
+        return outcome
+
+    async def run_async(
+        self, ctx: RunContext, executor: Executor, executors: dict[str, Executor] | None = None
+    ) -> GraphOutcome:
+        """
+        Like run(), but coordinates from the running event loop.
+
+        Coroutine stages are awaited on the loop; other stages run on `executor`
+        (or their entry in `executors`) and are awaited without blocking the loop.
+        """
+        outcome = GraphOutcome()
+        progress = _Progress(ctx, self.groups)
+        executors = executors or {}
+        waiting = dict(self.stages)
+        running = {}  # task -> stage
+        settled = set()
+
+        while True:
+            if outcome.ok:
+                for stage in self._ready(waiting, settled):
+                    del waiting[stage.name]
+                    progress.start(stage.report_as or stage.name)
+                    task = asyncio.ensure_future(
+                        self._invoke_async(stage, ctx, outcome, executors.get(stage.name, executor)))
+                    if stage.policy == "background":
+                        watcher = asyncio.ensure_future(self._watch_background(stage, task, ctx, outcome, progress))
+                        self._background_tasks.add(watcher)
+                        watcher.add_done_callback(self._background_tasks.discard)
+                    else:
+                        running[task] = stage
+            if not running:
+                break
+
+            await asyncio.wait(list(running), timeout=self._wait_timeout(running, outcome),
+                               return_when=asyncio.FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for task, stage in list(running.items()):
+                deadline = self._deadline(stage, outcome)
+                if task.done():
+                    ok = task.result()
+                elif deadline is not None and now >= deadline:
+                    self._timed_out(stage, ctx, outcome)
+                    task.cancel()
+                    ok = False
+                else:
+                    continue
+                del running[task]
+                settled.add(stage.name)
+                progress.finish(stage.report_as or stage.name, ok, stage.policy == "required")
+                if not ok and stage.policy == "required" and outcome.ok:
+                    outcome.failed_stage = stage
+
+            if not outcome.ok:
+                for task, stage in running.items():
+                    task.cancel()
+                    ctx.cancel_stage(stage.name)
+                    outcome.status.setdefault(stage.name, "skipped")
+                break
+
+        for name in waiting:
+            outcome.status[name] = "skipped"
+        return outcome
+
+    async def wait_background(self) -> None:
+        """Waits for the background stages started by run_async() to finish."""
+        while self._background_tasks:
+            await asyncio.gather(*list(self._background_tasks), return_exceptions=True)
+
+    @staticmethod
+    def _timed_out(stage: Stage, ctx: RunContext, outcome: GraphOutcome, background: bool = False) -> None:
+        print(f"StageGraph: {'Background stage' if background else 'Stage'} '{stage.name}' "
+              f"timed out after {stage.timeout}s.")
+        ctx.cancel_stage(stage.name)
+        STAGE_FAILURES.labels(stage.name, "timed_out").inc()
+        outcome.status[stage.name] = "timed_out"
+        outcome.errors[stage.name] = f"Timed out after {stage.timeout}s"
+
+    @staticmethod
+    def _deadline(stage: Stage, outcome: GraphOutcome) -> float | None:
+        started = outcome.started.get(stage.name)
+        return started + stage.timeout if stage.timeout and started is not None else None
+
+    def _wait_timeout(self, running: dict[Future, Stage], outcome: GraphOutcome) -> float | None:
+        """Sleeps until the nearest deadline, waking periodically while timed stages are still queued."""
+        now = time.monotonic()
+        deadlines = [self._deadline(stage, outcome) for stage in running.values() if stage.timeout]
+        timeout = None
+        started = [d for d in deadlines if d is not None]
+        if started:
+            timeout = max(0.0, min(started) - now)
+        if len(started) < len(deadlines):
+            timeout = QUEUE_POLL_SECONDS if timeout is None else min(timeout, QUEUE_POLL_SECONDS)
+        return timeout
+
+    def _ready(self, waiting: dict[str, Stage], settled: set[str]) -> list[Stage]:
+        return [stage for stage in waiting.values() if all(dep in settled for dep in stage.deps)]
+
+    @staticmethod
+    def _invoke(stage: Stage, ctx: RunContext, outcome: GraphOutcome) -> bool:
+        """Runs one stage and records its status; never raises."""
+        if stage.skip_if is not None and stage.skip_if(ctx):
+            outcome.status[stage.name] = "skipped"
+            return True
+        start = StageGraph._begin(stage, outcome)
+        token = current_stage.set(stage.name)
+        try:
+            if ctx.profiler is None:
+                ok = stage.func(ctx) is not False
+            else:
+                ok = ctx.profiler.run_stage(stage.name, stage.func, ctx) is not False
+            if not ok:
+                STAGE_FAILURES.labels(stage.name, "failed").inc()
+        except Exception as e:
+            ok = StageGraph._raised(stage, outcome, e)
+        finally:
+            current_stage.reset(token)
+        StageGraph._end(stage, outcome, start, ok)
+        return ok
+
+    @staticmethod
+    async def _invoke_async(stage: Stage, ctx: RunContext, outcome: GraphOutcome, executor: Executor) -> bool:
+        """_invoke() for run_async(): awaits coroutine stages, hands the others to the executor."""
+        if not inspect.iscoroutinefunction(stage.func):
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, StageGraph._invoke, stage, ctx, outcome)
+        if stage.skip_if is not None and stage.skip_if(ctx):
+            outcome.status[stage.name] = "skipped"
+            return True
+        # Not profiled: other runs' tasks interleave on the loop, so a per-stage profile would mix them
+        start = StageGraph._begin(stage, outcome)
+        # The task runs in its own copy of the context, so this does not leak to other tasks
+        current_stage.set(stage.name)
+        ok = False
+        try:
+            ok = await stage.func(ctx) is not False
+            if not ok:
+                STAGE_FAILURES.labels(stage.name, "failed").inc()
+        except Exception as e:
+            ok = StageGraph._raised(stage, outcome, e)
+        finally:
+            # Also reached when the task is cancelled on timeout
+            StageGraph._end(stage, outcome, start, ok)
+        return ok
+
+    @staticmethod
+    def _begin(stage: Stage, outcome: GraphOutcome) -> float:
+        outcome.started[stage.name] = time.monotonic()
+        STAGES_IN_FLIGHT.labels(stage.name).inc()
+        return time.perf_counter()
+
+    @staticmethod
+    def _raised(stage: Stage, outcome: GraphOutcome, error: Exception) -> bool:
+        print(f"StageGraph: Stage '{stage.name}' raised: {error}")
+        outcome.errors[stage.name] = str(error)
+        outcome.exceptions[stage.name] = error
+        STAGE_FAILURES.labels(stage.name, "raised").inc()
+        return False
+
+    @staticmethod
+    def _end(stage: Stage, outcome: GraphOutcome, start: float, ok: bool) -> None:
+        elapsed = time.perf_counter() - start
+        STAGES_IN_FLIGHT.labels(stage.name).dec()
+        STAGE_SECONDS.labels(stage.name).observe(elapsed)
+        outcome.durations[stage.name] = round(elapsed, 3)
+        # A timed-out stage keeps its "timed_out" status when it eventually returns
+        outcome.status.setdefault(stage.name, "completed" if ok else "failed")
+
+    def _run_in_background(self, stage: Stage, executor: Executor, ctx: RunContext, outcome: GraphOutcome,
+                           progress: _Progress) -> None:
+        """Submits a background stage and reports it when it finishes (or times out) after run() has returned."""
+        outcome.status[stage.name] = "running"
+        reported = threading.Event()
+        finished = threading.Event()
+        group = stage.report_as or stage.name
+
+        def report(ok: bool) -> None:
+            if not reported.is_set():
+                reported.set()
+                progress.finish(group, ok, required=False)
+
+        def on_timeout() -> None:
+            if not finished.is_set():
+                self._timed_out(stage, ctx, outcome, background=True)
+                report(False)
+
+        timer = None
+        if stage.timeout:
+            timer = threading.Timer(stage.timeout, on_timeout)
+            timer.daemon = True
+
+        def invoke() -> bool:
+            # The timeout counts from here, not from submit(): time queued for a thread is free
+            if timer is not None:
+                timer.start()
+            try:
+                return self._invoke(stage, ctx, outcome)
+            finally:
+                finished.set()
+
+        future = executor.submit(invoke)
+        outcome.background[stage.name] = future
+        if timer is not None:
+            future.add_done_callback(lambda _: timer.cancel())
+
+        def on_done(done: Future) -> None:
+            if done.cancelled():
+                outcome.status[stage.name] = "skipped"
+                report(False)
+                return
+            # _invoke set the status unless a timeout was reported first
+            if outcome.status.get(stage.name) == "running":
+                outcome.status[stage.name] = "completed" if done.result() else "failed"
+            report(done.result())
+
+        future.add_done_callback(on_done)
+
+    async def _watch_background(self, stage: Stage, task: asyncio.Task, ctx: RunContext, outcome: GraphOutcome,
+                                progress: _Progress) -> None:
+        """_run_in_background() for run_async(): reports a background task when it finishes or times out."""
+        outcome.status[stage.name] = "running"
+        outcome.background[stage.name] = task
+        try:
+            ok = await self._wait_started(stage, task, outcome)
+        except asyncio.TimeoutError:
+            self._timed_out(stage, ctx, outcome, background=True)
+            task.cancel()
+            ok = False
+        except asyncio.CancelledError:
+            outcome.status[stage.name] = "skipped"
+            ok = False
+        else:
+            # _invoke set the status unless it was still reporting "running"
+            if outcome.status.get(stage.name) == "running":
+                outcome.status[stage.name] = "completed" if ok else "failed"
+        progress.finish(stage.report_as or stage.name, ok, required=False)
+
+    async def _wait_started(self, stage: Stage, task: asyncio.Task, outcome: GraphOutcome) -> bool:
+        """
+        Awaits the task's result, raising asyncio.TimeoutError once the stage has
+        run for stage.timeout seconds (queued time on an executor does not count).
+        """
+        if not stage.timeout:
+            return await task
+        while True:
+            deadline = self._deadline(stage, outcome)
+            timeout = QUEUE_POLL_SECONDS if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError()
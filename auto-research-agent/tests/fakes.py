@@ -0,0 +1,100 @@
+# auto-research-agent/tests/fakes.py
+
+import base64
+import hashlib
+import threading
+import time
+
+class FakeGCSError(Exception):
+    """Mimics google.api_core exceptions, which carry the HTTP status as `code`."""
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+class FakeStorageClient:
+    """
+    In-memory stand-in for google.cloud.storage.Client, covering the calls the agents make.
+
+    Objects live in `objects` keyed by (bucket, name). Knobs:
+        latency: seconds each upload or download takes (to observe concurrency)
+        uniform_access: reject per-object ACLs like a bucket with uniform access
+        corrupt: report a wrong MD5 for stored objects
+    """
+    def __init__(self, latency: float = 0.0, uniform_access: bool = False, corrupt: bool = False):
+        self.latency = latency
+        self.uniform_access = uniform_access
+        self.corrupt = corrupt
+        self.objects = {}
+        self.public = set()
+        self.requests = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def bucket(self, name: str) -> "FakeBucket":
+        return FakeBucket(self, name)
+
+    def _record(self, request: str) -> None:
+        with self.lock:
+            self.requests.append(request)
+
+class FakeBucket:
+    def __init__(self, client: FakeStorageClient, name: str):
+        self.client = client
+        self.name = name
+
+    def blob(self, name: str) -> "FakeBlob":
+        return FakeBlob(self, name)
+
+class FakeBlob:
+    def __init__(self, bucket: FakeBucket, name: str):
+        self.bucket = bucket
+        self.name = name
+        self.md5_hash = None
+        self.content_type = None
+
+    @property
+    def public_url(self) -> str:
+        return f"https://storage.googleapis.com/{self.bucket.name}/{self.name}"
+
+    def upload_from_string(self, data, content_type="text/plain", predefined_acl=None, checksum="auto", **kwargs):
+        client = self.bucket.client
+        client._record("upload")
+        if predefined_acl and client.uniform_access:
+            raise FakeGCSError(400, "Cannot use ACL API on a bucket with uniform bucket-level access")
+        data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        with client.lock:
+            client.in_flight += 1
+            client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        try:
+            time.sleep(client.latency)
+        finally:
+            with client.lock:
+                client.in_flight -= 1
+        with client.lock:
+            client.objects[(self.bucket.name, self.name)] = data
+            if predefined_acl == "publicRead":
+                client.public.add((self.bucket.name, self.name))
+        self.content_type = content_type
+        stored = data + b"!" if client.corrupt else data
+        self.md5_hash = base64.b64encode(hashlib.md5(stored).digest()).decode("ascii")
+
+    def upload_from_filename(self, filename, content_type=None, predefined_acl=None, **kwargs):
+        with open(filename, "rb") as f:
+            self.upload_from_string(f.read(), content_type=content_type, predefined_acl=predefined_acl)
+
+    def make_public(self):
+        client = self.bucket.client
+        client._record("make_public")
+        if client.uniform_access:
+            raise FakeGCSError(400, "Cannot use ACL API on a bucket with uniform bucket-level access")
+        with client.lock:
+            client.public.add((self.bucket.name, self.name))
+
+    def download_as_text(self, timeout=None):
+        self.bucket.client._record("download")
+        time.sleep(self.bucket.client.latency)
+        key = (self.bucket.name, self.name)
+        if key not in self.bucket.client.objects:
+            raise FakeGCSError(404, f"No such object: {self.bucket.name}/{self.name}")
+        return self.bucket.client.objects[key].decode("utf-8")
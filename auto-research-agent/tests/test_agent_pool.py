@@ -0,0 +1,79 @@
+# auto-research-agent/tests/test_agent_pool.py
+
+import threading
+import unittest
+from unittest.mock import MagicMock
+from orchestrator.agent_pool import AgentPool
+
+class TestAgentPool(unittest.TestCase):
+
+    def test_orchestrator_built_once_across_threads(self):
+        """
+        Tests that concurrent first requests share a single orchestrator build.
+        """
+        # --- Arrange ---
+        factory = MagicMock(side_effect=lambda: object())
+        pool = AgentPool(orchestrator_factory=factory)
+        results = []
+
+        # --- Act ---
+        threads = [threading.Thread(target=lambda: results.append(pool.get_orchestrator())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # --- Assert ---
+        factory.assert_called_once()
+        self.assertEqual(len({id(r) for r in results}), 1)
+
+    def test_shutdown_forces_rebuild(self):
+        """
+        Tests that after shutdown the next request builds fresh agents.
+        """
+        # --- Arrange ---
+        factory = MagicMock(side_effect=lambda: object())
+        pool = AgentPool(orchestrator_factory=factory)
+        first = pool.get_orchestrator()
+
+        # --- Act ---
+        pool.shutdown()
+        second = pool.get_orchestrator()
+
+        # --- Assert ---
+        self.assertEqual(factory.call_count, 2)
+        self.assertIsNot(first, second)
+
+    def test_failed_warm_up_is_reported(self):
+        """
+        Tests that a failed warm-up is visible in health() and retried later.
+        """
+        # --- Arrange ---
+        factory = MagicMock(side_effect=[ValueError("Gemini API key is required."), object()])
+        pool = AgentPool(orchestrator_factory=factory)
+
+        # --- Act ---
+        warmed = pool.warm_up()
+        health = pool.health()
+
+        # --- Assert ---
+        self.assertFalse(warmed)
+        self.assertFalse(health["ready"])
+        self.assertIn("API key", health["last_error"])
+        self.assertIsNotNone(pool.get_orchestrator())
+        self.assertTrue(pool.health()["ready"])
+
+    def test_health_leaves_orchestrator_running(self):
+        """
+        Tests that a health check does not close the shared orchestrator.
+        """
+        orchestrator = MagicMock()
+        pool = AgentPool(orchestrator_factory=lambda: orchestrator)
+        pool.get_orchestrator()
+
+        pool.health()
+
+        orchestrator.close.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,13 @@
 # auto-research-agent/tests/test_analysis_agent.py
 
+import threading
+import time
 import unittest
 import json
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 from agents.analysis_agent import AnalysisAgent
+from utils.cache import LRUCache, TieredCache
 
 class TestAnalysisAgent(unittest.TestCase):
 
@@ -88,5 +92,252 @@ class TestAnalysisAgent(unittest.TestCase):
         self.assertEqual(result["error"], "Failed to generate analysis")
         self.assertIn("JSONDecodeError", result["details"]) # Check if the error detail mentions JSON decoding
 
+class StubModel:
+    """
+    Offline stand-in for a Gemini model.
+
+    Map prompts (chunk summaries) return notes after `map_delay` seconds, or raise
+    for chunks containing `fail_marker`; the reduce prompt returns report JSON.
+    """
+    def __init__(self, map_delay: float = 0.0, fail_marker: str | None = None):
+        self.map_delay = map_delay
+        self.fail_marker = fail_marker
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.map_calls = 0
+        self.reduce_prompts = []
+
+    def generate_content(self, prompt):
+        if "Do not output JSON" not in prompt:
+            self.reduce_prompts.append(prompt)
+            return SimpleNamespace(text=json.dumps({"title": "Reduced", "key_insights": []}))
+        with self.lock:
+            self.map_calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.map_delay)
+            if self.fail_marker and self.fail_marker in prompt:
+                raise RuntimeError("503 model overloaded")
+            return SimpleNamespace(text="- a note")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+def build_large_content(chunks: int, fail_chunk: int | None = None) -> str:
+    paragraphs = []
+    for i in range(chunks):
+        marker = " FAILME" if i == fail_chunk else ""
+        paragraphs.append(f"Chunk {i}{marker}. " + "Battery chemistry details and figures. " * 780)
+    return "Internal Document Content:\nSource Document: big.txt\n" + "\n\n".join(paragraphs)
+
+class TestAnalysisAgentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.model = MagicMock()
+        self.model.model_name = "models/test-model"
+        self.cache = TieredCache(LRUCache())
+        self.agent = AnalysisAgent(model=self.model, cache=self.cache)
+
+    def test_identical_content_skips_model(self):
+        """
+        Tests that a second analysis of byte-identical content is served from cache.
+        """
+        # --- Arrange ---
+        self.model.generate_content.return_value = SimpleNamespace(text=json.dumps({"title": "Cached"}))
+
+        # --- Act ---
+        first = self.agent.analyze("Same content.")
+        second = self.agent.analyze("Same content.")
+
+        # --- Assert ---
+        self.model.generate_content.assert_called_once()
+        self.assertFalse(first.cache_hit)
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(second.insights, {"title": "Cached"})
+        self.assertTrue(second.metadata()["cache_hit"])
+
+    def test_errors_are_not_cached(self):
+        """
+        Tests that a failed analysis is retried rather than served from cache.
+        """
+        # --- Arrange ---
+        self.model.generate_content.side_effect = [
+            SimpleNamespace(text="not json"),
+            SimpleNamespace(text=json.dumps({"title": "Recovered"})),
+        ]
+
+        # --- Act ---
+        first = self.agent.analyze("Same content.")
+        second = self.agent.analyze("Same content.")
+
+        # --- Assert ---
+        self.assertIn("error", first.insights)
+        self.assertEqual(second.insights, {"title": "Recovered"})
+        self.assertFalse(second.cache_hit)
+
+    def test_prompt_change_invalidates_cache(self):
+        """
+        Tests that a different prompt template produces a different cache key.
+        """
+        # --- Arrange ---
+        self.model.generate_content.return_value = SimpleNamespace(text=json.dumps({"title": "T"}))
+        self.agent.analyze("Same content.")
+        with patch('builtins.open', unittest.mock.mock_open(read_data="New prompt: {{raw_content}}")):
+            edited_agent = AnalysisAgent(model=self.model, cache=self.cache)
+
+        # --- Act ---
+        result = edited_agent.analyze("Same content.")
+
+        # --- Assert ---
+        self.assertFalse(result.cache_hit)
+        self.assertEqual(self.model.generate_content.call_count, 2)
+
+    def test_previous_insights_use_refresh_prompt(self):
+        """
+        Tests that a refresh sends the previous report with the new material and is cached separately.
+        """
+        # --- Arrange ---
+        self.model.generate_content.return_value = SimpleNamespace(text=json.dumps({"title": "Updated"}))
+        previous = {"title": "Old Report", "key_insights": []}
+
+        # --- Act ---
+        fresh = self.agent.analyze("New material.")
+        refreshed = self.agent.analyze("New material.", previous_insights=previous)
+
+        # --- Assert ---
+        prompt = self.model.generate_content.call_args.args[0]
+        self.assertIn('"title": "Old Report"', prompt)
+        self.assertIn("New or Changed Material", prompt)
+        self.assertIn("New material.", prompt)
+        self.assertFalse(fresh.cache_hit)
+        self.assertFalse(refreshed.cache_hit)
+
+@patch('agents.analysis_agent.ANALYSIS_CHUNK_TOKENS', 8000)
+@patch('agents.analysis_agent.ANALYSIS_MAP_CONCURRENCY', 3)
+class TestAnalysisAgentMapReduce(unittest.TestCase):
+
+    def test_map_reduce_runs_chunks_concurrently(self):
+        """
+        Tests that chunks are summarized in parallel under the concurrency cap and reduced once.
+        """
+        # --- Arrange ---
+        model = StubModel(map_delay=0.1)
+        agent = AnalysisAgent(model=model)
+
+        # --- Act ---
+        result = agent.analyze(build_large_content(6), mode="map_reduce")
+
+        # --- Assert ---
+        self.assertEqual(result.insights["title"], "Reduced")
+        self.assertEqual(result.chunks, model.map_calls)
+        self.assertGreater(result.chunks, 1)
+        self.assertLessEqual(model.max_in_flight, 3)
+        self.assertGreater(model.max_in_flight, 1)
+        self.assertEqual(len(model.reduce_prompts), 1)
+        self.assertIn("Summary of source excerpt 1", model.reduce_prompts[0])
+
+    def test_partial_map_failure_degrades_gracefully(self):
+        """
+        Tests that a failed chunk is skipped and noted instead of failing the report.
+        """
+        # --- Arrange ---
+        agent = AnalysisAgent(model=StubModel(fail_marker="FAILME"))
+
+        # --- Act ---
+        result = agent.analyze(build_large_content(4, fail_chunk=1), mode="map_reduce")
+
+        # --- Assert ---
+        self.assertNotIn("error", result.insights)
+        self.assertEqual(result.failed_chunks, 1)
+        self.assertEqual(result.metadata()["mode"], "map_reduce")
+
+    def test_all_map_failures_return_error(self):
+        """
+        Tests that the report fails only when no chunk could be summarized.
+        """
+        agent = AnalysisAgent(model=StubModel(fail_marker="Battery"))
+        result = agent.analyze(build_large_content(2), mode="map_reduce")
+        self.assertIn("error", result.insights)
+        self.assertEqual(result.failed_chunks, result.chunks)
+
+    @patch('agents.analysis_agent.ANALYSIS_MAP_REDUCE_THRESHOLD_TOKENS', 1000)
+    def test_auto_mode_picks_by_size(self):
+        """
+        Tests that auto mode uses a single call for small content and map-reduce for large.
+        """
+        agent = AnalysisAgent(model=StubModel())
+        self.assertEqual(agent.analyze("Small content.", mode="auto").mode, "single")
+        self.assertEqual(agent.analyze(build_large_content(2), mode="auto").mode, "map_reduce")
+
+class StreamingStubModel:
+    """Returns the report JSON in small chunks when called with stream=True, recording how many were read."""
+    def __init__(self, report: dict, chunk_size: int = 8):
+        self.text = json.dumps(report)
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        pieces = [self.text[i:i + self.chunk_size] for i in range(0, len(self.text), self.chunk_size)]
+        if not stream:
+            return SimpleNamespace(text=self.text)
+
+        def chunks():
+            for piece in pieces:
+                self.chunks_read += 1
+                yield SimpleNamespace(text=piece)
+        return chunks()
+
+class TestAnalysisAgentStream(unittest.TestCase):
+
+    def setUp(self):
+        self.report = {
+            "title": "Streamed",
+            "executive_summary": "Summary.",
+            "key_insights": [{"insight": "One"}, {"insight": "Two"}],
+            "conclusion": "Done.",
+        }
+
+    def test_fields_stream_before_generation_finishes(self):
+        """
+        Tests that the first field is yielded long before the last chunk is read.
+        """
+        # --- Arrange ---
+        model = StreamingStubModel(self.report)
+        agent = AnalysisAgent(model=model, cache=TieredCache(LRUCache()))
+
+        # --- Act ---
+        stream = agent.stream("Some raw content.", mode="single")
+        first = next(stream)
+        read_at_first = model.chunks_read
+        events = [first] + list(stream)
+
+        # --- Assert ---
+        self.assertEqual(first, ("field", "title", "Streamed"))
+        self.assertLess(read_at_first, 5)
+        items = [e[3] for e in events if e[0] == "item"]
+        self.assertEqual(items, self.report["key_insights"])
+        result = events[-1][1]
+        self.assertEqual(events[-1][0], "result")
+        self.assertEqual(result.insights, self.report)
+
+    def test_streamed_report_is_cached(self):
+        """
+        Tests that a streamed report is cached and replayed as events without calling the model.
+        """
+        model = StreamingStubModel(self.report)
+        agent = AnalysisAgent(model=model, cache=TieredCache(LRUCache()))
+        list(agent.stream("Same content.", mode="single"))
+
+        replay = list(agent.stream("Same content.", mode="single"))
+
+        self.assertEqual(model.calls, 1)
+        self.assertTrue(replay[-1][1].cache_hit)
+        self.assertIn(("field", "conclusion", "Done."), replay)
+        self.assertTrue(agent.analyze("Same content.", mode="single").cache_hit)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
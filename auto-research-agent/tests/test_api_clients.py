@@ -0,0 +1,181 @@
+# auto-research-agent/tests/test_api_clients.py
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+import requests
+from utils.api_clients import WebSearchClient, parse_retry_after
+from utils.cache import LRUCache, TieredCache
+
+def make_response(organic):
+    response = MagicMock()
+    response.json.return_value = {"organic": organic}
+    response.raise_for_status.return_value = None
+    return response
+
+class TestWebSearchClientCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TieredCache(LRUCache())
+        self.client = WebSearchClient(api_key="test-key", cache=self.cache, max_retries=0)
+
+    @patch('utils.api_clients.requests.Session.post')
+    def test_repeated_query_served_from_cache(self, mock_post):
+        """
+        Tests that a repeated query (ignoring case and whitespace) does not call Serper again.
+        """
+        # --- Arrange ---
+        mock_post.return_value = make_response([{"title": "AI", "link": "https://a", "snippet": "News"}])
+
+        # --- Act ---
+        first = self.client.search("AI  trends")
+        second = self.client.search("ai trends")
+
+        # --- Assert ---
+        mock_post.assert_called_once()
+        self.assertEqual(first, second)
+        self.assertIn("Snippet: News", first)
+        self.assertEqual(self.client.cache_info()["hits"], 1)
+
+    @patch('utils.api_clients.requests.Session.post')
+    def test_max_results_is_part_of_the_key(self, mock_post):
+        """
+        Tests that the same query with a different max_results is fetched separately.
+        """
+        # --- Arrange ---
+        mock_post.return_value = make_response([{"title": "AI", "snippet": "News"}])
+
+        # --- Act ---
+        self.client.search("ai trends", max_results=5)
+        self.client.search("ai trends", max_results=10)
+
+        # --- Assert ---
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('utils.api_clients.requests.Session.post')
+    def test_failed_search_is_not_cached(self, mock_post):
+        """
+        Tests that a failed search returns an empty string and is retried next time.
+        """
+        # --- Arrange ---
+        mock_post.side_effect = [
+            requests.ConnectionError("boom"),
+            make_response([{"title": "AI", "snippet": "News"}]),
+        ]
+
+        # --- Act ---
+        first = self.client.search("ai trends")
+        second = self.client.search("ai trends")
+
+        # --- Assert ---
+        self.assertEqual(first, "")
+        self.assertIn("Title: AI", second)
+        self.assertEqual(mock_post.call_count, 2)
+
+class StubSerperHandler(BaseHTTPRequestHandler):
+    """Serves canned Serper responses; the server's `responses` list is consumed in order."""
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.received.append(self.headers.get("X-API-KEY"))
+        status, headers, body = self.server.responses.pop(0) if self.server.responses else (200, {}, {"organic": []})
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestWebSearchClientHTTP(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubSerperHandler)
+        self.server.responses = []
+        self.server.received = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = WebSearchClient(
+            api_key="test-key",
+            cache=TieredCache(LRUCache(max_entries=0)),  # effectively disabled
+            search_url=f"http://127.0.0.1:{self.server.server_address[1]}/search",
+            max_retries=2,
+            backoff_base=0.01,
+            backoff_max=0.05,
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        """
+        Tests that sequential searches share one keep-alive connection.
+        """
+        # --- Arrange ---
+        self.server.responses = [(200, {}, {"organic": [{"title": f"R{i}", "snippet": "S"}]}) for i in range(3)]
+
+        # --- Act ---
+        for i in range(3):
+            self.client.search(f"query {i}")
+
+        # --- Assert ---
+        pool = self.client.stats()["pool"]["hosts"][0]
+        self.assertEqual(pool["connections_created"], 1)
+        self.assertEqual(pool["requests_sent"], 3)
+        self.assertEqual(self.server.received, ["test-key"] * 3)
+
+    def test_retries_rate_limited_response(self):
+        """
+        Tests that a 429 with Retry-After is retried and the search still succeeds.
+        """
+        # --- Arrange ---
+        self.server.responses = [
+            (429, {"Retry-After": "0"}, {"message": "Too many requests"}),
+            (503, {}, {"message": "Unavailable"}),
+            (200, {}, {"organic": [{"title": "AI", "snippet": "News"}]}),
+        ]
+
+        # --- Act ---
+        result = self.client.search("ai trends")
+
+        # --- Assert ---
+        self.assertIn("Title: AI", result)
+        stats = self.client.stats()
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["successes"], 1)
+        self.assertEqual(stats["status_codes"], {"429": 1, "503": 1, "200": 1})
+
+    def test_gives_up_after_max_retries(self):
+        """
+        Tests that persistent 5xx responses give up after max_retries and return "".
+        """
+        # --- Arrange ---
+        self.server.responses = [(500, {}, {"message": "Internal error"})] * 3
+
+        # --- Act ---
+        result = self.client.search("ai trends")
+
+        # --- Assert ---
+        self.assertEqual(result, "")
+        stats = self.client.stats()
+        self.assertEqual(stats["attempts"], 3)
+        self.assertEqual(stats["failures"], 1)
+
+    def test_parse_retry_after(self):
+        """
+        Tests parsing of delta-seconds and invalid Retry-After values.
+        """
+        self.assertEqual(parse_retry_after("2"), 2.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,283 @@
+# auto-research-agent/tests/test_async_pipeline.py
+
+import asyncio
+import json
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import config
+from agents.analysis_agent import AsyncAnalysisAgent
+from agents.delivery_agent import AsyncDeliveryAgent
+from agents.research_agent import AsyncResearchAgent
+from orchestrator.async_orchestrator import AsyncOrchestrator
+from orchestrator.run_context import RunContext
+from orchestrator.stage_graph import Stage, StageGraph
+from tests.fakes import FakeStorageClient
+from utils.api_clients import AsyncWebSearchClient
+from utils.rate_limiter import ProviderLimiter
+
+# asgi imports main; keep it from building the real agents in the background
+with patch.object(config, "AGENT_POOL_WARM_UP", False):
+    import asgi
+
+REPORT = {"title": "Report", "executive_summary": "Summary", "key_insights": [], "conclusion": "Done"}
+
+class FakeResponse:
+    """The parts of httpx.Response that AsyncWebSearchClient uses."""
+    def __init__(self, status_code: int, payload: dict | None = None, headers: dict | None = None):
+        self.status_code = status_code
+        self.is_success = status_code < 400
+        self.headers = headers or {}
+        self.content = json.dumps(payload or {}).encode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.is_success:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeAsyncHTTP:
+    """Stands in for httpx.AsyncClient: answers with the queued statuses, then 200s, after `latency` seconds."""
+    def __init__(self, latency: float = 0.0, statuses: list[int] | None = None):
+        self.latency = latency
+        self.statuses = list(statuses or [])
+        self.calls = 0
+
+    async def post(self, url, content=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.statuses:
+            return FakeResponse(self.statuses.pop(0), headers={"Retry-After": "0"})
+        query = json.loads(content)["q"]
+        return FakeResponse(200, {"organic": [{"title": query, "link": f"https://example.com/{query}", "snippet": "s"}]})
+
+class FakeAsyncModel:
+    """Gemini stub with generate_content_async; tracks how many calls overlap."""
+    model_name = "fake"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(text=json.dumps(REPORT), usage_metadata=None)
+
+class StubReporting:
+    @staticmethod
+    def render_bytes(insights, query):
+        return f"report_{abs(hash(query))}.pdf", b"%PDF-1.4"
+
+def search_client(http: FakeAsyncHTTP) -> AsyncWebSearchClient:
+    return AsyncWebSearchClient(api_key="k", cache=None, client=http, backoff_base=0.01,
+                                limiter=ProviderLimiter("serper", max_concurrency=100))
+
+class TestAsyncPipeline(unittest.TestCase):
+
+    def test_concurrent_reports_share_one_event_loop(self):
+        """
+        Tests that many reports run at once on one loop: their Gemini calls overlap instead of queuing for threads.
+        """
+        # --- Arrange ---
+        storage = FakeStorageClient(latency=0.05)
+        storage.objects[("docs", "notes.txt")] = b"Internal notes."
+        model = FakeAsyncModel(latency=0.3)
+        orchestrator = AsyncOrchestrator(
+            research_agent=AsyncResearchAgent(search_client=search_client(FakeAsyncHTTP(latency=0.1)),
+                                              storage_client=storage),
+            analysis_agent=AsyncAnalysisAgent(model=model, cache=None,
+                                              limiter=ProviderLimiter("gemini", max_concurrency=100)),
+            reporting_agent=StubReporting(),
+            delivery_agent=AsyncDeliveryAgent(storage_client=storage),
+        )
+
+        async def run_all():
+            try:
+                return await asyncio.gather(*(orchestrator.run(f"topic {i}", ["gs://docs/notes.txt"])
+                                              for i in range(40)))
+            finally:
+                await orchestrator.aclose()
+
+        # --- Act ---
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+
+        # --- Assert ---
+        self.assertEqual({r["status"] for r in results}, {"success"})
+        self.assertTrue(all(r["report_url"].startswith("https://storage.googleapis.com/") for r in results))
+        self.assertEqual(model.max_in_flight, 40)
+        # One report takes ~0.5s; 40 of them one after another would take 20s
+        self.assertLess(elapsed, 5)
+
+    def test_search_client_retries_throttled_requests(self):
+        """
+        Tests that the async search client backs off and retries a 429 like the sync client.
+        """
+        # --- Arrange ---
+        http = FakeAsyncHTTP(statuses=[429])
+        client = search_client(http)
+
+        # --- Act ---
+        results = asyncio.run(client.search_results("batteries"))
+
+        # --- Assert ---
+        self.assertEqual(results[0]["title"], "batteries")
+        self.assertEqual(http.calls, 2)
+        stats = client.stats()
+        self.assertEqual((stats["retries"], stats["successes"]), (1, 1))
+        self.assertEqual(stats["status_codes"], {"429": 1, "200": 1})
+
+    def test_acquire_async_waits_without_blocking_the_loop(self):
+        """
+        Tests that a call waiting for a concurrency slot lets other tasks run and starts once the slot frees up.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("test", max_concurrency=1)
+        ticks = []
+
+        async def scenario():
+            held = limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire_async())
+            for i in range(3):
+                await asyncio.sleep(0.02)
+                ticks.append(i)
+            self.assertFalse(waiter.done())
+            held.release()
+            permit = await asyncio.wait_for(waiter, 1)
+            permit.release()
+
+        # --- Act ---
+        asyncio.run(scenario())
+
+        # --- Assert ---
+        self.assertEqual(ticks, [0, 1, 2])
+        self.assertEqual(limiter.stats()["acquired"], 2)
+
+    def test_timed_out_coroutine_stage_is_cancelled(self):
+        """
+        Tests that run_async cancels a coroutine stage at its timeout while plain stages still run on the executor.
+        """
+        # --- Arrange ---
+        cancelled = []
+
+        async def slow(ctx):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        graph = StageGraph([
+            Stage("slow", slow, timeout=0.1, policy="optional"),
+            Stage("after", lambda ctx: True, deps=("slow",)),
+        ])
+
+        async def scenario():
+            outcome = await graph.run_async(RunContext(query="q"), None)
+            await asyncio.sleep(0)  # let the cancellation land
+            return outcome
+
+        # --- Act ---
+        start = time.perf_counter()
+        outcome = asyncio.run(scenario())
+
+        # --- Assert ---
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(outcome.status, {"slow": "timed_out", "after": "completed"})
+        self.assertEqual(cancelled, [True])
+
+class FakePool:
+    def __init__(self, result: dict):
+        self.orchestrator = SimpleNamespace(run=self.run)
+        self.result = result
+        self.runs = []
+
+    async def run(self, query, gcs_paths, options=None):
+        self.runs.append((query, gcs_paths, options))
+        return self.result
+
+    def get_async_orchestrator(self):
+        return self.orchestrator
+
+async def call_asgi(app, method: str, path: str, body: dict | None = None) -> tuple[int, dict, bytes]:
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body else b"", "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "query_string": b""}
+    await app(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+class TestASGIApp(unittest.TestCase):
+
+    def setUp(self):
+        self.delegated = []
+
+        async def fallback(scope, receive, send):
+            message = await receive()
+            self.delegated.append((scope["method"], scope["path"], message["body"]))
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        self.fallback = fallback
+
+    def test_serves_reports_and_delegates_the_rest(self):
+        """
+        Tests that POST / runs on the async orchestrator while jobs and other routes go to the Flask fallback.
+        """
+        # --- Arrange ---
+        pool = FakePool({"status": "success", "report_url": "https://example.com/r.pdf"})
+        app = asgi.ResearchASGIApp(flask_app=object(), pool=pool, fallback=self.fallback)
+
+        async def scenario():
+            report = await call_asgi(app, "POST", "/", {"query": "batteries", "fan_out": 2})
+            invalid = await call_asgi(app, "POST", "/", {"query": "batteries", "fan_out": 99})
+            job = await call_asgi(app, "POST", "/", {"query": "batteries", "async": True})
+            health = await call_asgi(app, "GET", "/health")
+            return report, invalid, job, health
+
+        # --- Act ---
+        report, invalid, job, health = asyncio.run(scenario())
+
+        # --- Assert ---
+        self.assertEqual(report[0], 200)
+        self.assertEqual(json.loads(report[2])["report_url"], "https://example.com/r.pdf")
+        self.assertEqual(pool.runs, [("batteries", None, {"fan_out": 2})])
+        self.assertEqual(invalid[0], 400)
+        self.assertEqual((job[0], health[0]), (204, 204))
+        self.assertEqual(self.delegated[0], ("POST", "/", json.dumps({"query": "batteries", "async": True}).encode()))
+        self.assertEqual(self.delegated[1][:2], ("GET", "/health"))
+
+    def test_rate_limited_run_returns_retry_after(self):
+        """
+        Tests that a run refused by a provider limiter answers 429 with a Retry-After header, like the Flask route.
+        """
+        # --- Arrange ---
+        pool = FakePool({"status": "error", "message": "Analysis phase failed.",
+                         "rate_limited": {"provider": "gemini", "queue_full": False, "retry_after": 2.5}})
+        app = asgi.ResearchASGIApp(flask_app=object(), pool=pool, fallback=self.fallback)
+
+        # --- Act ---
+        status, headers, body = asyncio.run(call_asgi(app, "POST", "/", {"query": "batteries"}))
+
+        # --- Assert ---
+        self.assertEqual(status, 429)
+        self.assertEqual(headers[b"retry-after"], b"3")
+        self.assertEqual(json.loads(body), {"error": "Analysis phase failed.", "retry_after": 2.5})
+
+if __name__ == '__main__':
+    unittest.main()
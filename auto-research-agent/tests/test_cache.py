@@ -0,0 +1,124 @@
+# auto-research-agent/tests/test_cache.py
+
+import tempfile
+import time
+import unittest
+from utils.cache import DiskCache, LRUCache, TieredCache, make_cache_key
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        """
+        Tests that the oldest untouched entry is evicted when max_entries is exceeded.
+        """
+        # --- Arrange ---
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+
+        # --- Act ---
+        cache.set("c", 3)
+
+        # --- Assert ---
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.info()["evictions"], 1)
+
+    def test_evicts_by_size(self):
+        """
+        Tests that entries are evicted when the byte budget is exceeded.
+        """
+        # --- Arrange ---
+        cache = LRUCache(max_entries=100, max_bytes=20)
+
+        # --- Act ---
+        cache.set("a", "x" * 10)
+        cache.set("b", "y" * 10)
+
+        # --- Assert ---
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "y" * 10)
+
+    def test_expired_entries_are_misses(self):
+        """
+        Tests that entries past their TTL are not returned and are counted.
+        """
+        # --- Arrange ---
+        cache = LRUCache(ttl_seconds=0.01)
+        cache.set("a", 1)
+
+        # --- Act ---
+        time.sleep(0.02)
+        value = cache.get("a")
+
+        # --- Assert ---
+        self.assertIsNone(value)
+        info = cache.info()
+        self.assertEqual(info["expirations"], 1)
+        self.assertEqual(info["misses"], 1)
+
+class TestTieredCache(unittest.TestCase):
+
+    def test_disk_tier_survives_new_memory_tier(self):
+        """
+        Tests that a value written through one TieredCache is found on disk by another
+        and promoted into its memory tier.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # --- Arrange ---
+            key = make_cache_key("serper", "ai trends", 5)
+            TieredCache(LRUCache(), DiskCache(tmp_dir)).set(key, [{"title": "T"}])
+            fresh = TieredCache(LRUCache(), DiskCache(tmp_dir))
+
+            # --- Act ---
+            first = fresh.get(key)
+            second = fresh.get(key)
+
+            # --- Assert ---
+            self.assertEqual(first, [{"title": "T"}])
+            self.assertEqual(second, first)
+            info = fresh.info()
+            self.assertEqual(info["hits"], 2)
+            self.assertEqual(info["disk"]["hits"], 1)
+            self.assertEqual(info["memory"]["hits"], 1)
+
+    def test_promoted_entry_keeps_its_remaining_ttl(self):
+        """
+        Tests that a disk hit promoted into memory expires when the disk entry does, not a full TTL later.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # --- Arrange ---
+            TieredCache(LRUCache(ttl_seconds=0.5), DiskCache(tmp_dir, ttl_seconds=0.5)).set("key", "value")
+            time.sleep(0.3)
+            fresh = TieredCache(LRUCache(ttl_seconds=0.5), DiskCache(tmp_dir, ttl_seconds=0.5))
+
+            # --- Act ---
+            promoted = fresh.get("key")
+            time.sleep(0.3)
+            expired = fresh.get("key")
+
+            # --- Assert ---
+            self.assertEqual(promoted, "value")
+            self.assertIsNone(expired)
+
+    def test_disk_tier_evicts_oldest_when_over_budget(self):
+        """
+        Tests that the disk tier removes the oldest entries when it exceeds max_bytes.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # --- Arrange ---
+            disk = DiskCache(tmp_dir, max_bytes=150)
+
+            # --- Act ---
+            disk.set("old", "a" * 60)
+            time.sleep(0.01)
+            disk.set("new", "b" * 60)
+
+            # --- Assert ---
+            self.assertIsNone(disk.get("old"))
+            self.assertEqual(disk.get("new"), "b" * 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# auto-research-agent/tests/test_coalescer.py
+
+import threading
+import time
+import unittest
+from orchestrator.coalescer import RequestCoalescer, coalesce_key
+
+def slow_run(calls: list, seconds: float = 0.2, result: dict | None = None):
+    def func(notify):
+        calls.append(1)
+        notify("research", "running")
+        time.sleep(seconds)
+        notify("research", "completed")
+        return dict(result or {"status": "success", "report_url": "https://example/r.pdf"})
+    return func
+
+class TestRequestCoalescer(unittest.TestCase):
+
+    def test_concurrent_identical_requests_share_one_run(self):
+        """
+        Tests that callers arriving during a run wait for it, get its result and see its stage events.
+        """
+        # --- Arrange ---
+        coalescer = RequestCoalescer(reuse_seconds=0)
+        calls, results, marks = [], [], []
+        func = slow_run(calls)
+
+        def request(i):
+            on_stage = lambda stage, status: marks.append((i, stage, status))
+            results.append(coalescer.run("key", func, on_stage=on_stage))
+
+        # --- Act ---
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+            time.sleep(0.01)
+        for t in threads:
+            t.join()
+
+        # --- Assert ---
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({r["report_url"] for r in results}, {"https://example/r.pdf"})
+        for i in range(8):
+            self.assertEqual([m[1:] for m in marks if m[0] == i],
+                             [("research", "running"), ("research", "completed")])
+        stats = coalescer.stats()
+        self.assertEqual((stats["executed"], stats["joined"], stats["saved_runs"]), (1, 7, 7))
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_finished_result_reused_within_window(self):
+        """
+        Tests that a successful result is reused for a short window, and failures never are.
+        """
+        coalescer = RequestCoalescer(reuse_seconds=0.2)
+        calls = []
+
+        coalescer.run("ok", slow_run(calls, seconds=0))
+        coalescer.run("ok", slow_run(calls, seconds=0))
+        time.sleep(0.3)
+        coalescer.run("ok", slow_run(calls, seconds=0))
+        failing = slow_run(calls, seconds=0, result={"status": "error", "message": "boom"})
+        coalescer.run("bad", failing)
+        coalescer.run("bad", failing)
+
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(coalescer.stats()["reused"], 1)
+        self.assertEqual(coalescer.stats()["failed"], 2)
+
+    def test_exception_reaches_every_waiter(self):
+        """
+        Tests that a crashed run raises in all coalesced callers and the next request runs again.
+        """
+        # --- Arrange ---
+        coalescer = RequestCoalescer()
+        errors = []
+
+        def crash(notify):
+            time.sleep(0.1)
+            raise RuntimeError("Gemini down")
+
+        def request():
+            try:
+                coalescer.run("key", crash)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        # --- Act ---
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        retried = coalescer.run("key", lambda notify: {"status": "success"})
+
+        # --- Assert ---
+        self.assertEqual(errors, ["Gemini down"] * 3)
+        self.assertEqual(retried, {"status": "success"})
+
+    def test_system_exit_releases_waiters(self):
+        """
+        Tests that a leader killed by SystemExit re-raises it and a joined caller gets it instead of waiting forever.
+        """
+        # --- Arrange ---
+        coalescer = RequestCoalescer()
+        joined = threading.Event()
+        errors = []
+
+        def exit_run(notify):
+            joined.wait(1)
+            raise SystemExit("worker timeout")
+
+        def request():
+            try:
+                coalescer.run("key", exit_run)
+            except SystemExit as e:
+                errors.append(e)
+
+        # --- Act ---
+        leader = threading.Thread(target=request, daemon=True)
+        leader.start()
+        while coalescer.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+        follower = threading.Thread(target=request, daemon=True)
+        follower.start()
+        while coalescer.stats()["joined"] == 0:
+            time.sleep(0.01)
+        joined.set()
+        leader.join(2)
+        follower.join(2)
+
+        # --- Assert ---
+        self.assertFalse(follower.is_alive())
+        self.assertEqual([str(e) for e in errors], ["worker timeout"] * 2)
+        self.assertEqual(coalescer.stats()["in_flight"], 0)
+
+    def test_key_normalization(self):
+        """
+        Tests that case, spacing and document order do not split requests, but options do.
+        """
+        self.assertEqual(coalesce_key("Solar  Power ", ["gs://b/2", "gs://b/1"]),
+                         coalesce_key("solar power", ["gs://b/1", "gs://b/2"]))
+        self.assertEqual(coalesce_key("q", None, None), coalesce_key("q", [], {}))
+        self.assertNotEqual(coalesce_key("q", options={"fan_out": 2}), coalesce_key("q", options={"fan_out": 3}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# auto-research-agent/tests/test_context_packer.py
+
+import unittest
+from utils.context_packer import ContextPacker, estimate_tokens, split_passages
+
+def build_content(doc_paragraphs: list[str]) -> str:
+    web = "\n".join(f"Title: Result {i}\nSnippet: solar panel efficiency news {i}\n---" for i in range(3))
+    doc = "\n\n".join(doc_paragraphs)
+    return (
+        f"Web Search Results for query 'solar panel efficiency':\n{web}\n\n"
+        f"Internal Document Content:\nSource Document: notes.txt\n{doc}\n---"
+    )
+
+class TestContextPacker(unittest.TestCase):
+
+    def test_split_attaches_headings(self):
+        """
+        Tests that heading lines label passages instead of becoming passages.
+        """
+        passages = split_passages(build_content(["First paragraph.", "Second paragraph."]))
+        self.assertEqual(len(passages), 5)
+        self.assertTrue(passages[0].heading.startswith("Web Search Results"))
+        self.assertEqual(passages[-1].heading, "Source Document: notes.txt")
+
+    def test_long_paragraph_split_under_limit(self):
+        """
+        Tests that oversized paragraphs are split into windows under the passage limit.
+        """
+        paragraph = " ".join(f"Sentence number {i} talks about something." for i in range(200))
+        passages = split_passages(paragraph, max_passage_tokens=50)
+        self.assertGreater(len(passages), 1)
+        self.assertTrue(all(p.tokens <= 50 for p in passages))
+
+    def test_content_within_budget_is_unchanged(self):
+        """
+        Tests that small inputs pass through untouched.
+        """
+        content = build_content(["Solar panels convert light."])
+        packed = ContextPacker(token_budget=10_000).pack(content, "solar panel efficiency")
+        self.assertEqual(packed.content, content)
+        self.assertEqual(packed.dropped, [])
+
+    def test_keeps_relevant_passages_within_budget(self):
+        """
+        Tests that irrelevant passages are dropped first and the budget is respected.
+        """
+        # --- Arrange ---
+        filler = [f"Unrelated cafeteria menu item {i} with soup and bread and more words here." * 3 for i in range(40)]
+        relevant = "Solar panel efficiency improved to 30 percent thanks to perovskite cells."
+        content = build_content(filler[:20] + [relevant] + filler[20:])
+        budget = 300
+
+        # --- Act ---
+        packed = ContextPacker(token_budget=budget).pack(content, "solar panel efficiency")
+
+        # --- Assert ---
+        self.assertLessEqual(packed.packed_tokens, budget)
+        self.assertIn(relevant, packed.content)
+        self.assertIn("Source Document: notes.txt", packed.content)
+        self.assertGreater(len(packed.dropped), 0)
+        summary = packed.summary(max_listed=2)
+        self.assertEqual(summary["dropped"], len(packed.dropped))
+        self.assertEqual(summary["dropped_tokens"], sum(p.tokens for p in packed.dropped))
+        self.assertEqual(len(summary["dropped_passages"]), 2)
+        self.assertIn("cafeteria", summary["dropped_passages"][0]["preview"])
+        self.assertLess(estimate_tokens(packed.content), estimate_tokens(content))
+
+if __name__ == '__main__':
+    unittest.main()
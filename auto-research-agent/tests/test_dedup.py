@@ -0,0 +1,110 @@
+# auto-research-agent/tests/test_dedup.py
+
+import random
+import time
+import unittest
+from utils.dedup import NearDuplicateFilter
+
+STORY = ("Researchers at the national lab reported a solid state battery cell that keeps ninety percent "
+         "of its capacity after two thousand cycles, using a sulfide electrolyte and a lithium metal anode")
+
+def prose(words: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"word{rng.randrange(5000)}" for _ in range(words))
+
+def build_content(snippets: list[str], documents: dict[str, str]) -> str:
+    web = "\n".join(f"Title: Result {i}\nSnippet: {s}\n---" for i, s in enumerate(snippets))
+    docs = "\n".join(f"Source Document: {name}\n{text}\n---" for name, text in documents.items())
+    return (f"Web Search Results for query 'solid state batteries':\n{web}\n\n"
+            f"Internal Document Content:\n{docs}")
+
+class TestNearDuplicateFilter(unittest.TestCase):
+
+    def test_drops_syndicated_snippets(self):
+        """
+        Tests that lightly edited copies of a snippet are dropped, the first copy and distinct snippets are kept,
+        and the savings are reported.
+        """
+        # --- Arrange ---
+        syndicated = STORY.replace("reported", "announced") + " on Monday"
+        content = build_content([STORY, prose(30, 1), syndicated, prose(30, 2)], {})
+
+        # --- Act ---
+        result = NearDuplicateFilter(threshold=0.7).dedup(content)
+
+        # --- Assert ---
+        self.assertEqual([d.passage.index for d in result.dropped], [2])
+        self.assertEqual(result.dropped[0].duplicate_of, 0)
+        self.assertIn(STORY, result.content)
+        self.assertNotIn("on Monday", result.content)
+        self.assertIn(prose(30, 2), result.content)
+        summary = result.summary()
+        self.assertEqual((summary["passages"], summary["dropped"]), (4, 1))
+        self.assertEqual(summary["dropped_passages"][0]["duplicate_of"], 0)
+        self.assertEqual(result.summary(max_listed=0)["dropped_passages"], [])
+        self.assertEqual(summary["chars_saved"], len(f"Title: Result 2\nSnippet: {syndicated}"))
+        self.assertGreater(summary["tokens_saved"], 0)
+
+    def test_threshold_controls_what_counts_as_duplicate(self):
+        """
+        Tests that a passage sharing about half its text is only dropped under a low threshold.
+        """
+        # --- Arrange ---
+        half = STORY + " " + prose(30, 3)
+        content = build_content([STORY + " " + prose(30, 4), half], {})
+
+        # --- Act ---
+        strict = NearDuplicateFilter(threshold=0.7).dedup(content)
+        loose = NearDuplicateFilter(threshold=0.3).dedup(content)
+
+        # --- Assert ---
+        self.assertEqual(strict.dropped, [])
+        self.assertEqual(strict.content, content)
+        self.assertEqual(len(loose.dropped), 1)
+
+    def test_overlapping_documents_keep_headings(self):
+        """
+        Tests that passages repeated across documents are dropped while each document's own text stays under its
+        heading, the documents header is kept and the remaining paragraphs keep their layout.
+        """
+        # --- Arrange ---
+        shared = [prose(100, seed) for seed in range(10, 14)]
+        documents = {
+            "report_v1.txt": "\n\n".join(shared),
+            "report_v2.txt": "\n\n".join(shared + [prose(100, 20)]),
+        }
+
+        # --- Act ---
+        result = NearDuplicateFilter().dedup(build_content([STORY], documents))
+
+        # --- Assert ---
+        self.assertEqual(len(result.dropped), 4)
+        self.assertEqual(result.content.count(shared[0]), 1)
+        self.assertIn("Source Document: report_v2.txt\n" + prose(100, 20) + "\n---", result.content)
+        self.assertIn("Internal Document Content:\nSource Document: report_v1.txt\n", result.content)
+        self.assertIn(f"{shared[0]}\n\n{shared[1]}\n", result.content)
+        self.assertEqual(result.content.count("---"), 3)
+
+    def test_runs_in_linear_time(self):
+        """
+        Tests that four times the content takes roughly four times as long, not sixteen.
+        """
+        # --- Arrange ---
+        dedup = NearDuplicateFilter()
+        small = build_content([], {f"d{i}.txt": prose(400, i) for i in range(20)})
+        large = build_content([], {f"d{i}.txt": prose(400, i) for i in range(80)})
+
+        def timed(content: str) -> float:
+            start = time.perf_counter()
+            dedup.dedup(content)
+            return time.perf_counter() - start
+
+        # --- Act ---
+        small_seconds = min(timed(small) for _ in range(3))
+        large_seconds = min(timed(large) for _ in range(3))
+
+        # --- Assert ---
+        self.assertLess(large_seconds, small_seconds * 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# auto-research-agent/tests/test_delivery_agent.py
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from agents.delivery_agent import DeliveryAgent
+from tests.fakes import FakeStorageClient
+
+PDF = b"%PDF-1.4 fake report"
+
+@patch('agents.delivery_agent.GCS_REPORTS_BUCKET', 'reports')
+class TestDeliveryAgent(unittest.TestCase):
+
+    def test_deliver_bytes_uploads_public_object_in_one_request(self):
+        """
+        Tests that in-memory PDFs are uploaded with the public ACL and no make_public() round trip.
+        """
+        # --- Arrange ---
+        client = FakeStorageClient()
+        agent = DeliveryAgent(storage_client=client)
+
+        # --- Act ---
+        url = agent.deliver_bytes(PDF, "report.pdf")
+
+        # --- Assert ---
+        self.assertEqual(url, "https://storage.googleapis.com/reports/report.pdf")
+        self.assertEqual(client.objects[("reports", "report.pdf")], PDF)
+        self.assertIn(("reports", "report.pdf"), client.public)
+        self.assertEqual(client.requests, ["upload"])
+
+    def test_run_uploads_local_file(self):
+        """
+        Tests that the file-based path uses the same single-request upload.
+        """
+        client = FakeStorageClient()
+        agent = DeliveryAgent(storage_client=client)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "local.pdf")
+            with open(path, "wb") as f:
+                f.write(PDF)
+            url = agent.run(path)
+        self.assertTrue(url.endswith("/reports/local.pdf"))
+        self.assertEqual(client.requests, ["upload"])
+
+    def test_uniform_access_bucket_falls_back_to_make_public(self):
+        """
+        Tests that a bucket rejecting per-object ACLs gets a plain upload plus make_public().
+        """
+        client = FakeStorageClient(uniform_access=True)
+        agent = DeliveryAgent(storage_client=client)
+
+        url = agent.deliver_bytes(PDF, "report.pdf")
+
+        # make_public is rejected too on such buckets, so delivery fails cleanly
+        self.assertIsNone(url)
+        self.assertEqual(client.requests, ["upload", "upload", "make_public"])
+
+    def test_checksum_mismatch_fails_delivery(self):
+        """
+        Tests that a stored object whose MD5 differs from the local one is not reported as delivered.
+        """
+        agent = DeliveryAgent(storage_client=FakeStorageClient(corrupt=True))
+        self.assertIsNone(agent.deliver_bytes(PDF, "report.pdf"))
+
+    def test_deliver_many_uploads_concurrently(self):
+        """
+        Tests that batch delivery overlaps uploads and keeps results in input order.
+        """
+        # --- Arrange ---
+        client = FakeStorageClient(latency=0.1)
+        agent = DeliveryAgent(storage_client=client)
+        reports = [(f"report{i}.pdf", PDF + bytes([i])) for i in range(8)]
+
+        # --- Act ---
+        start = time.perf_counter()
+        urls = agent.deliver_many(reports, max_concurrency=4)
+        elapsed = time.perf_counter() - start
+
+        # --- Assert ---
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(client.max_in_flight, 4)
+        self.assertEqual([url.rsplit("/", 1)[1] for url in urls], [name for name, _ in reports])
+
+if __name__ == '__main__':
+    unittest.main()
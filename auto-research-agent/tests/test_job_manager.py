@@ -0,0 +1,146 @@
+# auto-research-agent/tests/test_job_manager.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from orchestrator.job_manager import JobManager, JobQueueFull, SQLiteJobStore
+from orchestrator.run_context import STAGES
+
+class FakeOrchestrator:
+    """Reports every stage and returns a canned result."""
+    def __init__(self, result=None, release: threading.Event | None = None):
+        self.result = result or {"status": "success", "local_pdf_path": "/tmp/report.pdf", "insights": {"title": "T"}}
+        self.release = release
+
+    def run(self, query, gcs_paths=None, on_stage=None, options=None):
+        if self.release:
+            self.release.wait(timeout=5)
+        for stage in STAGES:
+            on_stage(stage, "running")
+            on_stage(stage, "completed")
+        return self.result
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SQLiteJobStore(os.path.join(self.tmp_dir.name, "jobs.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_job_runs_in_background_and_records_stages(self):
+        """
+        Tests that a submitted job completes and exposes per-stage status and result.
+        """
+        # --- Arrange ---
+        on_success = MagicMock()
+        manager = JobManager(self.store, lambda: FakeOrchestrator(), max_workers=2, on_success=on_success)
+
+        # --- Act ---
+        job_id = manager.submit("test query", ["gs://bucket/doc.txt"])
+        manager.wait_idle()
+        job = manager.get(job_id)
+        manager.shutdown()
+
+        # --- Assert ---
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(job["gcs_paths"], ["gs://bucket/doc.txt"])
+        self.assertEqual(set(job["stages"].values()), {"completed"})
+        self.assertEqual(job["result"]["insights"]["title"], "T")
+        on_success.assert_called_once()
+
+    def test_failed_run_is_recorded(self):
+        """
+        Tests that an orchestrator error result marks the job as failed.
+        """
+        # --- Arrange ---
+        error_result = {"status": "error", "message": "Research phase failed to gather content."}
+        manager = JobManager(self.store, lambda: FakeOrchestrator(result=error_result), max_workers=1)
+
+        # --- Act ---
+        job_id = manager.submit("test query")
+        manager.wait_idle()
+        job = manager.get(job_id)
+        manager.shutdown()
+
+        # --- Assert ---
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "Research phase failed to gather content.")
+
+    def test_submit_rejects_when_queue_full(self):
+        """
+        Tests that submissions beyond the queue capacity raise JobQueueFull.
+        """
+        # --- Arrange ---
+        release = threading.Event()
+        manager = JobManager(self.store, lambda: FakeOrchestrator(release=release), max_workers=1, max_queue_size=1)
+        manager.submit("first")  # picked up by the single worker (blocked on release)
+        # Wait until the worker has taken the first job off the queue
+        for _ in range(100):
+            if manager.queue_depth() == 0:
+                break
+            threading.Event().wait(0.01)
+        manager.submit("second")  # fills the queue
+
+        # --- Act / Assert ---
+        with self.assertRaises(JobQueueFull):
+            manager.submit("third")
+        release.set()
+        manager.wait_idle()
+        manager.shutdown()
+
+    def test_restart_only_fails_jobs_of_exited_processes(self):
+        """
+        Tests that opening the store fails jobs left by a dead process but not those of a live sibling process.
+        """
+        # --- Arrange ---
+        self.store.create("mine", "live query", None)
+        dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True, check=True)
+        self.store.create("orphan", "dead query", None)
+        with self.store._conn:
+            self.store._conn.execute("UPDATE jobs SET owner_pid = ? WHERE id = 'orphan'", (int(dead.stdout),))
+
+        # --- Act ---
+        sibling = SQLiteJobStore(self.store.db_path)
+        sibling.close()
+
+        # --- Assert ---
+        self.assertEqual(self.store.get("mine")["status"], "queued")
+        self.assertEqual(self.store.get("orphan")["status"], "failed")
+        self.assertEqual(self.store.get("orphan")["error"], "Interrupted by server restart")
+
+    def test_shutdown_with_full_queue_does_not_hang(self):
+        """
+        Tests that shutdown returns while the queue is full and the workers still finish the queued jobs.
+        """
+        # --- Arrange ---
+        release = threading.Event()
+        manager = JobManager(self.store, lambda: FakeOrchestrator(release=release), max_workers=1, max_queue_size=1)
+        first = manager.submit("first")
+        for _ in range(100):
+            if manager.queue_depth() == 0:
+                break
+            threading.Event().wait(0.01)
+        second = manager.submit("second")
+        stopper = threading.Thread(target=manager.shutdown)
+
+        # --- Act ---
+        stopper.start()
+        threading.Event().wait(0.1)
+        release.set()
+        stopper.join(timeout=10)
+
+        # --- Assert ---
+        self.assertFalse(stopper.is_alive())
+        self.assertEqual(self.store.get(first)["status"], "succeeded")
+        self.assertEqual(self.store.get(second)["status"], "succeeded")
+
+if __name__ == '__main__':
+    unittest.main()
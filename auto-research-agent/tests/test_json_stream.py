@@ -0,0 +1,71 @@
+# auto-research-agent/tests/test_json_stream.py
+
+import json
+import unittest
+from utils.json_stream import IncrementalJSONParser
+
+REPORT = {
+    "title": "Solid-State Batteries",
+    "executive_summary": "Quotes \"inside\", braces { } and [brackets] in text.",
+    "key_insights": [
+        {"insight": "Energy density up 40%", "details": "Per [1], see {notes}."},
+        {"insight": "Costs falling", "details": "Line one\nline two."},
+    ],
+    "source_analysis": {"sentiment": "Positive", "confidence": 0.8},
+    "tags": ["batteries", 3, True, None],
+    "score": 7,
+    "conclusion": "Promising.",
+}
+
+def feed_in_pieces(text: str, size: int) -> tuple[IncrementalJSONParser, list]:
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+class TestIncrementalJSONParser(unittest.TestCase):
+
+    def test_reassembles_object_for_any_chunking(self):
+        """
+        Tests that every field is reported once and the result matches json.loads, however the text is split.
+        """
+        for text in (json.dumps(REPORT), "```json\n" + json.dumps(REPORT, indent=2) + "\n```"):
+            for size in (1, 3, 17, len(text)):
+                parser, events = feed_in_pieces(text, size)
+                self.assertTrue(parser.done)
+                self.assertEqual(parser.result, REPORT)
+                fields = [e[1] for e in events if e[0] == "field"]
+                self.assertEqual(fields, list(REPORT))
+
+    def test_array_items_reported_before_array_closes(self):
+        """
+        Tests that each key_insights entry is emitted as soon as it is complete.
+        """
+        # --- Arrange ---
+        text = json.dumps(REPORT)
+        cut = text.index('{"insight": "Costs falling"')
+
+        # --- Act ---
+        parser = IncrementalJSONParser()
+        early = parser.feed(text[:cut])
+        late = parser.feed(text[cut:])
+
+        # --- Assert ---
+        self.assertIn(("item", "key_insights", 0, REPORT["key_insights"][0]), early)
+        self.assertNotIn("key_insights", [e[1] for e in early if e[0] == "field"])
+        self.assertIn(("item", "key_insights", 1, REPORT["key_insights"][1]), late)
+        items = [e[3] for e in early + late if e[0] == "item" and e[1] == "tags"]
+        self.assertEqual(items, REPORT["tags"])
+
+    def test_incomplete_input_is_not_done(self):
+        """
+        Tests that a truncated stream reports only the fields that finished.
+        """
+        parser = IncrementalJSONParser()
+        events = parser.feed('{"title": "T", "executive_summary": "cut off')
+        self.assertEqual(events, [("field", "title", "T")])
+        self.assertFalse(parser.done)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# auto-research-agent/tests/test_lazy.py
+
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+from utils import lazy
+from utils.lazy import IMPORT_SECONDS, lazy_import, preload_all
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestLazyModule(unittest.TestCase):
+
+    def setUp(self):
+        # A stdlib module nothing else in the suite imports
+        sys.modules.pop("colorsys", None)
+        IMPORT_SECONDS.pop("colorsys", None)
+        self.module = lazy_import("colorsys")
+        self.addCleanup(lazy._lazy_modules.remove, self.module)
+
+    def test_imports_on_first_attribute_access(self):
+        """
+        Tests that the module is imported only when an attribute is used and its import time is recorded.
+        """
+        # --- Act ---
+        before = "colorsys" in sys.modules
+        rgb = self.module.hsv_to_rgb(0, 0, 1)
+
+        # --- Assert ---
+        self.assertFalse(before)
+        self.assertTrue(self.module.loaded)
+        self.assertEqual(rgb, (1, 1, 1))
+        self.assertIn("colorsys", IMPORT_SECONDS)
+
+    def test_patching_attributes_reaches_the_real_module(self):
+        """
+        Tests that mock.patch through the proxy replaces the attribute on the module itself.
+        """
+        # --- Act ---
+        with patch.object(self.module, "hsv_to_rgb", return_value="patched"):
+            patched = sys.modules["colorsys"].hsv_to_rgb(0, 0, 1)
+
+        # --- Assert ---
+        self.assertEqual(patched, "patched")
+        self.assertEqual(self.module.hsv_to_rgb(0, 0, 1), (1, 1, 1))
+
+    def test_preload_all_loads_pending_modules(self):
+        """
+        Tests that the warm-up preload imports lazy modules nobody has used yet.
+        """
+        # --- Act ---
+        timings = preload_all()
+
+        # --- Assert ---
+        self.assertTrue(self.module.loaded)
+        self.assertIn("colorsys", timings)
+
+    def test_importing_main_skips_heavy_dependencies(self):
+        """
+        Tests that importing the app without the boot warm-up loads neither the Gemini SDK nor ReportLab.
+        """
+        # --- Arrange ---
+        env = dict(os.environ, AGENT_POOL_WARM_UP="false", GEMINI_API_KEY="x", SERPER_API_KEY="y")
+        script = "import sys, main; print(sorted(m for m in ('google.generativeai', 'reportlab') if m in sys.modules))"
+
+        # --- Act ---
+        out = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, env=env,
+                             capture_output=True, text=True, timeout=120)
+
+        # --- Assert ---
+        self.assertEqual(out.returncode, 0, out.stderr)
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "[]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# auto-research-agent/tests/test_metrics.py
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from orchestrator.run_context import RunContext
+from orchestrator.stage_graph import Stage, StageGraph
+from utils.metrics import (
+    CALL_BYTES,
+    CALL_ERRORS,
+    CALL_SECONDS,
+    CALLS_IN_FLIGHT,
+    GEMINI_TOKENS,
+    STAGE_FAILURES,
+    STAGE_SECONDS,
+    MetricsRegistry,
+    record_gemini_usage,
+    track_call,
+)
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_render_prometheus_text(self):
+        """
+        Tests the exposition format for counters, gauges and cumulative histogram buckets.
+        """
+        # --- Arrange ---
+        registry = MetricsRegistry()
+        requests = registry.counter("app_requests_total", "Requests.", ("path",))
+        in_flight = registry.gauge("app_in_flight", "In flight.")
+        latency = registry.histogram("app_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+        # --- Act ---
+        requests.labels('/view?q="x"').inc()
+        requests.labels('/view?q="x"').inc(2)
+        in_flight.labels().inc()
+        for value in (0.05, 0.5, 0.7, 3.0):
+            latency.labels().observe(value)
+        text = registry.render()
+
+        # --- Assert ---
+        self.assertIn("# TYPE app_requests_total counter", text)
+        self.assertIn('app_requests_total{path="/view?q=\\"x\\""} 3', text)
+        self.assertIn("app_in_flight 1", text)
+        self.assertIn('app_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('app_latency_seconds_bucket{le="1"} 3', text)
+        self.assertIn('app_latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("app_latency_seconds_sum 4.25", text)
+        self.assertIn("app_latency_seconds_count 4", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_labels_and_names_validated(self):
+        """
+        Tests that wrong label counts and duplicate names are rejected.
+        """
+        registry = MetricsRegistry()
+        counter = registry.counter("dup_total", "Dup.", ("a",))
+        with self.assertRaises(ValueError):
+            counter.labels("x", "y")
+        with self.assertRaises(ValueError):
+            registry.counter("dup_total", "Dup.")
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_track_call_records_latency_bytes_and_errors(self):
+        """
+        Tests that a tracked call updates latency, bytes and in-flight, and counts raised or flagged errors.
+        """
+        # --- Arrange ---
+        before_count = CALL_SECONDS.labels("test", "op").counts[:]
+        before_errors = CALL_ERRORS.labels("test", "op").value
+
+        # --- Act ---
+        with track_call("test", "op") as call:
+            self.assertEqual(CALLS_IN_FLIGHT.labels("test").value, 1)
+            call.add_bytes(sent=10, received=25)
+        with track_call("test", "op") as call:
+            call.error()
+        with self.assertRaises(RuntimeError):
+            with track_call("test", "op"):
+                raise RuntimeError("boom")
+
+        # --- Assert ---
+        self.assertEqual(sum(CALL_SECONDS.labels("test", "op").counts) - sum(before_count), 3)
+        self.assertEqual(CALL_ERRORS.labels("test", "op").value - before_errors, 2)
+        self.assertEqual(CALLS_IN_FLIGHT.labels("test").value, 0)
+        self.assertEqual(CALL_BYTES.labels("test", "received").value, 25)
+
+    def test_gemini_usage_recorded(self):
+        """
+        Tests that token counts are read from usage_metadata and missing metadata is ignored.
+        """
+        before = GEMINI_TOKENS.labels("prompt").value
+        record_gemini_usage(SimpleNamespace(usage_metadata=SimpleNamespace(
+            prompt_token_count=120, candidates_token_count=30)))
+        record_gemini_usage(SimpleNamespace(text="no usage"))
+        self.assertEqual(GEMINI_TOKENS.labels("prompt").value - before, 120)
+
+    def test_stage_graph_records_stage_metrics(self):
+        """
+        Tests that each stage run is timed and failures are counted by reason.
+        """
+        # --- Arrange ---
+        graph = StageGraph([
+            Stage("metrics_ok", lambda ctx: True),
+            Stage("metrics_bad", lambda ctx: False, policy="optional"),
+        ])
+        before = sum(STAGE_SECONDS.labels("metrics_ok").counts)
+
+        # --- Act ---
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            graph.run(RunContext(query="q"), executor)
+
+        # --- Assert ---
+        self.assertEqual(sum(STAGE_SECONDS.labels("metrics_ok").counts) - before, 1)
+        self.assertEqual(STAGE_FAILURES.labels("metrics_bad", "failed").value, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# auto-research-agent/tests/test_pdf_generator.py
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from utils.pdf_generator import ReportRenderer, generate_pdf_from_template, get_report_renderer
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+TEMPLATE_NAME = "report_template.html"
+
+REPORT = {
+    "title": "Test Report",
+    "executive_summary": "Summary.",
+    "key_insights": [{"insight": "One", "explanation": "Because.", "relevance_score": 7}],
+    "source_analysis": {"sentiment": "Neutral", "confidence": "Medium"},
+    "conclusion": "Done.",
+}
+
+class TestReportRenderer(unittest.TestCase):
+
+    def test_renderer_is_shared_per_template(self):
+        """
+        Tests that the process-wide renderer is built once per template.
+        """
+        self.assertIs(get_report_renderer(TEMPLATE_DIR, TEMPLATE_NAME),
+                      get_report_renderer(TEMPLATE_DIR + os.sep, TEMPLATE_NAME))
+
+    def test_render_to_bytes_and_file(self):
+        """
+        Tests that a report renders to memory and to disk.
+        """
+        renderer = ReportRenderer(TEMPLATE_DIR, TEMPLATE_NAME)
+        pdf = renderer.render_to_bytes(REPORT)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "nested", "report.pdf")
+            renderer.render_to_file(REPORT, path)
+            with open(path, "rb") as f:
+                self.assertTrue(f.read().startswith(b"%PDF"))
+
+    def test_pdf_render_skips_html_template(self):
+        """
+        Tests that producing a PDF never compiles or renders the HTML template.
+        """
+        renderer = ReportRenderer(TEMPLATE_DIR, TEMPLATE_NAME)
+        with patch.object(renderer.template_env, "get_template") as get_template:
+            renderer.render_to_bytes(REPORT)
+        get_template.assert_not_called()
+        self.assertIn("Test Report", renderer.render_html(REPORT))
+
+    def test_generate_pdf_from_template(self):
+        """
+        Tests the module-level helper, including a missing template.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.pdf")
+            self.assertTrue(generate_pdf_from_template(REPORT, TEMPLATE_NAME, TEMPLATE_DIR, path))
+            self.assertTrue(os.path.exists(path))
+            self.assertFalse(generate_pdf_from_template(REPORT, "missing.html", TEMPLATE_DIR, path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# auto-research-agent/tests/test_profiling.py
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from orchestrator.run_context import RunContext
+from orchestrator.stage_graph import GraphOutcome, Stage, StageGraph
+from utils.profiling import ProfileSession, list_profiles, load_profile
+
+PAYLOAD = json.dumps({"items": [{"n": i, "text": "x" * 50} for i in range(2000)]})
+
+def parse_json(ctx):
+    for _ in range(5):
+        json.loads(PAYLOAD)
+    return True
+
+class TestProfileSession(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.executor.shutdown)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def run_profiled(self, run_id: str) -> tuple[ProfileSession, object]:
+        ctx = RunContext(query="q", run_id=run_id)
+        ctx.profiler = ProfileSession(ctx.run_id, ctx.query)
+        graph = StageGraph([
+            Stage("parse", parse_json),
+            Stage("wait", lambda ctx: time.sleep(0.05), deps=("parse",)),
+        ])
+        return ctx.profiler, graph.run(ctx, self.executor)
+
+    def test_profile_merges_stages_and_categorizes_time(self):
+        """
+        Tests that stages profiled on worker threads are merged, with wall times and a per-category breakdown.
+        """
+        # --- Arrange ---
+        session, outcome = self.run_profiled("a" * 32)
+
+        # --- Act ---
+        summary = session.summary(outcome)
+
+        # --- Assert ---
+        self.assertEqual(set(summary["stages"]), {"parse", "wait"})
+        self.assertGreaterEqual(summary["stages"]["wait"]["wall_seconds"], 0.05)
+        self.assertGreater(summary["stages"]["wait"]["start_offset_seconds"], 0)
+        self.assertGreater(summary["breakdown_seconds"]["json"], 0)
+        self.assertGreater(summary["breakdown_seconds"]["waiting"], 0.04)
+        self.assertTrue(any("parse_json" in f["function"] for f in summary["top_functions"]))
+
+    def test_stage_runs_unprofiled_when_profiler_is_busy(self):
+        """
+        Tests that a stage still runs, unprofiled, when cProfile refuses to start (another profiler active on 3.12+).
+        """
+        # --- Arrange ---
+        session = ProfileSession("d" * 32, "q")
+        calls = []
+
+        # --- Act ---
+        with patch("utils.profiling.cProfile.Profile.enable",
+                   side_effect=ValueError("Another profiling tool is already active")):
+            result = session.run_stage("parse", lambda ctx: calls.append(ctx) or True, "ctx")
+
+        # --- Assert ---
+        self.assertTrue(result)
+        self.assertEqual(calls, ["ctx"])
+        summary = session.summary(GraphOutcome(status={"parse": "completed"}))
+        self.assertEqual(summary["unprofiled_stages"], ["parse"])
+        self.assertIsNone(summary["stages"]["parse"]["profiled_seconds"])
+
+    def test_save_list_load_and_prune(self):
+        """
+        Tests that profiles are saved as pstats plus JSON, listed newest first and pruned to the limit.
+        """
+        # --- Arrange ---
+        ids = [c * 32 for c in "abc"]
+
+        # --- Act ---
+        for profile_id in ids:
+            session, outcome = self.run_profiled(profile_id)
+            session.save(outcome, self.tmp.name, max_profiles=2)
+            time.sleep(0.01)
+
+        # --- Assert ---
+        self.assertEqual([p["profile_id"] for p in list_profiles(self.tmp.name)], ["c" * 32, "b" * 32])
+        self.assertIsNone(load_profile(self.tmp.name, "a" * 32))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "a" * 32 + ".prof")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "c" * 32 + ".prof")))
+        self.assertEqual(load_profile(self.tmp.name, "c" * 32)["query"], "q")
+        self.assertIsNone(load_profile(self.tmp.name, "../../etc/passwd"))
+
+if __name__ == '__main__':
+    unittest.main()
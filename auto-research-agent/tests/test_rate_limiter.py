@@ -0,0 +1,198 @@
+# auto-research-agent/tests/test_rate_limiter.py
+
+import json
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from agents.analysis_agent import AnalysisAgent
+from utils.rate_limiter import (
+    ProviderLimiter,
+    RateLimitQueueFull,
+    RateLimitTimeout,
+    TokenBucket,
+    is_rate_limit_error,
+)
+
+class ResourceExhausted(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted (HTTP 429)."""
+    code = 429
+
+class ThrottlingModel:
+    """Gemini stub that answers the first `throttled` calls with 429."""
+    def __init__(self, throttled: int):
+        self.throttled = throttled
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.calls <= self.throttled:
+            raise ResourceExhausted("429 Resource has been exhausted")
+        return SimpleNamespace(
+            text=json.dumps({"title": "Report"}),
+            usage_metadata=SimpleNamespace(prompt_token_count=1000, candidates_token_count=200),
+        )
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refills_at_per_minute_rate(self):
+        """
+        Tests that an empty bucket reports the wait until it refills and caps large amounts at capacity.
+        """
+        # --- Arrange ---
+        bucket = TokenBucket(60, capacity=2, now=0.0)
+
+        # --- Act ---
+        bucket.take(1, 0.0)
+        bucket.take(1, 0.0)
+
+        # --- Assert ---
+        self.assertAlmostEqual(bucket.wait_time(1, 0.0), 1.0)
+        self.assertAlmostEqual(bucket.wait_time(1, 0.5), 0.5)
+        self.assertAlmostEqual(bucket.wait_time(100, 2.0), 0.0)
+        self.assertEqual(TokenBucket(0).wait_time(10**9, 0.0), 0.0)
+
+    def test_adjust_corrects_estimates(self):
+        """
+        Tests that reporting more tokens than estimated pushes the bucket into debt.
+        """
+        # --- Arrange ---
+        bucket = TokenBucket(600, now=0.0)
+        bucket.take(100, 0.0)
+
+        # --- Act ---
+        bucket.adjust(900)
+
+        # --- Assert ---
+        self.assertEqual(bucket.level, -400)
+        self.assertAlmostEqual(bucket.wait_time(10, 0.0), 41.0)
+
+class TestProviderLimiter(unittest.TestCase):
+
+    def test_queued_caller_gets_released_slot(self):
+        """
+        Tests that a caller over the concurrency limit waits and proceeds once a slot is released.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("test", max_concurrency=1, max_wait=2)
+        held = limiter.acquire()
+        acquired = []
+
+        # --- Act ---
+        waiter = threading.Thread(target=lambda: acquired.append(limiter.acquire()))
+        waiter.start()
+        time.sleep(0.1)
+        waiting = limiter.stats()["waiting"]
+        held.release()
+        waiter.join(2)
+
+        # --- Assert ---
+        self.assertEqual(waiting, 1)
+        self.assertEqual(len(acquired), 1)
+        self.assertEqual(limiter.stats()["in_flight"], 1)
+
+    def test_deadline_and_full_queue(self):
+        """
+        Tests that waiting callers time out at their deadline and callers beyond the queue are refused at once.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("test", max_concurrency=1, max_queue=1, max_wait=0.2)
+        limiter.acquire()
+        errors = []
+        waiter = threading.Thread(target=lambda: self.assertRaises(RateLimitTimeout, limiter.acquire) or errors.append(1))
+
+        # --- Act ---
+        waiter.start()
+        time.sleep(0.05)
+        start = time.perf_counter()
+        with self.assertRaises(RateLimitQueueFull) as raised:
+            limiter.acquire()
+        refused_after = time.perf_counter() - start
+        waiter.join(1)
+
+        # --- Assert ---
+        self.assertLess(refused_after, 0.05)
+        self.assertGreater(raised.exception.retry_after, 0)
+        self.assertEqual(errors, [1])
+        stats = limiter.stats()
+        self.assertEqual((stats["rejected"], stats["timed_out"], stats["waiting"]), (1, 1, 0))
+
+    def test_quota_beyond_deadline_fails_fast(self):
+        """
+        Tests that a caller is refused immediately when the requests/min bucket refills after its deadline.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("test", requests_per_minute=1, max_wait=5)
+        limiter.acquire().release()
+
+        # --- Act ---
+        start = time.perf_counter()
+        with self.assertRaises(RateLimitTimeout) as raised:
+            limiter.acquire()
+
+        # --- Assert ---
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(raised.exception.retry_after, 5)
+
+    def test_concurrency_adapts_to_throttling(self):
+        """
+        Tests that a burst of 429s halves the limit once, a Retry-After pauses callers and successes grow it back.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("test", max_concurrency=8, max_wait=2)
+        permits = [limiter.acquire() for _ in range(3)]
+
+        # --- Act ---
+        for permit in permits:
+            permit.throttled(retry_after=0.2)
+            permit.release()
+        after_burst = limiter.stats()["concurrency_limit"]
+        start = time.perf_counter()
+        with limiter.acquire():
+            paused = time.perf_counter() - start
+        # Additive increase: about one more slot per round of `limit` successful calls (4+5+6+7)
+        for _ in range(22):
+            limiter.acquire().release()
+
+        # --- Assert ---
+        self.assertEqual(after_burst, 4)
+        self.assertGreaterEqual(paused, 0.15)
+        self.assertEqual(limiter.stats()["concurrency_limit"], 8)
+        self.assertEqual(limiter.stats()["throttled"], 3)
+
+    def test_analysis_agent_retries_gemini_429s(self):
+        """
+        Tests that Gemini 429s are retried through the limiter and reported token usage replaces the estimate.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("gemini-test", tokens_per_minute=10_000, max_wait=5)
+        model = ThrottlingModel(throttled=1)
+        agent = AnalysisAgent(model=model, limiter=limiter)
+        agent.cache = None
+
+        # --- Act ---
+        insights = agent.run("Web Search Results:\nshort", mode="single")
+
+        # --- Assert ---
+        self.assertEqual(insights, {"title": "Report"})
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(limiter.stats()["throttled"], 1)
+        self.assertTrue(is_rate_limit_error(ResourceExhausted()))
+        # 10k bucket minus the two attempts' usage (~1200 reported for the successful one)
+        self.assertLess(limiter.tokens.level, 10_000 - 1200 + 1)
+
+    def test_analysis_agent_raises_when_quota_stays_exhausted(self):
+        """
+        Tests that RateLimitError propagates (instead of an error report) once the limiter's deadline passes.
+        """
+        # --- Arrange ---
+        limiter = ProviderLimiter("gemini-test", max_wait=0.5)
+        agent = AnalysisAgent(model=ThrottlingModel(throttled=100), limiter=limiter)
+        agent.cache = None
+
+        # --- Act / Assert ---
+        with self.assertRaises(RateLimitTimeout):
+            agent.run("Web Search Results:\nshort", mode="single")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# auto-research-agent/tests/test_refresh.py
+
+import unittest
+from agents.research_agent import DocumentResult
+from orchestrator.refresh import build_changed_content, diff_sources, hash_sources, refresh_key, split_sources
+
+WEB = "Title: Alpha\nSnippet: first\n---\nTitle: Beta\nSnippet: second\n---"
+
+class TestRefresh(unittest.TestCase):
+
+    def test_sources_split_and_hashed(self):
+        """
+        Tests that web results and readable documents become separate sources, and whitespace does not change hashes.
+        """
+        # --- Arrange ---
+        documents = [
+            DocumentResult(path="gs://b/doc.txt", content="Doc text."),
+            DocumentResult(path="gs://b/missing.txt", error="Not found"),
+        ]
+
+        # --- Act ---
+        sources = split_sources(WEB, documents)
+        reformatted = split_sources(WEB.replace("first", "first  "), documents)
+
+        # --- Assert ---
+        self.assertEqual(list(sources), ["web:Title: Alpha", "web:Title: Beta", "doc:gs://b/doc.txt"])
+        self.assertEqual(hash_sources(sources), hash_sources(reformatted))
+
+    def test_diff_classifies_sources(self):
+        """
+        Tests that sources are reported as added, changed, removed or unchanged, and removals alone are no change.
+        """
+        # --- Arrange ---
+        previous = {"web:a": "1", "web:b": "2", "web:c": "3"}
+
+        # --- Act ---
+        diff = diff_sources(previous, {"web:a": "1", "web:b": "9", "web:d": "4"})
+        removed_only = diff_sources(previous, {"web:a": "1"})
+
+        # --- Assert ---
+        self.assertEqual((diff.added, diff.changed, diff.removed, diff.unchanged),
+                         (["web:d"], ["web:b"], ["web:c"], ["web:a"]))
+        self.assertTrue(diff.has_changes)
+        self.assertFalse(removed_only.has_changes)
+
+    def test_changed_content_and_key(self):
+        """
+        Tests that only the selected sources are laid out for analysis, and "refresh" does not change the key.
+        """
+        # --- Arrange ---
+        sources = split_sources(WEB, [DocumentResult(path="gs://b/dir/doc.txt", content="Doc text.")])
+
+        # --- Act ---
+        content = build_changed_content("q", sources, ["web:Title: Beta", "doc:gs://b/dir/doc.txt"])
+
+        # --- Assert ---
+        self.assertIn("Title: Beta\nSnippet: second\n---", content)
+        self.assertNotIn("Alpha", content)
+        self.assertIn("Source Document: doc.txt\nDoc text.", content)
+        self.assertEqual(refresh_key("Q", None, {"refresh": True, "fan_out": 2}), refresh_key("q", None, {"fan_out": 2}))
+
+if __name__ == '__main__':
+    unittest.main()
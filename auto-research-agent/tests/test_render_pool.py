@@ -0,0 +1,113 @@
+# auto-research-agent/tests/test_render_pool.py
+
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from agents.reporting_agent import ReportingAgent
+from utils.render_pool import RenderError, RenderPool, RenderTimeout
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+REPORT = {"title": "Pooled Report", "executive_summary": "Summary.", "conclusion": "Done."}
+
+def append_and_sleep(path: str, seconds: float) -> str:
+    """Runs in a worker: records that it ran, then takes a while."""
+    with open(path, "a") as f:
+        f.write("x")
+    time.sleep(seconds)
+    return "done"
+
+class TestRenderPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = RenderPool(TEMPLATE_DIR, "report_template.html", max_workers=2, timeout=30)
+        cls.pool.warm_up()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_render_bytes_and_path(self):
+        """
+        Tests that workers return PDF bytes, or write the PDF to a given path.
+        """
+        self.assertTrue(self.pool.render(REPORT).startswith(b"%PDF"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.pdf")
+            self.assertEqual(self.pool.render(REPORT, path), path)
+            self.assertGreater(os.path.getsize(path), 0)
+
+    def test_timeout_and_crash_are_isolated(self):
+        """
+        Tests that a hung or crashing job fails on its own and the pool keeps working.
+        """
+        # --- Arrange ---
+        restarts = self.pool.restarts
+
+        # --- Act / Assert ---
+        start = time.perf_counter()
+        with self.assertRaises(RenderTimeout):
+            self.pool.call(time.sleep, 10, timeout=0.5)
+        self.assertLess(time.perf_counter() - start, 5)
+
+        with self.assertRaises(RenderError):
+            self.pool.call(os._exit, 1)
+
+        self.assertGreaterEqual(self.pool.restarts, restarts + 2)
+        self.assertTrue(self.pool.render(REPORT).startswith(b"%PDF"))
+
+    def test_timeout_lets_other_jobs_finish(self):
+        """
+        Tests that a timed-out job does not kill a job running next to it on another worker.
+        """
+        # --- Arrange ---
+        pool = RenderPool(TEMPLATE_DIR, "report_template.html", max_workers=2, timeout=30)
+        self.addCleanup(pool.close)
+        pool.warm_up()
+
+        with tempfile.TemporaryDirectory() as tmp, ThreadPoolExecutor(max_workers=1) as threads:
+            runs = os.path.join(tmp, "runs")
+            neighbour = threads.submit(pool.call, append_and_sleep, runs, 1.5, timeout=10)
+            time.sleep(0.2)
+
+            # --- Act ---
+            with self.assertRaises(RenderTimeout):
+                pool.call(time.sleep, 10, timeout=0.5)
+            result = neighbour.result(timeout=10)
+
+            # --- Assert ---
+            with open(runs) as f:
+                self.assertEqual(f.read(), "x")  # finished on the old pool, not retried
+        self.assertEqual(result, "done")
+        self.assertEqual(pool.restarts, 1)
+        self.assertTrue(pool.render(REPORT).startswith(b"%PDF"))
+
+    def test_render_errors_are_wrapped(self):
+        """
+        Tests that an exception inside the worker surfaces as a RenderError.
+        """
+        with self.assertRaises(RenderError):
+            self.pool.render({"title": "<b>unclosed"})
+
+class TestReportingAgentWithPool(unittest.TestCase):
+
+    def test_run_uses_render_pool(self):
+        """
+        Tests that ReportingAgent hands rendering to the pool and maps failures to None.
+        """
+        pool = MagicMock()
+        agent = ReportingAgent(render_pool=pool)
+
+        path = agent.run(REPORT, "pooled query")
+
+        pool.render.assert_called_once_with(REPORT, path)
+        self.assertTrue(path.endswith(".pdf"))
+
+        pool.render.side_effect = RenderError("Render worker process crashed")
+        self.assertIsNone(agent.run(REPORT, "pooled query"))
+
+if __name__ == '__main__':
+    unittest.main()
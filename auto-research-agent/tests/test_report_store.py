@@ -0,0 +1,122 @@
+# auto-research-agent/tests/test_report_store.py
+
+import os
+import tempfile
+import time
+import unittest
+from utils.report_store import SQLiteReportStore
+
+INSIGHTS = {"title": "Solar Trends", "executive_summary": "Summary.", "key_insights": ["a", "b"]}
+
+class TestSQLiteReportStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = self.make_store()
+
+    def make_store(self, **kwargs) -> SQLiteReportStore:
+        store = SQLiteReportStore(os.path.join(self.tmp.name, "reports.db"), **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_save_and_lookup(self):
+        """
+        Tests that a saved report can be found by id and by filename, with view data and PDF kept apart.
+        """
+        # --- Arrange ---
+        report_id = self.store.save("solar trends", "report_solar.pdf", INSIGHTS, b"%PDF-1.4 solar")
+
+        # --- Act ---
+        by_id = self.store.get(report_id)
+        by_name = self.store.find_by_filename("report_solar.pdf")
+
+        # --- Assert ---
+        self.assertEqual(by_id["view"]["title"], "Solar Trends")
+        self.assertEqual(by_id["view"]["pdf_filename"], "report_solar.pdf")
+        self.assertEqual(by_id["view"]["source_analysis"], {"sentiment": "N/A", "confidence": "N/A"})
+        self.assertTrue(by_id["has_pdf"])
+        self.assertNotIn("pdf", by_id)
+        self.assertEqual(by_name["id"], report_id)
+        self.assertEqual(self.store.get_pdf(report_id), b"%PDF-1.4 solar")
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_reports_survive_reopen(self):
+        """
+        Tests that reports are read back from disk after the in-process caches are gone.
+        """
+        report_id = self.store.save("q", "r.pdf", INSIGHTS, b"%PDF")
+        self.store.set_report_url(report_id, "https://example/r.pdf")
+
+        reopened = self.make_store()
+
+        self.assertEqual(reopened.get(report_id)["report_url"], "https://example/r.pdf")
+        self.assertEqual(reopened.get_pdf(report_id), b"%PDF")
+        self.assertEqual(reopened.stats()["pdf_cache"]["entries"], 1)
+
+    def test_list_reports_paginates_newest_first(self):
+        """
+        Tests pagination order, totals and the query filter (with LIKE wildcards taken literally).
+        """
+        # --- Arrange ---
+        for i in range(5):
+            self.store.save(f"topic {i}", f"r{i}.pdf", {"title": f"T{i}"})
+            time.sleep(0.01)
+        self.store.save("100% renewables", "pct.pdf", INSIGHTS)
+
+        # --- Act ---
+        first = self.store.list_reports(limit=2)
+        second = self.store.list_reports(limit=2, offset=2, query="topic")
+        percent = self.store.list_reports(query="%")
+
+        # --- Assert ---
+        self.assertEqual(first["total"], 6)
+        self.assertEqual([r["filename"] for r in first["reports"]], ["pct.pdf", "r4.pdf"])
+        self.assertEqual(second["total"], 5)
+        self.assertEqual([r["title"] for r in second["reports"]], ["T2", "T1"])
+        self.assertEqual([r["filename"] for r in percent["reports"]], ["pct.pdf"])
+
+    def test_prune_by_age_and_size(self):
+        """
+        Tests that expired reports are dropped, then the oldest ones until the PDFs fit the byte limit.
+        """
+        # --- Arrange ---
+        store = self.make_store(max_age_seconds=60, max_total_bytes=250)
+        old = store.save("old", "old.pdf", INSIGHTS, b"x" * 100)
+        middle = store.save("middle", "middle.pdf", INSIGHTS, b"x" * 100)
+        newest = store.save("newest", "newest.pdf", INSIGHTS, b"x" * 100)
+
+        # --- Act ---
+        # Saving the third report already pushed the total over 250 bytes
+        evicted_old = store.get(old) is None and store.get_pdf(old) is None
+        kept_middle = store.get(middle) is not None
+        expired = store.prune(now=time.time() + 3600)
+
+        # --- Assert ---
+        self.assertTrue(evicted_old)
+        self.assertTrue(kept_middle)
+        self.assertEqual(expired, 2)
+        self.assertIsNone(store.get(newest))
+        self.assertEqual(store.stats()["reports"], 0)
+
+    def test_source_hashes_follow_latest_report(self):
+        """
+        Tests that source hashes are replaced per request and removed along with their report.
+        """
+        # --- Arrange ---
+        first = self.store.save("solar trends", "report_solar_1.pdf", INSIGHTS, b"%PDF-1.4 one")
+        second = self.store.save("solar trends", "report_solar_2.pdf", INSIGHTS, b"%PDF-1.4 two")
+        self.store.set_source_hashes("key", first, {"web:Title: a": "111"})
+
+        # --- Act ---
+        self.store.set_source_hashes("key", second, {"web:Title: a": "222"})
+        latest = self.store.get_source_hashes("key")
+        self.store.delete(second)
+
+        # --- Assert ---
+        self.assertEqual((latest["report_id"], latest["sources"]), (second, {"web:Title: a": "222"}))
+        self.assertIsNone(self.store.get_source_hashes("key"))
+        self.assertIsNone(self.store.get_source_hashes("other"))
+
+if __name__ == '__main__':
+    unittest.main()
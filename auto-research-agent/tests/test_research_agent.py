@@ -1,5 +1,6 @@
 # auto-research-agent/tests/test_research_agent.py
 
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from agents.research_agent import ResearchAgent
@@ -7,8 +8,7 @@ from agents.research_agent import ResearchAgent
 class TestResearchAgent(unittest.TestCase):
 
     @patch('agents.research_agent.WebSearchClient')
-    @patch('agents.research_agent.storage.Client')
-    def test_run_with_web_and_gcs(self, mock_storage_client, mock_search_client):
+    def test_run_with_web_and_gcs(self, mock_search_client):
         """
         Tests that the agent calls both web search and GCS reading methods.
         """
@@ -22,10 +22,10 @@ class TestResearchAgent(unittest.TestCase):
         mock_blob.download_as_text.return_value = "GCS document content."
         mock_bucket = MagicMock()
         mock_bucket.blob.return_value = mock_blob
-        mock_storage_instance = mock_storage_client.return_value
+        mock_storage_instance = MagicMock()
         mock_storage_instance.bucket.return_value = mock_bucket
 
-        agent = ResearchAgent()
+        agent = ResearchAgent(storage_client=mock_storage_instance)
         query = "test query"
         gcs_paths = ["gs://fake-bucket/doc.txt"]
 
@@ -37,7 +37,8 @@ class TestResearchAgent(unittest.TestCase):
         mock_search_instance.search.assert_called_once_with(query)
 
         # Verify that the GCS client was used correctly
-        mock_storage_instance.bucket.assert_called_once_with('your_source_bucket_name') # Replace with actual bucket name from config
+        # Full gs:// URIs are read from the bucket they name
+        mock_storage_instance.bucket.assert_called_once_with('fake-bucket')
         mock_bucket.blob.assert_called_once_with('doc.txt')
         mock_blob.download_as_text.assert_called_once()
 
@@ -45,5 +46,169 @@ class TestResearchAgent(unittest.TestCase):
         self.assertIn("Web search result.", result)
         self.assertIn("GCS document content.", result)
 
+class TestResearchAgentDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.search_client = MagicMock()
+        self.search_client.search.return_value = "Web search result."
+        self.storage_client = MagicMock()
+        self.agent = ResearchAgent(search_client=self.search_client, storage_client=self.storage_client)
+
+    def _blob_factory(self, delays: dict, failures: set):
+        def make_blob(name):
+            blob = MagicMock()
+            def download_as_text(timeout=None):
+                time.sleep(delays.get(name, 0))
+                if name in failures:
+                    raise RuntimeError(f"404 {name} not found")
+                return f"content of {name}"
+            blob.download_as_text.side_effect = download_as_text
+            return blob
+        return make_blob
+
+    def test_documents_download_in_parallel_and_keep_order(self):
+        """
+        Tests that documents are read concurrently but consolidated in the caller's order.
+        """
+        # --- Arrange ---
+        names = [f"doc{i}.txt" for i in range(6)]
+        delays = {name: 0.2 - i * 0.03 for i, name in enumerate(names)}  # later docs finish first
+        bucket = MagicMock()
+        bucket.blob.side_effect = self._blob_factory(delays, set())
+        self.storage_client.bucket.return_value = bucket
+
+        # --- Act ---
+        start = time.perf_counter()
+        result = self.agent.gather("q", [f"gs://src/{name}" for name in names])
+        elapsed = time.perf_counter() - start
+
+        # --- Assert ---
+        self.assertLess(elapsed, 0.6)
+        self.storage_client.bucket.assert_called_once_with("src")  # one shared bucket handle
+        positions = [result.content.index(f"content of {name}") for name in names]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_failed_documents_are_reported(self):
+        """
+        Tests that per-document failures are returned instead of only printed.
+        """
+        # --- Arrange ---
+        bucket = MagicMock()
+        bucket.blob.side_effect = self._blob_factory({}, {"missing.txt"})
+        self.storage_client.bucket.return_value = bucket
+
+        # --- Act ---
+        result = self.agent.gather("q", ["gs://src/ok.txt", "gs://src/missing.txt", "gs://no-object/"])
+
+        # --- Assert ---
+        self.assertIn("content of ok.txt", result.content)
+        errors = {e["path"]: e["error"] for e in result.document_errors}
+        self.assertEqual(set(errors), {"gs://src/missing.txt", "gs://no-object/"})
+        self.assertIn("not found", errors["gs://src/missing.txt"])
+
+    def test_documents_from_multiple_buckets(self):
+        """
+        Tests that full URIs from other buckets are read from those buckets.
+        """
+        # --- Arrange ---
+        buckets = {}
+        def make_bucket(name):
+            bucket = MagicMock()
+            bucket.blob.side_effect = self._blob_factory({}, set())
+            buckets[name] = bucket
+            return bucket
+        self.storage_client.bucket.side_effect = make_bucket
+
+        # --- Act ---
+        result = self.agent.gather("q", ["gs://a/one.txt", "gs://b/two.txt", "gs://a/three.txt"])
+
+        # --- Assert ---
+        self.assertEqual(set(buckets), {"a", "b"})
+        self.assertEqual(result.document_errors, [])
+        self.assertIn("content of two.txt", result.content)
+
+class TestResearchAgentFanOut(unittest.TestCase):
+
+    def setUp(self):
+        self.search_client = MagicMock()
+        self.agent = ResearchAgent(search_client=self.search_client, storage_client=MagicMock())
+
+    def test_expand_query_uses_templates_and_dedupes(self):
+        """
+        Tests that the query is expanded with templated angles, original first.
+        """
+        queries = ResearchAgent.expand_query("EV batteries", 3)
+        self.assertEqual(queries, ["EV batteries", "EV batteries latest news", "EV batteries risks and challenges"])
+
+    def test_expand_query_prefers_caller_sub_queries(self):
+        """
+        Tests that caller-supplied sub-queries replace the templates.
+        """
+        queries = ResearchAgent.expand_query("EV batteries", 5, ["solid state", "ev batteries"])
+        self.assertEqual(queries, ["EV batteries", "solid state"])
+
+    def test_fan_out_runs_concurrently_and_merges_by_url(self):
+        """
+        Tests that sub-queries run in parallel and duplicate URLs are kept once.
+        """
+        # --- Arrange ---
+        def slow_search(query, max_results):
+            time.sleep(0.2)
+            return [
+                {"title": "Shared", "link": "https://shared", "snippet": "Same story"},
+                {"title": f"Only {query}", "link": f"https://{query}", "snippet": "Unique"},
+            ]
+        self.search_client.search_results.side_effect = slow_search
+
+        # --- Act ---
+        start = time.perf_counter()
+        result = self.agent.run("ai", fan_out=4)
+        elapsed = time.perf_counter() - start
+
+        # --- Assert ---
+        self.assertEqual(self.search_client.search_results.call_count, 4)
+        self.assertLess(elapsed, 0.6)  # ~one search, not four in a row
+        self.assertEqual(result.count("Title: Shared"), 1)
+        self.assertIn("Title: Only ai latest news", result)
+
+    def test_fan_out_skips_timed_out_queries(self):
+        """
+        Tests that a sub-query exceeding the per-query timeout is dropped.
+        """
+        # --- Arrange ---
+        def search(query, max_results):
+            if query != "ai":
+                time.sleep(1)
+            return [{"title": f"R {query}", "link": f"https://{query}", "snippet": "S"}]
+        self.search_client.search_results.side_effect = search
+
+        # --- Act ---
+        result = self.agent.run("ai", sub_queries=["slow angle"], per_query_timeout=0.1)
+
+        # --- Assert ---
+        self.assertIn("Title: R ai", result)
+        self.assertNotIn("slow angle", result)
+
+    def test_fan_out_deadline_starts_with_each_query(self):
+        """
+        Tests that a query queued behind another gets its own timeout from when it starts, not a shared deadline.
+        """
+        # --- Arrange ---
+        def search(query, max_results):
+            time.sleep(0.05 if query == "ai" else 0.4)
+            return [{"title": f"R {query}", "link": f"https://{query}", "snippet": "S"}]
+        self.search_client.search_results.side_effect = search
+
+        # --- Act ---
+        with patch('agents.research_agent.RESEARCH_MAX_CONCURRENCY', 1):
+            start = time.perf_counter()
+            result = self.agent.run("ai", sub_queries=["slow angle"], per_query_timeout=0.3)
+            elapsed = time.perf_counter() - start
+
+        # --- Assert ---
+        self.assertIn("Title: R ai", result)
+        self.assertNotIn("slow angle", result)
+        self.assertLess(elapsed, 0.4)  # ~0.05s for the first query plus the second's 0.3s
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,454 @@
+# auto-research-agent/tests/test_stage_graph.py
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from agents.delivery_agent import DeliveryAgent
+from agents.research_agent import DocumentResult, ResearchResult
+from orchestrator.coalescer import RequestCoalescer
+from orchestrator.main_orchestrator import MainOrchestrator
+from orchestrator.run_context import RunContext
+from orchestrator.stage_graph import Stage, StageGraph
+from tests.fakes import FakeStorageClient
+from utils.rate_limiter import RateLimitTimeout
+from utils.report_store import SQLiteReportStore
+
+def sleeper(seconds: float, result=True):
+    def func(ctx):
+        time.sleep(seconds)
+        return result
+    return func
+
+class TestStageGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.marks = []
+        self.ctx = RunContext(query="q", on_stage=lambda stage, status: self.marks.append((stage, status)))
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_independent_stages_run_concurrently(self):
+        """
+        Tests that stages without a dependency between them overlap, and dependents wait for both.
+        """
+        # --- Arrange ---
+        order = []
+        graph = StageGraph([
+            Stage("a", sleeper(0.2), report_as="fetch"),
+            Stage("b", sleeper(0.2), report_as="fetch"),
+            Stage("c", lambda ctx: order.append("c"), deps=("a", "b")),
+        ])
+
+        # --- Act ---
+        start = time.perf_counter()
+        outcome = graph.run(self.ctx, self.executor)
+        elapsed = time.perf_counter() - start
+
+        # --- Assert ---
+        self.assertTrue(outcome.ok)
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual(order, ["c"])
+        self.assertEqual(self.marks, [("fetch", "running"), ("fetch", "completed"),
+                                      ("c", "running"), ("c", "completed")])
+
+    def test_required_failure_stops_dependents(self):
+        """
+        Tests that a failed required stage skips everything downstream.
+        """
+        downstream = MagicMock()
+        graph = StageGraph([
+            Stage("a", lambda ctx: False, error_message="A failed."),
+            Stage("b", downstream, deps=("a",)),
+        ])
+
+        outcome = graph.run(self.ctx, self.executor)
+
+        self.assertEqual(outcome.failed_stage.error_message, "A failed.")
+        self.assertEqual(outcome.status, {"a": "failed", "b": "skipped"})
+        downstream.assert_not_called()
+        self.assertIn(("a", "failed"), self.marks)
+
+    def test_optional_failure_and_timeout_continue(self):
+        """
+        Tests that optional stages may raise or time out without stopping the run.
+        """
+        def boom(ctx):
+            raise RuntimeError("bucket missing")
+
+        graph = StageGraph([
+            Stage("docs", boom, policy="optional"),
+            Stage("slow", sleeper(1.0), timeout=0.1, policy="optional"),
+            Stage("merge", lambda ctx: True, deps=("docs", "slow")),
+        ])
+
+        start = time.perf_counter()
+        outcome = graph.run(self.ctx, self.executor)
+
+        self.assertTrue(outcome.ok)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(outcome.status["docs"], "failed")
+        self.assertEqual(outcome.errors["docs"], "bucket missing")
+        self.assertEqual(outcome.status["slow"], "timed_out")
+        self.assertEqual(outcome.status["merge"], "completed")
+
+    def test_stage_executors_and_queued_timeouts(self):
+        """
+        Tests that a stage can run on its own executor, and time spent queued there does not count toward its timeout.
+        """
+        # --- Arrange ---
+        narrow = ThreadPoolExecutor(max_workers=1, thread_name_prefix="narrow")
+        self.addCleanup(narrow.shutdown)
+        blocker = narrow.submit(time.sleep, 0.3)
+        threads = []
+        graph = StageGraph([
+            Stage("analysis", lambda ctx: threads.append(threading.current_thread().name), timeout=0.2),
+        ])
+
+        # --- Act ---
+        outcome = graph.run(self.ctx, self.executor, {"analysis": narrow})
+
+        # --- Assert ---
+        self.assertTrue(blocker.done())
+        self.assertTrue(outcome.ok)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("narrow"))
+
+    def test_background_stage_finishes_after_run_returns(self):
+        """
+        Tests that the run does not wait for a background stage, which still reports when done.
+        """
+        release = threading.Event()
+        graph = StageGraph([
+            Stage("report", lambda ctx: True),
+            Stage("deliver", lambda ctx: release.wait(5), deps=("report",), policy="background"),
+        ])
+
+        outcome = graph.run(self.ctx, self.executor)
+
+        self.assertEqual(outcome.status["deliver"], "running")
+        self.assertNotIn(("deliver", "completed"), self.marks)
+        release.set()
+        outcome.background["deliver"].result(timeout=5)
+        self.assertEqual(outcome.status["deliver"], "completed")
+        self.assertEqual(self.marks[-1], ("deliver", "completed"))
+
+    def test_background_timeout_counts_from_stage_start(self):
+        """
+        Tests that a background stage queued behind a busy executor gets its full timeout once it starts.
+        """
+        # --- Arrange ---
+        narrow = ThreadPoolExecutor(max_workers=1, thread_name_prefix="narrow")
+        self.addCleanup(narrow.shutdown)
+        narrow.submit(time.sleep, 0.3)
+        graph = StageGraph([
+            Stage("deliver", sleeper(0.1), timeout=0.2, policy="background"),
+        ])
+
+        # --- Act ---
+        outcome = graph.run(self.ctx, self.executor, {"deliver": narrow})
+        outcome.background["deliver"].result(timeout=5)
+
+        # --- Assert ---
+        self.assertEqual(outcome.status["deliver"], "completed")
+        self.assertEqual(self.marks[-1], ("deliver", "completed"))
+
+    def test_timed_out_stage_cannot_change_context(self):
+        """
+        Tests that a stage still running after its timeout no longer writes to the run's context.
+        """
+        # --- Arrange ---
+        release = threading.Event()
+
+        def slow_search(ctx):
+            release.wait(5)
+            ctx.web_content = "late results"
+
+        graph = StageGraph([
+            Stage("web_search", slow_search, timeout=0.1, policy="optional"),
+            Stage("documents", lambda ctx: setattr(ctx, "documents", ["doc"])),
+        ])
+
+        # --- Act ---
+        outcome = graph.run(self.ctx, self.executor)
+        release.set()
+        self.executor.shutdown(wait=True)
+
+        # --- Assert ---
+        self.assertEqual(outcome.status["web_search"], "timed_out")
+        self.assertIsNone(self.ctx.web_content)
+        self.assertEqual(self.ctx.documents, ["doc"])
+
+    def test_invalid_graphs_rejected(self):
+        """
+        Tests that unknown dependencies and cycles are caught when the graph is built.
+        """
+        with self.assertRaises(ValueError):
+            StageGraph([Stage("a", lambda ctx: True, deps=("missing",))])
+        with self.assertRaises(ValueError):
+            StageGraph([Stage("a", lambda ctx: True, deps=("b",)), Stage("b", lambda ctx: True, deps=("a",))])
+
+class TestMainOrchestratorGraph(unittest.TestCase):
+
+    def build(self, background_delivery=False, delivery=None, in_memory_delivery=False, report_store=None,
+              coalescer=None):
+        research = MagicMock()
+        research.search_web.side_effect = lambda query, **kwargs: time.sleep(0.2) or "Title: t\nSnippet: s\n---"
+        documents = [DocumentResult(path="gs://b/doc.txt", bucket="b", blob_name="doc.txt", content="Doc text.")]
+        research.read_documents.side_effect = lambda paths: time.sleep(0.2) or documents
+        research.consolidate.return_value = ResearchResult(content="Consolidated.", documents=documents)
+        analysis = MagicMock()
+        analysis.analyze.return_value = SimpleNamespace(
+            insights={"title": "T"}, metadata=lambda: {"mode": "single"})
+        reporting = MagicMock()
+        reporting.run.return_value = "/tmp/report.pdf"
+        reporting.render_bytes.return_value = ("report_q_abc123.pdf", b"%PDF-1.4 test")
+        orchestrator = MainOrchestrator(
+            research_agent=research, analysis_agent=analysis, reporting_agent=reporting,
+            delivery_agent=delivery or MagicMock(run=MagicMock(return_value="https://example/report.pdf")),
+            context_packer=MagicMock(pack=MagicMock(return_value=SimpleNamespace(
+                content="Consolidated.", summary=lambda: {"kept_passages": None}))),
+            background_delivery=background_delivery,
+            in_memory_delivery=in_memory_delivery,
+            report_store=report_store,
+            coalescer=coalescer,
+        )
+        self.addCleanup(orchestrator.close)
+        return orchestrator
+
+    def test_research_halves_overlap(self):
+        """
+        Tests that web search and document reads run at the same time and the run succeeds.
+        """
+        orchestrator = self.build()
+        marks = []
+
+        start = time.perf_counter()
+        result = orchestrator.run("q", ["gs://b/doc.txt"], on_stage=lambda s, st: marks.append((s, st)))
+
+        self.assertLess(time.perf_counter() - start, 0.35)
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["report_url"], "https://example/report.pdf")
+        self.assertEqual([s for s, st in marks if st == "running"],
+                         ["research", "packing", "analysis", "reporting", "delivery"])
+
+    def test_background_delivery_does_not_block(self):
+        """
+        Tests that with background delivery the result returns before the upload finishes.
+        """
+        release = threading.Event()
+        delivery = MagicMock()
+        delivery.run.side_effect = lambda path: release.wait(5) and "https://example/late.pdf"
+        orchestrator = self.build(background_delivery=True, delivery=delivery)
+
+        result = orchestrator.run("q")
+
+        self.assertEqual(result["status"], "success")
+        self.assertNotIn("report_url", result)
+        self.assertIn("background", result["message"])
+        release.set()
+
+    def test_in_memory_delivery_skips_temp_file(self):
+        """
+        Tests that in-memory reports go straight to GCS, and reach disk only when the upload fails.
+        """
+        # --- Arrange ---
+        client = FakeStorageClient()
+        with patch('agents.delivery_agent.GCS_REPORTS_BUCKET', 'reports'):
+            orchestrator = self.build(delivery=DeliveryAgent(storage_client=client), in_memory_delivery=True)
+
+            # --- Act ---
+            uploaded = orchestrator.run("q")
+            client.corrupt = True
+            with tempfile.TemporaryDirectory() as tmp, patch('orchestrator.main_orchestrator.TEMP_DIR', tmp):
+                fallback = orchestrator.run("q")
+                saved = os.path.exists(os.path.join(tmp, "report_q_abc123.pdf"))
+
+        # --- Assert ---
+        self.assertEqual(uploaded["report_url"], "https://storage.googleapis.com/reports/report_q_abc123.pdf")
+        self.assertIsNone(uploaded["local_pdf_path"])
+        orchestrator.reporting_agent.run.assert_not_called()
+        self.assertNotIn("report_url", fallback)
+        self.assertTrue(fallback["local_pdf_path"].endswith("report_q_abc123.pdf"))
+        self.assertTrue(saved)
+
+    def test_archived_report_served_from_store(self):
+        """
+        Tests that reports are archived before delivery, and a failed upload leaves nothing in TEMP_DIR.
+        """
+        # --- Arrange ---
+        client = FakeStorageClient()
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteReportStore(os.path.join(tmp, "reports.db"))
+            self.addCleanup(store.close)
+            with patch('agents.delivery_agent.GCS_REPORTS_BUCKET', 'reports'), \
+                    patch('orchestrator.main_orchestrator.TEMP_DIR', tmp):
+                orchestrator = self.build(delivery=DeliveryAgent(storage_client=client),
+                                          in_memory_delivery=True, report_store=store)
+                orchestrator.reporting_agent.render_bytes.side_effect = [
+                    ("report_q_aaa111.pdf", b"%PDF-1.4 test"), ("report_q_bbb222.pdf", b"%PDF-1.4 test")]
+
+                # --- Act ---
+                uploaded = orchestrator.run("q")
+                client.corrupt = True
+                fallback = orchestrator.run("q")
+                leftovers = [name for name in os.listdir(tmp) if name.endswith(".pdf")]
+
+        # --- Assert ---
+        self.assertEqual(store.get(uploaded["report_id"])["report_url"], uploaded["report_url"])
+        self.assertEqual(store.get_pdf(uploaded["report_id"]), b"%PDF-1.4 test")
+        self.assertEqual(fallback["status"], "success")
+        self.assertIn("/download/report_q_bbb222.pdf", fallback["message"])
+        self.assertEqual(fallback["report_filename"], "report_q_bbb222.pdf")
+        self.assertIsNone(fallback["local_pdf_path"])
+        self.assertEqual(leftovers, [])
+
+    def test_refresh_reuses_or_updates_previous_report(self):
+        """
+        Tests that a refresh with unchanged sources returns the stored report, and one with a new
+        source sends only that source to Gemini along with the previous insights.
+        """
+        # --- Arrange ---
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteReportStore(os.path.join(tmp, "reports.db"))
+            self.addCleanup(store.close)
+            delivery = MagicMock(deliver_bytes=MagicMock(return_value="https://example/report.pdf"))
+            orchestrator = self.build(delivery=delivery, in_memory_delivery=True, report_store=store)
+            research = orchestrator.research_agent
+            research.search_web.side_effect = lambda query, **kwargs: "Title: a\nSnippet: one\n---"
+            orchestrator.reporting_agent.render_bytes.side_effect = [
+                ("report_q_aaa111.pdf", b"%PDF-1.4 one"), ("report_q_bbb222.pdf", b"%PDF-1.4 two")]
+            analysis = orchestrator.analysis_agent
+
+            # --- Act ---
+            first = orchestrator.run("q", ["gs://b/doc.txt"])
+            unchanged = orchestrator.run("q", ["gs://b/doc.txt"], options={"refresh": True})
+            research.search_web.side_effect = lambda query, **kwargs: (
+                "Title: a\nSnippet: one\n---\nTitle: b\nSnippet: two\n---")
+            updated = orchestrator.run("q", ["gs://b/doc.txt"], options={"refresh": True})
+
+        # --- Assert ---
+        self.assertTrue(unchanged["refresh"]["reused"])
+        self.assertEqual(unchanged["report_id"], first["report_id"])
+        self.assertEqual(unchanged["report_url"], first["report_url"])
+        self.assertEqual(unchanged["insights"]["title"], "T")
+        self.assertEqual(analysis.analyze.call_count, 2)
+        self.assertEqual(delivery.deliver_bytes.call_count, 2)
+        packed = orchestrator.context_packer.pack.call_args.args[0]
+        self.assertIn("Title: b", packed)
+        self.assertNotIn("Title: a", packed)
+        self.assertNotIn("Doc text.", packed)
+        self.assertEqual(analysis.analyze.call_args.kwargs["previous_insights"]["title"], "T")
+        self.assertEqual({k: updated["refresh"][k] for k in ("reused", "added", "unchanged")},
+                         {"reused": False, "added": 1, "unchanged": 2})
+        self.assertNotEqual(updated["report_id"], first["report_id"])
+
+    def test_near_duplicates_removed_before_packing(self):
+        """
+        Tests that a repeated search result is dropped before packing and the savings are reported.
+        """
+        # --- Arrange ---
+        orchestrator = self.build()
+        snippet = "Title: Battery news\nSnippet: A solid state cell kept ninety percent of its capacity after two thousand cycles\n---"
+        content = f"Web Search Results for query 'q':\n{snippet}\n{snippet}\nTitle: Other\nSnippet: Unrelated story\n---"
+        orchestrator.research_agent.consolidate.return_value = ResearchResult(content=content)
+
+        # --- Act ---
+        result = orchestrator.run("q")
+
+        # --- Assert ---
+        packed = orchestrator.context_packer.pack.call_args.args[0]
+        self.assertEqual(packed, content.replace(f"{snippet}\n", "", 1))
+        self.assertEqual(result["deduplication"]["dropped"], 1)
+        self.assertEqual(result["deduplication"]["chars_saved"], len(snippet.removesuffix("\n---")))
+
+    def test_identical_runs_coalesced(self):
+        """
+        Tests that identical concurrent run() calls search, analyze and render once.
+        """
+        orchestrator = self.build(coalescer=RequestCoalescer(reuse_seconds=0))
+        results = []
+
+        threads = [threading.Thread(target=lambda q=q: results.append(orchestrator.run(q)))
+                   for q in ("Solar power", "solar  power", "SOLAR POWER")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual([r["status"] for r in results], ["success"] * 3)
+        orchestrator.research_agent.search_web.assert_called_once()
+        orchestrator.reporting_agent.run.assert_called_once()
+
+    def test_batch_shares_documents_and_bounds_analysis(self):
+        """
+        Tests that a batch reads shared documents once, caps concurrent analyses and yields every item.
+        """
+        # --- Arrange ---
+        orchestrator = self.build()
+        research = orchestrator.research_agent
+        research.search_web.side_effect = lambda query, **kwargs: time.sleep(0.05) or "Title: t\nSnippet: s\n---"
+        research.read_documents.side_effect = lambda paths: [
+            DocumentResult(path=p, bucket="b", blob_name=p.rsplit("/", 1)[1], content="Doc.") for p in paths]
+        lock, active, peak = threading.Lock(), [0], [0]
+
+        def analyze(content, mode):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return SimpleNamespace(insights={"title": "T"}, metadata=lambda: {"mode": "single"})
+
+        orchestrator.analysis_agent.analyze.side_effect = analyze
+        items = [(f"query {i}", ["gs://b/shared.txt", f"gs://b/own{i % 2}.txt"]) for i in range(10)]
+
+        # --- Act ---
+        results = list(orchestrator.run_batch(items, max_concurrency=10, analysis_workers=2))
+
+        # --- Assert ---
+        self.assertEqual(sorted(i for i, _ in results), list(range(10)))
+        self.assertTrue(all(r["status"] == "success" for _, r in results))
+        research.read_documents.assert_called_once_with(["gs://b/own0.txt", "gs://b/own1.txt", "gs://b/shared.txt"])
+        self.assertEqual(research.consolidate.call_args_list[0].args[2][0].path, "gs://b/shared.txt")
+        self.assertEqual(peak[0], 2)
+
+    def test_profiled_run_skips_coalescer_and_saves_profile(self):
+        """
+        Tests that a profiled run gets its own workflow and returns the id of its saved profile.
+        """
+        coalescer = RequestCoalescer()
+        orchestrator = self.build(coalescer=coalescer)
+        with tempfile.TemporaryDirectory() as tmp, patch('orchestrator.main_orchestrator.PROFILE_DIR', tmp):
+            plain = orchestrator.run("q")
+            profiled = orchestrator.run("q", profile=True)
+            saved = os.path.exists(os.path.join(tmp, profiled["profile_id"] + ".json"))
+
+        self.assertNotIn("profile_id", plain)
+        self.assertTrue(saved)
+        self.assertEqual(orchestrator.research_agent.search_web.call_count, 2)
+        self.assertEqual(coalescer.stats()["executed"], 1)
+
+    def test_rate_limited_run_reports_retry_after(self):
+        """
+        Tests that a stage refused by a provider limiter fails the run with the provider and Retry-After hint.
+        """
+        orchestrator = self.build()
+        orchestrator.analysis_agent.analyze.side_effect = RateLimitTimeout(
+            "gemini", "Timed out waiting for gemini quota.", retry_after=12.0)
+
+        result = orchestrator.run("q")
+
+        self.assertEqual(result["status"], "error")
+        self.assertIn("gemini quota", result["message"])
+        self.assertEqual(result["rate_limited"], {"provider": "gemini", "queue_full": False, "retry_after": 12.0})
+
+if __name__ == '__main__':
+    unittest.main()
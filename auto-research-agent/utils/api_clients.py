@@ -1,17 +1,315 @@
 # auto-research-agent/utils/api_clients.py
 
+import asyncio
+import email.utils
+import random
+import threading
+import time
 import requests
 import json
-from config import SERPER_API_KEY
+from requests.adapters import HTTPAdapter
+from config import (
+    SERPER_API_KEY,
+    SERPER_POOL_SIZE,
+    SERPER_MAX_RETRIES,
+    SERPER_BACKOFF_BASE_SECONDS,
+    SERPER_BACKOFF_MAX_SECONDS,
+    SERPER_CONNECT_TIMEOUT_SECONDS,
+    SERPER_READ_TIMEOUT_SECONDS,
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_TTL_SECONDS,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_MAX_MEMORY_BYTES,
+    SEARCH_CACHE_DIR,
+    SEARCH_CACHE_MAX_DISK_BYTES,
+)
+from utils.cache import TieredCache, build_tiered_cache, make_cache_key
+from utils.lazy import lazy_import
+from utils.metrics import track_call
+from utils.rate_limiter import ProviderLimiter, RateLimitError, get_rate_limiter
 
-class WebSearchClient:
-    """A client for performing web searches using the Serper.dev API."""
+# Only the async pipeline needs httpx (see AsyncWebSearchClient)
+httpx = lazy_import("httpx")
 
-    def __init__(self, api_key: str = SERPER_API_KEY):
+_storage_client = None
+_storage_client_loaded = False
+_storage_client_lock = threading.Lock()
+
+def get_storage_client():
+    """
+    Returns the process-wide Google Cloud Storage client, creating it on first use.
+
+    The client is shared by every agent that talks to GCS so that a process only
+    pays for credential discovery and connection setup once. If GCS is not
+    available (e.g. no default credentials), None is returned and remembered.
+    """
+    global _storage_client, _storage_client_loaded
+    if _storage_client_loaded:
+        return _storage_client
+    with _storage_client_lock:
+        if not _storage_client_loaded:
+            try:
+                from google.cloud import storage
+                _storage_client = storage.Client()
+            except Exception as e:
+                print(f"Warning: Google Cloud Storage not available: {e}")
+                _storage_client = None
+            _storage_client_loaded = True
+    return _storage_client
+
+def close_storage_client() -> None:
+    """Closes the shared GCS client (if any) so the next call creates a fresh one."""
+    global _storage_client, _storage_client_loaded
+    with _storage_client_lock:
+        if _storage_client is not None and hasattr(_storage_client, "close"):
+            try:
+                _storage_client.close()
+            except Exception as e:
+                print(f"Warning: Failed to close GCS client: {e}")
+        _storage_client = None
+        _storage_client_loaded = False
+
+def create_search_cache() -> TieredCache | None:
+    """Builds the search result cache from config, or returns None if it is disabled."""
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    return build_tiered_cache(
+        ttl_seconds=SEARCH_CACHE_TTL_SECONDS,
+        max_entries=SEARCH_CACHE_MAX_ENTRIES,
+        max_memory_bytes=SEARCH_CACHE_MAX_MEMORY_BYTES,
+        disk_dir=SEARCH_CACHE_DIR or None,
+        max_disk_bytes=SEARCH_CACHE_MAX_DISK_BYTES,
+    )
+
+# Responses worth retrying: rate limiting and transient server-side failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parses a Retry-After header (delta-seconds or HTTP-date) into seconds to wait."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+def format_search_results(results: list[dict]) -> str:
+    """Formats search result dicts as the title/snippet text fed to the analysis prompt."""
+    return "\n".join(f"Title: {item['title']}\nSnippet: {item['snippet']}\n---" for item in results)
+
+class SerperClientBase:
+    """
+    Settings, result cache, stats and retry policy shared by WebSearchClient and
+    AsyncWebSearchClient; the subclasses make the HTTP calls.
+    """
+
+    def __init__(
+        self,
+        api_key: str = SERPER_API_KEY,
+        cache: TieredCache | None = None,
+        search_url: str = "https://google.serper.dev/search",
+        pool_size: int = SERPER_POOL_SIZE,
+        max_retries: int = SERPER_MAX_RETRIES,
+        backoff_base: float = SERPER_BACKOFF_BASE_SECONDS,
+        backoff_max: float = SERPER_BACKOFF_MAX_SECONDS,
+        connect_timeout: float = SERPER_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = SERPER_READ_TIMEOUT_SECONDS,
+        limiter: ProviderLimiter | None = None,
+    ):
         if not api_key:
             raise ValueError("Serper API key is required.")
         self.api_key = api_key
-        self.search_url = "https://google.serper.dev/search"
+        self.search_url = search_url
+        self.cache = cache if cache is not None else create_search_cache()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.limiter = limiter if limiter is not None else get_rate_limiter("serper")
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "successes": 0,
+            "failures": 0,
+            "backoff_seconds": 0.0,
+            "status_codes": {},
+        }
+
+    def _headers(self) -> dict:
+        return {
+            'X-API-KEY': self.api_key,
+            'Content-Type': 'application/json'
+        }
+
+    @staticmethod
+    def _cache_key(query: str, max_results: int) -> str:
+        """Cache key for a search: the query with case and whitespace normalized, plus max_results."""
+        normalized_query = " ".join(query.lower().split())
+        return make_cache_key("serper", normalized_query, max_results)
+
+    def _record(self, **increments) -> None:
+        with self._stats_lock:
+            for name, amount in increments.items():
+                self._stats[name] += amount
+
+    def _record_status(self, status_code: int) -> None:
+        with self._stats_lock:
+            codes = self._stats["status_codes"]
+            codes[str(status_code)] = codes.get(str(status_code), 0) + 1
+
+    def _backoff_delay(self, attempt: int, retry_after: float | None) -> float:
+        """Full-jitter exponential backoff, unless the server told us how long to wait."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _organic_results(self, results: dict) -> list[dict]:
+        self._record(successes=1)
+        return [
+            {
+                "title": item.get("title", ""),
+                "link": item.get("link", ""),
+                "snippet": item.get("snippet", ""),
+            }
+            for item in results.get("organic", [])
+        ]
+
+    def _cached_results(self, query: str, max_results: int) -> list[dict] | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._cache_key(query, max_results))
+        if cached is not None:
+            print(f"WebSearchClient: Cache hit for '{query}'")
+        return cached
+
+    def _store_results(self, query: str, max_results: int, results: list[dict] | None) -> list[dict]:
+        if not results:
+            return []
+        if self.cache is not None:
+            self.cache.set(self._cache_key(query, max_results), results)
+        return results
+
+    def cache_info(self) -> dict | None:
+        """Returns the cache's hit/miss counters and sizes, or None if caching is disabled."""
+        return self.cache.info() if self.cache is not None else None
+
+    def stats(self) -> dict:
+        """Returns request/retry counters and connection pool usage for tuning."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["status_codes"] = dict(self._stats["status_codes"])
+        stats["pool"] = self._pool_stats()
+        return stats
+
+class WebSearchClient(SerperClientBase):
+    """
+    A client for performing web searches using the Serper.dev API.
+
+    Requests go through a keep-alive session with a bounded connection pool, so
+    repeated searches reuse TCP/TLS connections. Rate-limited (429) and transient
+    5xx/connection failures are retried with jittered exponential backoff that
+    honors the server's Retry-After header. Every attempt first takes a slot
+    from the shared Serper limiter (utils/rate_limiter.py).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        # Retries are handled below (with stats), so the adapter itself never retries.
+        session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+        session.headers.update(self._headers())
+        return session
+
+    def _post_with_retries(self, payload: str) -> requests.Response:
+        """
+        POSTs the payload, retrying transient failures.
+
+        Raises:
+            requests.RequestException: If the last attempt still failed.
+            RateLimitError: If no Serper slot was free in time (shared by all attempts).
+        """
+        self._record(requests=1)
+        attempt = 0
+        deadline = self.limiter.deadline()
+        while True:
+            self._record(attempts=1)
+            retry_after = None
+            try:
+                with self.limiter.acquire(deadline=deadline) as permit, track_call("serper", "search") as call:
+                    response = self.session.post(self.search_url, data=payload, timeout=self.timeout)
+                    call.add_bytes(sent=len(payload), received=len(response.content))
+                    if not response.ok:
+                        call.error()
+                    if response.status_code == 429:
+                        permit.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                self._record_status(response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                reason = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                reason = type(e).__name__
+
+            delay = self._backoff_delay(attempt, retry_after)
+            print(f"WebSearchClient: {reason}, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+            self._record(retries=1, backoff_seconds=delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _fetch_results(self, query: str, max_results: int) -> list[dict] | None:
+        """Calls Serper and returns the organic results, or None if the request failed."""
+        payload = json.dumps({"q": query, "num": max_results})
+
+        try:
+            response = self._post_with_retries(payload)
+            results = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error during web search: {e}")
+            self._record(failures=1)
+            return None
+        return self._organic_results(results)
+
+    def search_results(self, query: str, max_results: int = 5) -> list[dict]:
+        """
+        Performs a web search and returns the organic results as dicts.
+
+        Successful, non-empty results are cached; failures and empty result sets
+        are not, so the next call retries Serper.
+
+        Args:
+            query: The search query.
+            max_results: The maximum number of search results to process.
+
+        Returns:
+            A list of {"title", "link", "snippet"} dicts (empty if the request
+            failed).
+
+        Raises:
+            RateLimitError: If the Serper limiter refused the call, either because too
+                many calls were already waiting (RateLimitQueueFull) or because no slot
+                was free in time (RateLimitTimeout). These are not turned into an
+                empty result, so callers can answer 429/503.
+        """
+        cached = self._cached_results(query, max_results)
+        if cached is not None:
+            return cached
+        return self._store_results(query, max_results, self._fetch_results(query, max_results))
 
     def search(self, query: str, max_results: int = 5) -> str:
         """
@@ -22,27 +320,141 @@ class WebSearchClient:
             max_results: The maximum number of search results to process.
 
         Returns:
-            A single string containing the titles and snippets of the search results.
+            A single string containing the titles and snippets of the search results
+            (empty if the request failed).
+
+        Raises:
+            RateLimitError: If the Serper limiter refused the call, either because too
+                many calls were already waiting (RateLimitQueueFull) or because no slot
+                was free in time (RateLimitTimeout). These are not turned into an
+                empty result, so callers can answer 429/503.
+        """
+        return format_search_results(self.search_results(query, max_results))
+
+    def _pool_stats(self) -> dict:
+        pools = []
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "connections_created": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+            })
+        return {"max_size": self.pool_size, "hosts": pools}
+
+    def close(self) -> None:
+        """Closes the pooled connections."""
+        self.session.close()
+
+class AsyncWebSearchClient(SerperClientBase):
+    """
+    Serper client for the asyncio pipeline (orchestrator/async_orchestrator.py).
+
+    Searches are coroutines on an httpx.AsyncClient, so a search waiting on
+    Serper holds no thread. Caching, retries, backoff and the shared Serper
+    limiter behave as in WebSearchClient; backoff and limiter waits use
+    asyncio.sleep. httpx is only imported when the first search is made, and
+    the connections are released by aclose().
+    """
+
+    def __init__(self, *args, client=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Anything with an awaitable post(url, content=...) returning an httpx-like response;
+        # the AsyncClient is created on first use, inside the event loop
+        self.client = client
+
+    def _get_client(self):
+        if self.client is None:
+            connect_timeout, read_timeout = self.timeout
+            self.client = httpx.AsyncClient(
+                headers=self._headers(),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self.client
+
+    @staticmethod
+    def _is_transport_error(error: Exception) -> bool:
+        """Connection and timeout failures, which are retried like requests.ConnectionError/Timeout."""
+        if isinstance(error, (OSError, asyncio.TimeoutError)):
+            return True
+        return httpx.loaded and isinstance(error, httpx.TransportError)
+
+    async def _post_with_retries(self, payload: str):
+        """
+        POSTs the payload, retrying transient failures.
+
+        Raises:
+            httpx.HTTPError: If the last attempt still failed.
+            RateLimitError: If no Serper slot was free in time (shared by all attempts).
         """
+        client = self._get_client()
+        self._record(requests=1)
+        attempt = 0
+        deadline = self.limiter.deadline()
+        while True:
+            self._record(attempts=1)
+            retry_after = None
+            try:
+                with await self.limiter.acquire_async(deadline=deadline) as permit, \
+                        track_call("serper", "search") as call:
+                    response = await client.post(self.search_url, content=payload)
+                    call.add_bytes(sent=len(payload), received=len(response.content))
+                    if not response.is_success:
+                        call.error()
+                    if response.status_code == 429:
+                        permit.throttled(parse_retry_after(response.headers.get("Retry-After")))
+                self._record_status(response.status_code)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                reason = f"HTTP {response.status_code}"
+            except Exception as e:
+                if not self._is_transport_error(e) or attempt >= self.max_retries:
+                    raise
+                reason = type(e).__name__
+
+            delay = self._backoff_delay(attempt, retry_after)
+            print(f"WebSearchClient: {reason}, retrying in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries})")
+            self._record(retries=1, backoff_seconds=delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _fetch_results(self, query: str, max_results: int) -> list[dict] | None:
+        """Calls Serper and returns the organic results, or None if the request failed."""
         payload = json.dumps({"q": query, "num": max_results})
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
 
         try:
-            response = requests.post(self.search_url, headers=headers, data=payload, timeout=10)
-            response.raise_for_status()
+            response = await self._post_with_retries(payload)
             results = response.json()
+        except RateLimitError:
+            raise
+        except Exception as e:
+            print(f"Error during web search: {e}")
+            self._record(failures=1)
+            return None
+        return self._organic_results(results)
 
-            content = []
-            for item in results.get("organic", []):
-                title = item.get("title", "")
-                snippet = item.get("snippet", "")
-                content.append(f"Title: {title}\nSnippet: {snippet}\n---")
+    async def search_results(self, query: str, max_results: int = 5) -> list[dict]:
+        """Like WebSearchClient.search_results(), as a coroutine."""
+        cached = self._cached_results(query, max_results)
+        if cached is not None:
+            return cached
+        return self._store_results(query, max_results, await self._fetch_results(query, max_results))
 
-            return "\n".join(content)
+    async def search(self, query: str, max_results: int = 5) -> str:
+        """Like WebSearchClient.search(), as a coroutine."""
+        return format_search_results(await self.search_results(query, max_results))
 
-        except requests.RequestException as e:
-            print(f"Error during web search: {e}")
-            return "" # Return empty string on failure
\ No newline at end of file
+    def _pool_stats(self) -> dict:
+        return {"max_size": self.pool_size, "hosts": []}
+
+    async def aclose(self) -> None:
+        """Closes the pooled connections."""
+        if self.client is not None and hasattr(self.client, "aclose"):
+            await self.client.aclose()
+        self.client = None
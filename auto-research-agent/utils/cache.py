@@ -0,0 +1,270 @@
+# auto-research-agent/utils/cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+def make_cache_key(*parts) -> str:
+    """Builds a stable cache key by hashing the JSON encoding of the given parts."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters shared by the cache tiers."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return counts
+
+class LRUCache:
+    """
+    In-memory cache with per-entry TTL and LRU eviction.
+
+    Entries are evicted least-recently-used first once either `max_entries` or
+    `max_bytes` (measured on the JSON encoding of the values, or with `sizeof`
+    for values that are not JSON, such as bytes) is exceeded.
+    """
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        sizeof: Callable[[object], int] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.sizeof = sizeof or (lambda value: len(json.dumps(value, default=str)))
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._total_bytes = 0
+
+    def get(self, key: str):
+        """Returns the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                self._total_bytes -= size
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+            self.stats.incr("hits")
+            return value
+
+    def set(self, key: str, value, ttl_seconds: float | None = None) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._entries[key] = (expires_at, size, value)
+            self._total_bytes += size
+            self.stats.incr("sets")
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.stats.incr("evictions")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            info = {"entries": len(self._entries), "bytes": self._total_bytes}
+        info.update(self.stats.snapshot())
+        return info
+
+class DiskCache:
+    """
+    On-disk cache storing one JSON file per entry, with TTL and size-based eviction.
+
+    When the directory grows past `max_bytes`, the least recently written entries
+    are removed first. Values must be JSON-serializable.
+    """
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 86400):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        """Returns (mtime, path, size) for every entry file."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path, st.st_size))
+        return entries
+
+    def get(self, key: str):
+        """Returns the cached value, or None if it is missing, expired or unreadable."""
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str) -> tuple[object, float] | None:
+        """Like get(), but returns (value, expires_at) so callers can keep the entry's remaining TTL."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.stats.incr("misses")
+            return None
+        expires_at = entry.get("expires_at", 0)
+        if expires_at < time.time():
+            self._remove(path)
+            self.stats.incr("expirations")
+            self.stats.incr("misses")
+            return None
+        self.stats.incr("hits")
+        return entry.get("value"), expires_at
+
+    def set(self, key: str, value, ttl_seconds: float | None = None) -> None:
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        payload = json.dumps({"expires_at": expires_at, "value": value}, ensure_ascii=False, default=str)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"DiskCache: Failed to write cache entry: {e}")
+                return
+            self._total_bytes += os.path.getsize(path) - old_size
+            self.stats.incr("sets")
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: str) -> None:
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """Removes the oldest entries until the directory fits in max_bytes (lock held)."""
+        for _, path, size in sorted(self._scan()):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+            self.stats.incr("evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, path, _ in self._scan():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def info(self) -> dict:
+        info = {"directory": self.directory, "bytes": self._total_bytes}
+        info.update(self.stats.snapshot())
+        return info
+
+class TieredCache:
+    """
+    Two-level cache: a fast in-memory LRU in front of an optional on-disk tier.
+
+    Disk hits are promoted into memory for the rest of their disk TTL. Writes go
+    to both tiers.
+    """
+    def __init__(self, memory: LRUCache, disk: DiskCache | None = None):
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                value, expires_at = entry
+                if value is not None:
+                    self.memory.set(key, value, ttl_seconds=max(0.0, expires_at - time.time()))
+        self.stats.incr("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value, ttl_seconds: float | None = None) -> None:
+        self.memory.set(key, value, ttl_seconds)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl_seconds)
+        self.stats.incr("sets")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def info(self) -> dict:
+        info = self.stats.snapshot()
+        info["memory"] = self.memory.info()
+        if self.disk is not None:
+            info["disk"] = self.disk.info()
+        return info
+
+def build_tiered_cache(
+    ttl_seconds: float,
+    max_entries: int,
+    max_memory_bytes: int,
+    disk_dir: str | None = None,
+    max_disk_bytes: int = 256 * 1024 * 1024,
+) -> TieredCache:
+    """Creates a TieredCache; the disk tier is only added when `disk_dir` is set."""
+    memory = LRUCache(max_entries=max_entries, max_bytes=max_memory_bytes, ttl_seconds=ttl_seconds)
+    disk = DiskCache(disk_dir, max_bytes=max_disk_bytes, ttl_seconds=ttl_seconds) if disk_dir else None
+    return TieredCache(memory, disk)
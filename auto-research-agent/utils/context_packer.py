@@ -0,0 +1,244 @@
+# auto-research-agent/utils/context_packer.py
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Rough characters-per-token ratio for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Lines that label the passages following them (see ResearchAgent.gather)
+HEADING_PATTERN = re.compile(
+    r"^(Web Search Results for query .*:|Internal Document Content:|Source Document: .*)$"
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what when "
+    "where which who why will with how do does about into than then there their they".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (no tokenizer round trip)."""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens without stopwords, for lexical scoring."""
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+@dataclass
+class Passage:
+    """A contiguous chunk of the research content and the heading it appeared under."""
+    index: int
+    text: str
+    heading: str | None
+    tokens: int
+    score: float = 0.0
+    # Heading with no passages of its own above `heading` (the documents header)
+    section: str | None = None
+    # What followed the passage in the content: "\n---" for a '---' line, "\n" for a blank line
+    separator: str = "\n---"
+
+def split_passages(content: str, max_passage_tokens: int = 300) -> list[Passage]:
+    """
+    Splits consolidated research content into passages.
+
+    Passages are separated by blank lines and '---' lines. Heading lines (the web
+    results header, the documents header and 'Source Document: ...' lines) are
+    not passages themselves; they are attached to the passages that follow them,
+    and a heading directly followed by another one is kept as their `section`.
+    Paragraphs longer than `max_passage_tokens` are split into sentence windows.
+    """
+    passages, section, heading, lines = [], None, None, []
+    heading_used = False
+
+    def flush(separator: str):
+        nonlocal heading_used
+        text = "\n".join(lines).strip()
+        lines.clear()
+        if not text:
+            # A '---' after trailing blank lines still closes the previous passage
+            if separator == "\n---" and heading_used and passages[-1].separator == "\n":
+                passages[-1].separator = separator
+            return
+        pieces = _split_long(text, max_passage_tokens)
+        for i, piece in enumerate(pieces):
+            passages.append(Passage(index=len(passages), text=piece, heading=heading, tokens=estimate_tokens(piece),
+                                    section=section, separator=separator if i == len(pieces) - 1 else ""))
+        heading_used = True
+
+    for line in content.splitlines():
+        stripped = line.strip()
+        if HEADING_PATTERN.match(stripped):
+            flush("")
+            if heading is not None and not heading_used:
+                section = heading
+            heading, heading_used = stripped, False
+        elif not stripped:
+            flush("\n")
+        elif stripped == "---":
+            flush("\n---")
+        else:
+            lines.append(line)
+    flush("")
+    return passages
+
+def _split_long(text: str, max_tokens: int) -> list[str]:
+    """Splits text into windows of whole sentences (or words, for run-on text) under max_tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    units = re.split(r"(?<=[.!?])\s+", text)
+    pieces, current = [], ""
+    for unit in units:
+        while len(unit) > max_chars:
+            cut = unit.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(unit[:cut].strip())
+            unit = unit[cut:].strip()
+        if current and len(current) + 1 + len(unit) > max_chars:
+            pieces.append(current)
+            current = unit
+        else:
+            current = f"{current} {unit}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+def join_passages(passages) -> str:
+    """
+    Lays passages out again under their sections and headings (each once per run
+    of passages), separated as they were in the content they were split from.
+    """
+    out, current_section, current_heading = [], None, None
+    for passage in passages:
+        if passage.section != current_section:
+            current_section, current_heading = passage.section, None
+            if current_section:
+                out.append(current_section)
+        if passage.heading != current_heading:
+            current_heading = passage.heading
+            if current_heading:
+                out.append(current_heading)
+        out.append(passage.text + passage.separator)
+    return "\n".join(out)
+
+def score_passages(passages: list[Passage], query: str, k1: float = 1.5, b: float = 0.75) -> None:
+    """Scores each passage against the query with Okapi BM25 (in place)."""
+    query_terms = set(tokenize(query))
+    if not passages or not query_terms:
+        return
+    docs = [Counter(tokenize(f"{p.heading or ''} {p.text}")) for p in passages]
+    avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+    doc_freq = Counter(term for d in docs for term in query_terms if term in d)
+    n = len(docs)
+    for passage, counts in zip(passages, docs):
+        length = sum(counts.values())
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        passage.score = score
+
+def chunk_content(content: str, chunk_tokens: int, max_passage_tokens: int = 300) -> list[str]:
+    """
+    Splits content into chunks of roughly `chunk_tokens`, on passage boundaries.
+
+    Each chunk repeats the heading of its first passage so it can be read on its own.
+    """
+    chunks, lines, used, current_heading = [], [], 0, None
+    for passage in split_passages(content, min(max_passage_tokens, chunk_tokens)):
+        if lines and used + passage.tokens > chunk_tokens:
+            chunks.append("\n".join(lines))
+            lines, used, current_heading = [], 0, None
+        if passage.heading != current_heading:
+            current_heading = passage.heading
+            if current_heading:
+                lines.append(current_heading)
+        lines.append(passage.text + "\n---")
+        used += passage.tokens
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+@dataclass
+class PackedContext:
+    """Result of packing research content into a token budget."""
+    content: str
+    budget: int
+    total_tokens: int
+    packed_tokens: int
+    kept: int | None  # None when the content fit without being split
+    dropped: list[Passage] = field(default_factory=list)
+
+    def summary(self, preview_chars: int = 80, max_listed: int = 20) -> dict:
+        """
+        JSON-serializable description of what was kept and dropped.
+
+        Only the first `max_listed` dropped passages are described; "dropped" and
+        "dropped_tokens" count all of them, so the summary stays small for huge inputs.
+        """
+        return {
+            "budget_tokens": self.budget,
+            "total_tokens": self.total_tokens,
+            "packed_tokens": self.packed_tokens,
+            "kept_passages": self.kept,
+            "dropped": len(self.dropped),
+            "dropped_tokens": sum(p.tokens for p in self.dropped),
+            "dropped_passages": [
+                {
+                    "index": p.index,
+                    "heading": p.heading,
+                    "tokens": p.tokens,
+                    "score": round(p.score, 3),
+                    "preview": p.text[:preview_chars],
+                }
+                for p in self.dropped[:max_listed]
+            ],
+        }
+
+class ContextPacker:
+    """
+    Fits research content into a token budget, keeping the passages most relevant to the query.
+
+    Content that already fits is passed through unchanged. Otherwise passages are
+    ranked with BM25 against the query and added greedily (best first) until the
+    budget is used; the kept passages are emitted in their original order under
+    their original headings.
+    """
+    def __init__(self, token_budget: int, max_passage_tokens: int = 300):
+        self.token_budget = token_budget
+        self.max_passage_tokens = max_passage_tokens
+
+    def pack(self, content: str, query: str, token_budget: int | None = None) -> PackedContext:
+        budget = token_budget or self.token_budget
+        total_tokens = estimate_tokens(content)
+        if total_tokens <= budget:
+            return PackedContext(content=content, budget=budget, total_tokens=total_tokens,
+                                 packed_tokens=total_tokens, kept=None)
+
+        passages = split_passages(content, self.max_passage_tokens)
+        score_passages(passages, query)
+
+        kept, used = set(), 0
+        # Highest score first; earlier passages win ties (search results are ranked)
+        for passage in sorted(passages, key=lambda p: (-p.score, p.index)):
+            heading_cost = estimate_tokens(passage.heading or "")
+            cost = passage.tokens + heading_cost
+            if used + cost > budget:
+                continue
+            kept.add(passage.index)
+            used += cost
+
+        packed = join_passages(p for p in passages if p.index in kept)
+        dropped = [p for p in passages if p.index not in kept]
+        print(f"ContextPacker: Kept {len(kept)}/{len(passages)} passages "
+              f"(~{estimate_tokens(packed)} of ~{total_tokens} tokens, budget {budget}).")
+        return PackedContext(content=packed, budget=budget, total_tokens=total_tokens,
+                             packed_tokens=estimate_tokens(packed), kept=len(kept), dropped=dropped)
@@ -0,0 +1,153 @@
+# auto-research-agent/utils/dedup.py
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from utils.context_packer import Passage, join_passages, split_passages
+from config import CONTEXT_MAX_PASSAGE_TOKENS, DEDUP_SHINGLE_WORDS, DEDUP_SIMILARITY_THRESHOLD
+
+@dataclass
+class DuplicatePassage:
+    """A passage dropped because a kept passage already covers it."""
+    passage: Passage
+    # Index (Passage.index) of the kept passage it repeats
+    duplicate_of: int
+    # Share of the passage's shingles found in that passage
+    similarity: float
+
+@dataclass
+class DedupResult:
+    """Result of removing near-duplicate passages from research content."""
+    content: str
+    threshold: float
+    passages: int
+    chars_saved: int
+    tokens_saved: int
+    dropped: list[DuplicatePassage] = field(default_factory=list)
+
+    def summary(self, preview_chars: int = 80, max_listed: int = 20) -> dict:
+        """
+        JSON-serializable description of what was removed.
+
+        Only the first `max_listed` dropped passages are described; "dropped",
+        "chars_saved" and "tokens_saved" cover all of them.
+        """
+        return {
+            "threshold": self.threshold,
+            "passages": self.passages,
+            "dropped": len(self.dropped),
+            "chars_saved": self.chars_saved,
+            "tokens_saved": self.tokens_saved,
+            "dropped_passages": [
+                {
+                    "index": d.passage.index,
+                    "duplicate_of": d.duplicate_of,
+                    "similarity": round(d.similarity, 3),
+                    "heading": d.passage.heading,
+                    "preview": d.passage.text[:preview_chars],
+                }
+                for d in self.dropped[:max_listed]
+            ],
+        }
+
+class NearDuplicateFilter:
+    """
+    Drops research passages that repeat earlier ones (the same story syndicated
+    across search results, documents that overlap each other).
+
+    Passages (see context_packer.split_passages) are compared as sets of hashed
+    word shingles. Each passage gets a MinHash signature, and its bands are
+    looked up in an LSH index of the passages kept so far; the candidates found
+    there are checked exactly, and the passage is dropped if at least
+    `threshold` of its shingles already appear in one of them. Earlier passages
+    win, so the top-ranked search results and the web results come first.
+
+    Work per passage is bounded (a fixed signature size and at most
+    `max_candidates` exact checks), so the filter runs in time linear in the
+    content size. LSH finds passages of similar length reliably; a short
+    passage repeated inside a much longer one may be missed.
+    """
+    def __init__(
+        self,
+        threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+        shingle_words: int = DEDUP_SHINGLE_WORDS,
+        max_passage_tokens: int = CONTEXT_MAX_PASSAGE_TOKENS,
+        bands: int = 16,
+        rows: int = 2,
+        max_candidates: int = 8,
+    ):
+        self.threshold = threshold
+        self.shingle_words = max(1, shingle_words)
+        self.max_passage_tokens = max_passage_tokens
+        self.bands = bands
+        self.rows = rows
+        self.max_candidates = max_candidates
+        # MinHash "permutations" of the 32-bit shingle hashes are XORs with random
+        # masks: min(map(mask.__xor__, ...)) runs in C, several times faster than
+        # (a * h + b) mod p, and LSH only needs candidates (every match is checked
+        # exactly). A fixed seed keeps the results reproducible.
+        rng = random.Random(20240601)
+        self.masks = [rng.getrandbits(32) for _ in range(bands * rows)]
+
+    def shingles(self, text: str) -> set[int]:
+        """Hashes of the passage's overlapping `shingle_words`-word sequences (the whole text if shorter)."""
+        words = re.findall(r"\w+", text.lower())
+        size = min(self.shingle_words, len(words))
+        return {
+            zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+            for i in range(len(words) - size + 1)
+        } if words else set()
+
+    def signature(self, shingles: set[int]) -> list[int]:
+        return [min(map(mask.__xor__, shingles)) for mask in self.masks]
+
+    def dedup(self, content: str) -> DedupResult:
+        passages = split_passages(content, self.max_passage_tokens)
+        index = defaultdict(list)  # (band, band values) -> positions in `kept`
+        kept, kept_shingles, dropped = [], [], []
+        for passage in passages:
+            shingles = self.shingles(passage.text)
+            if not shingles:
+                kept.append(passage)
+                kept_shingles.append(shingles)
+                continue
+            signature = self.signature(shingles)
+            keys = [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+            best, best_similarity, checked = None, 0.0, set()
+            for position in (p for key in keys for p in index.get(key, ())):
+                if position in checked:
+                    continue
+                if len(checked) >= self.max_candidates:
+                    break
+                checked.add(position)
+                similarity = len(shingles & kept_shingles[position]) / len(shingles)
+                if similarity > best_similarity:
+                    best, best_similarity = position, similarity
+
+            if best is not None and best_similarity >= self.threshold:
+                dropped.append(DuplicatePassage(passage, kept[best].index, best_similarity))
+                continue
+            for key in keys:
+                index[key].append(len(kept))
+            kept.append(passage)
+            kept_shingles.append(shingles)
+
+        if not dropped:
+            return DedupResult(content=content, threshold=self.threshold, passages=len(passages),
+                               chars_saved=0, tokens_saved=0)
+        deduped = join_passages(kept)
+        result = DedupResult(
+            content=deduped,
+            threshold=self.threshold,
+            passages=len(passages),
+            # Only what the dropped passages held, not any layout change from the rejoin
+            chars_saved=sum(len(d.passage.text) for d in dropped),
+            tokens_saved=sum(d.passage.tokens for d in dropped),
+            dropped=dropped,
+        )
+        print(f"NearDuplicateFilter: Dropped {len(dropped)}/{len(passages)} passages "
+              f"(~{result.tokens_saved} tokens, {result.chars_saved} chars).")
+        return result
@@ -0,0 +1,157 @@
+# auto-research-agent/utils/json_stream.py
+
+import json
+
+class IncrementalJSONParser:
+    """
+    Parses a streamed JSON object and reports its top-level fields as soon as they complete.
+
+    Feed it text as it arrives (e.g. chunks of a Gemini response). Each call to
+    feed() returns the events completed by that text:
+
+        ("item", key, index, value)  an element of a top-level array finished
+        ("field", key, value)        a top-level value finished
+
+    Anything before the opening '{' (such as a ```json fence) is ignored. Values
+    are decoded with json.loads once their closing character arrives, so partial
+    values are never reported.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.done = False
+        self.result = {}
+        # Top-level object state: "key", "colon", "value", "primitive_end", "comma"
+        self.expect = "key"
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+        self.value_kind = None  # "string", "container", "primitive"
+        # Element tracking for top-level arrays (depth 2)
+        self.array = False
+        self.item_start = None
+        self.item_index = 0
+
+    def feed(self, text: str) -> list[tuple]:
+        """Adds streamed text and returns the events it completed."""
+        events = []
+        if self.done:
+            return events
+        self.buffer += text
+        buf = self.buffer
+        while self.pos < len(buf):
+            i = self.pos
+            c = buf[i]
+            self.pos += 1
+
+            if self.depth == 0:
+                if c == "{":
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    self._string_closed(i, events)
+                continue
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1:
+                    if self.expect == "key":
+                        self.key_start = i
+                    elif self.expect == "value":
+                        self._start_value(i, "string")
+                elif self.depth == 2 and self.array and self.item_start is None:
+                    self.item_start = i
+                continue
+
+            if c in " \t\r\n":
+                continue
+
+            if self.depth == 1:
+                if self.expect == "colon" and c == ":":
+                    self.expect = "value"
+                elif self.expect == "value":
+                    if c in "{[":
+                        self._start_value(i, "container")
+                        self.array = c == "["
+                        self.item_index = 0
+                        self.item_start = None
+                        self.depth += 1
+                    else:
+                        self._start_value(i, "primitive")
+                elif self.expect == "primitive_end" and c in ",}":
+                    self._finish_value(i, events)
+                    if c == "}":
+                        self.done = True
+                        return events
+                    self.expect = "key"  # the ',' ending the primitive was consumed
+                elif self.expect == "comma" and c == ",":
+                    self.expect = "key"
+                elif c == "}":
+                    self.done = True
+                    return events
+                continue
+
+            # depth >= 2: inside a top-level container
+            if c in "{[":
+                if self.depth == 2 and self.array and self.item_start is None:
+                    self.item_start = i
+                self.depth += 1
+            elif c in "}]":
+                if self.depth == 2 and self.array and self.item_start is not None:
+                    self._finish_item(i, events)  # last primitive element before ']'
+                self.depth -= 1
+                if self.depth == 2 and self.array and self.item_start is not None:
+                    self._finish_item(i + 1, events)  # element container closed
+                elif self.depth == 1:
+                    self._finish_value(i + 1, events)
+            elif self.depth == 2 and self.array:
+                if c == ",":
+                    if self.item_start is not None:
+                        self._finish_item(i, events)
+                elif self.item_start is None:
+                    self.item_start = i
+        return events
+
+    def _start_value(self, i: int, kind: str) -> None:
+        self.value_start = i
+        self.value_kind = kind
+        if kind == "primitive":
+            self.expect = "primitive_end"
+
+    def _string_closed(self, i: int, events: list) -> None:
+        """Handles the end of a string at the top level (a key or a value) or as an array element."""
+        if self.depth == 1 and self.expect == "key" and self.key_start is not None:
+            self.key = json.loads(self.buffer[self.key_start:i + 1])
+            self.key_start = None
+            self.expect = "colon"
+        elif self.depth == 1 and self.value_kind == "string" and self.value_start is not None:
+            self._finish_value(i + 1, events)
+        elif self.depth == 2 and self.array and self.item_start is not None and self.buffer[self.item_start] == '"':
+            self._finish_item(i + 1, events)
+
+    def _finish_item(self, end: int, events: list) -> None:
+        raw = self.buffer[self.item_start:end].strip()
+        self.item_start = None
+        if not raw:
+            return
+        events.append(("item", self.key, self.item_index, json.loads(raw)))
+        self.item_index += 1
+
+    def _finish_value(self, end: int, events: list) -> None:
+        value = json.loads(self.buffer[self.value_start:end].strip())
+        self.result[self.key] = value
+        events.append(("field", self.key, value))
+        self.value_start = None
+        self.value_kind = None
+        self.array = False
+        self.expect = "comma"
@@ -0,0 +1,71 @@
+# auto-research-agent/utils/lazy.py
+
+import importlib
+import time
+
+# Module name -> seconds its first import took through a LazyModule (shown by /health)
+IMPORT_SECONDS = {}
+# Every LazyModule created, for preload_all()
+_lazy_modules = []
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access.
+
+    Heavy dependencies (Gemini SDK, ReportLab) are bound at module level as
+    `genai = lazy_import("google.generativeai")`, so importing the app stays
+    cheap and the cost moves to the first use or to the boot warm-up. Setting
+    or deleting attributes also goes to the real module, so
+    unittest.mock.patch("pkg.mod.genai.GenerativeModel") keeps working.
+    """
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # importlib's per-module locks make concurrent first uses safe; a
+            # lock here could deadlock against an import running on another thread
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            IMPORT_SECONDS.setdefault(self._name, round(time.perf_counter() - start, 4))
+            object.__setattr__(self, "_module", module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a LazyModule for `name` (e.g. "reportlab.platypus")."""
+    module = LazyModule(name)
+    _lazy_modules.append(module)
+    return module
+
+def preload_all() -> dict[str, float]:
+    """
+    Imports every lazy module not loaded yet (for the background warm-up) and
+    returns the import times recorded so far. Modules that fail to import are
+    reported and left for their first use to raise.
+    """
+    for module in list(_lazy_modules):
+        if not module.loaded:
+            try:
+                module._load()
+            except ImportError as e:
+                print(f"Lazy imports: Could not preload {module._name}: {e}")
+    return dict(IMPORT_SECONDS)
@@ -0,0 +1,260 @@
+# auto-research-agent/utils/metrics.py
+
+import bisect
+import threading
+import time
+
+# Latency buckets (seconds) covering fast cache-backed stages up to slow Gemini calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+class _Metric:
+    """A named metric with one child per combination of label values."""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Returns the child for these label values (in `labelnames` order), creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            children = list(self._children.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in children
+        ]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            children = list(self._children.items())
+        lines = []
+        for values, child in children:
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+
+    Recording a sample takes one short lock per series, so instrumentation can
+    stay on in production. Metrics are only ever added, never removed.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# --- Workflow ---
+RUNS = REGISTRY.counter("research_runs_total", "Workflow runs by final status.", ("status",))
+RUN_SECONDS = REGISTRY.histogram("research_run_duration_seconds", "Wall time of a workflow run.")
+STAGE_SECONDS = REGISTRY.histogram("research_stage_duration_seconds", "Time spent running a workflow stage.", ("stage",))
+STAGES_IN_FLIGHT = REGISTRY.gauge("research_stages_in_flight", "Workflow stages currently running.", ("stage",))
+STAGE_FAILURES = REGISTRY.counter(
+    "research_stage_failures_total", "Workflow stages that failed, raised or timed out.", ("stage", "reason"))
+
+# --- Research content ---
+DEDUP_PASSAGES = REGISTRY.counter("research_dedup_dropped_passages_total", "Research passages dropped as near-duplicates.")
+DEDUP_SAVED = REGISTRY.counter(
+    "research_dedup_saved_total", "Research content removed as near-duplicate, in chars and estimated tokens.", ("unit",))
+
+# --- External calls (Serper, Gemini, GCS) ---
+CALL_SECONDS = REGISTRY.histogram(
+    "research_external_call_duration_seconds", "Latency of calls to external services.", ("service", "operation"))
+CALLS_IN_FLIGHT = REGISTRY.gauge("research_external_calls_in_flight", "External calls currently waiting.", ("service",))
+CALL_ERRORS = REGISTRY.counter(
+    "research_external_call_errors_total", "External calls that raised or returned an error.", ("service", "operation"))
+CALL_BYTES = REGISTRY.counter(
+    "research_external_bytes_total", "Payload bytes (or characters, for Gemini text) exchanged with external services.",
+    ("service", "direction"))
+GEMINI_TOKENS = REGISTRY.counter("research_gemini_tokens_total", "Gemini tokens reported by the API.", ("kind",))
+
+# --- Rate limiting ---
+RATE_LIMIT_CONCURRENCY = REGISTRY.gauge(
+    "research_rate_limit_concurrency", "Current adaptive concurrency limit per provider.", ("provider",))
+RATE_LIMIT_WAITING = REGISTRY.gauge("research_rate_limit_waiting", "Calls queued for a provider slot.", ("provider",))
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "research_rate_limit_wait_seconds", "Time calls spent queued for a provider slot.", ("provider",))
+RATE_LIMIT_REJECTIONS = REGISTRY.counter(
+    "research_rate_limit_rejections_total", "Calls refused by a provider limiter (queue_full or timeout).",
+    ("provider", "reason"))
+
+class track_call:
+    """
+    Context manager timing one external call.
+
+    Records latency, in-flight count and (if the block raises or error() is
+    called) an error for the (service, operation) pair:
+
+        with track_call("serper", "search") as call:
+            response = session.post(...)
+            call.add_bytes(sent=len(payload), received=len(response.content))
+    """
+    __slots__ = ("service", "operation", "start", "failed")
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        self.failed = False
+
+    def __enter__(self) -> "track_call":
+        CALLS_IN_FLIGHT.labels(self.service).inc()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        CALL_SECONDS.labels(self.service, self.operation).observe(time.perf_counter() - self.start)
+        CALLS_IN_FLIGHT.labels(self.service).dec()
+        # A generator closed early (e.g. an abandoned stream) is not a failed call
+        if (exc_type is not None and not issubclass(exc_type, GeneratorExit)) or self.failed:
+            CALL_ERRORS.labels(self.service, self.operation).inc()
+        return False
+
+    def error(self) -> None:
+        """Counts the call as failed without raising (e.g. an HTTP error status)."""
+        self.failed = True
+
+    def add_bytes(self, sent: int = 0, received: int = 0) -> None:
+        if sent:
+            CALL_BYTES.labels(self.service, "sent").inc(sent)
+        if received:
+            CALL_BYTES.labels(self.service, "received").inc(received)
+
+def record_gemini_usage(response) -> int | None:
+    """
+    Adds the prompt and output token counts from a Gemini response (or final
+    stream chunk), if present, and returns their total (None if absent).
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    prompt = getattr(usage, "prompt_token_count", 0) or 0
+    output = getattr(usage, "candidates_token_count", 0) or 0
+    total = None
+    if isinstance(prompt, int) and prompt:
+        GEMINI_TOKENS.labels("prompt").inc(prompt)
+        total = prompt
+    if isinstance(output, int) and output:
+        GEMINI_TOKENS.labels("output").inc(output)
+        total = (total or 0) + output
+    return total
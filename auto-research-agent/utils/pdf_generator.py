@@ -1,114 +1,89 @@
 # auto-research-agent/utils/pdf_generator.py
 
+import io
 import os
-import jinja2
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
+import threading
+from utils.lazy import lazy_import
 
-def generate_pdf_from_template(
-    data: dict,
-    template_name: str,
-    template_dir: str,
-    output_path: str
-) -> bool:
-    """
-    Generates a PDF file from a Jinja2 HTML template and a data dictionary using ReportLab.
-
-    Args:
-        data: The dictionary containing data to be rendered in the template.
-        template_name: The filename of the Jinja2 template (e.g., "report_template.html").
-        template_dir: The directory where the template is located.
-        output_path: The full path where the output PDF will be saved.
+# ReportLab and Jinja2 are imported on first use (normally the agent pool warm-up)
+jinja2 = lazy_import("jinja2")
+pagesizes = lazy_import("reportlab.lib.pagesizes")
+platypus = lazy_import("reportlab.platypus")
+styles = lazy_import("reportlab.lib.styles")
+colors = lazy_import("reportlab.lib.colors")
+enums = lazy_import("reportlab.lib.enums")
 
-    Returns:
-        True if the PDF was generated successfully, False otherwise.
+class ReportRenderer:
     """
-    if not data:
-        print("PDF Generator: No data provided. Aborting.")
-        return False
-
-    print(f"PDF Generator: Starting PDF generation...")
-    print(f"PDF Generator: Template directory: {template_dir}")
-    print(f"PDF Generator: Template name: {template_name}")
-    print(f"PDF Generator: Output path: {output_path}")
-    print(f"PDF Generator: Data keys: {list(data.keys())}")
+    Renders report PDFs with state that is built once and reused for every report.
 
-    try:
-        # Check if template directory exists
-        if not os.path.exists(template_dir):
-            print(f"PDF Generator Error: Template directory does not exist: {template_dir}")
-            return False
-
-        # Check if template file exists
-        template_path = os.path.join(template_dir, template_name)
-        if not os.path.exists(template_path):
-            print(f"PDF Generator Error: Template file does not exist: {template_path}")
-            return False
-
-        # Ensure output directory exists
-        output_dir = os.path.dirname(output_path)
-        if not os.path.exists(output_dir):
-            print(f"PDF Generator: Creating output directory: {output_dir}")
-            os.makedirs(output_dir, exist_ok=True)
+    The paragraph styles and the Jinja2 environment are created in the
+    constructor; the HTML template is compiled on first use and only when HTML
+    is actually requested (the PDF is laid out directly with ReportLab, so the
+    HTML version is not needed for it). Renderers hold no per-report state and
+    can be shared between threads.
+    """
+    def __init__(self, template_dir: str, template_name: str):
+        self.template_dir = template_dir
+        self.template_name = template_name
+        # auto_reload=False: the compiled template is kept for the life of the process
+        self.template_env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(searchpath=template_dir),
+            auto_reload=False,
+        )
+        self._template = None
+        self._template_lock = threading.Lock()
 
-        # --- 1. Set up Jinja2 Environment ---
-        template_loader = jinja2.FileSystemLoader(searchpath=template_dir)
-        template_env = jinja2.Environment(loader=template_loader)
-        template = template_env.get_template(template_name)
-
-        # --- 2. Render HTML from Template ---
-        html_content = template.render(data=data)
-        print(f"PDF Generator: Successfully rendered HTML template")
-
-        # --- 3. Generate PDF using ReportLab ---
-        doc = SimpleDocTemplate(output_path, pagesize=A4)
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
+        sample = styles.getSampleStyleSheet()
+        self.title_style = styles.ParagraphStyle(
             'CustomTitle',
-            parent=styles['Heading1'],
+            parent=sample['Heading1'],
             fontSize=16,
             spaceAfter=30,
-            alignment=TA_CENTER,
+            alignment=enums.TA_CENTER,
             textColor=colors.darkblue
         )
-        
-        heading_style = ParagraphStyle(
+        self.heading_style = styles.ParagraphStyle(
             'CustomHeading',
-            parent=styles['Heading2'],
+            parent=sample['Heading2'],
             fontSize=14,
             spaceAfter=12,
             spaceBefore=20,
             textColor=colors.darkblue
         )
-        
-        body_style = ParagraphStyle(
+        self.body_style = styles.ParagraphStyle(
             'CustomBody',
-            parent=styles['Normal'],
+            parent=sample['Normal'],
             fontSize=11,
             spaceAfter=6,
-            alignment=TA_JUSTIFY
+            alignment=enums.TA_JUSTIFY
         )
 
-        # Build PDF content
+    def render_html(self, data: dict) -> str:
+        """Renders the HTML version of the report from the compiled template."""
+        if self._template is None:
+            with self._template_lock:
+                if self._template is None:
+                    self._template = self.template_env.get_template(self.template_name)
+        return self._template.render(data=data)
+
+    def build_story(self, data: dict) -> list:
+        """Lays out the report data as a list of ReportLab flowables."""
+        title_style, heading_style, body_style = self.title_style, self.heading_style, self.body_style
+        Paragraph, Spacer = platypus.Paragraph, platypus.Spacer
         story = []
-        
+
         # Add title
         if 'title' in data:
             story.append(Paragraph(data['title'], title_style))
             story.append(Spacer(1, 20))
-        
+
         # Add executive summary
         if 'executive_summary' in data:
             story.append(Paragraph("Executive Summary", heading_style))
             story.append(Paragraph(data['executive_summary'], body_style))
             story.append(Spacer(1, 20))
-        
+
         # Add key insights
         if 'key_insights' in data and isinstance(data['key_insights'], list):
             story.append(Paragraph("Key Insights", heading_style))
@@ -117,14 +92,14 @@ def generate_pdf_from_template(
                     insight_text = insight.get('insight', '')
                     explanation = insight.get('explanation', '')
                     relevance_score = insight.get('relevance_score', 'N/A')
-                    
+
                     if insight_text:
                         story.append(Paragraph(f"<b>{insight_text}</b>", body_style))
                     if explanation:
                         story.append(Paragraph(explanation, body_style))
                     story.append(Paragraph(f"Relevance Score: {relevance_score}/10", body_style))
                     story.append(Spacer(1, 12))
-        
+
         # Add source analysis
         if 'source_analysis' in data and isinstance(data['source_analysis'], dict):
             story.append(Paragraph("Source Analysis", heading_style))
@@ -133,13 +108,13 @@ def generate_pdf_from_template(
             story.append(Paragraph(f"Overall Sentiment: {sentiment}", body_style))
             story.append(Paragraph(f"Confidence in Source: {confidence}", body_style))
             story.append(Spacer(1, 20))
-        
+
         # Add conclusion
         if 'conclusion' in data:
             story.append(Paragraph("Conclusion", heading_style))
             story.append(Paragraph(data['conclusion'], body_style))
             story.append(Spacer(1, 20))
-        
+
         # Add metadata if available
         if 'metadata' in data:
             story.append(Paragraph("Report Information", heading_style))
@@ -148,17 +123,84 @@ def generate_pdf_from_template(
                 story.append(Paragraph(f"<b>{key}:</b> {value}", body_style))
                 story.append(Spacer(1, 6))
 
-        # Build PDF
-        doc.build(story)
+        return story
+
+    def render(self, data: dict, target) -> None:
+        """Writes the PDF to `target`, a file path or a writable binary file object."""
+        doc = platypus.SimpleDocTemplate(target, pagesize=pagesizes.A4)
+        doc.build(self.build_story(data))
+
+    def render_to_bytes(self, data: dict) -> bytes:
+        """Renders the PDF into memory and returns its bytes."""
+        buffer = io.BytesIO()
+        self.render(data, buffer)
+        return buffer.getvalue()
+
+    def render_to_file(self, data: dict, output_path: str) -> None:
+        """Renders the PDF to `output_path`, creating its directory if needed."""
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            print(f"PDF Generator: Creating output directory: {output_dir}")
+            os.makedirs(output_dir, exist_ok=True)
+        self.render(data, output_path)
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+def get_report_renderer(template_dir: str, template_name: str) -> ReportRenderer:
+    """Returns the process-wide renderer for a template, creating it on first use."""
+    key = (os.path.abspath(template_dir), template_name)
+    renderer = _renderers.get(key)
+    if renderer is None:
+        with _renderers_lock:
+            renderer = _renderers.get(key)
+            if renderer is None:
+                renderer = _renderers[key] = ReportRenderer(template_dir, template_name)
+    return renderer
+
+def generate_pdf_from_template(
+    data: dict,
+    template_name: str,
+    template_dir: str,
+    output_path: str
+) -> bool:
+    """
+    Generates a PDF file from a data dictionary using ReportLab.
+
+    Rendering goes through the shared ReportRenderer for the template, so styles
+    and the Jinja2 environment are only built once per process.
+
+    Args:
+        data: The dictionary containing data to be rendered in the template.
+        template_name: The filename of the Jinja2 template (e.g., "report_template.html").
+        template_dir: The directory where the template is located.
+        output_path: The full path where the output PDF will be saved.
+
+    Returns:
+        True if the PDF was generated successfully, False otherwise.
+    """
+    if not data:
+        print("PDF Generator: No data provided. Aborting.")
+        return False
+
+    print(f"PDF Generator: Starting PDF generation...")
+    print(f"PDF Generator: Output path: {output_path}")
+    print(f"PDF Generator: Data keys: {list(data.keys())}")
+
+    try:
+        # Check if template file exists
+        template_path = os.path.join(template_dir, template_name)
+        if not os.path.exists(template_path):
+            print(f"PDF Generator Error: Template file does not exist: {template_path}")
+            return False
+
+        get_report_renderer(template_dir, template_name).render_to_file(data, output_path)
         print(f"PDF Generator: Successfully created PDF at {output_path}")
         return True
 
-    except jinja2.TemplateNotFound as e:
-        print(f"PDF Generator Error: Template '{template_name}' not found in '{template_dir}'. Error: {e}")
-        return False
     except Exception as e:
         print(f"PDF Generator Error: An unexpected error occurred. Error type: {type(e).__name__}")
         print(f"PDF Generator Error: Error details: {e}")
         import traceback
         print(f"PDF Generator Error: Traceback: {traceback.format_exc()}")
-        return False
\ No newline at end of file
+        return False
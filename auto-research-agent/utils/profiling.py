@@ -0,0 +1,163 @@
+# auto-research-agent/utils/profiling.py
+
+import cProfile
+import glob
+import json
+import os
+import pstats
+import re
+import threading
+import time
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Where CPU time goes, by the module or builtin a function belongs to; first match wins
+CATEGORIES = (
+    ("reportlab", ("reportlab",)),
+    ("jinja2", ("jinja2", "markupsafe")),
+    ("json", ("json", "json_stream")),
+    ("network", ("socket", "ssl", "http", "urllib3", "requests", "google/api_core", "google/resumable_media",
+                 "google/auth", "grpc")),
+    ("waiting", ("acquire", "wait", "sleep", "threading.py")),
+)
+
+def _category(func_key: tuple) -> str:
+    filename, _, name = func_key
+    location = f"{filename} {name}".replace("\\", "/")
+    for category, markers in CATEGORIES:
+        if any(marker in location for marker in markers):
+            return category
+    return "other"
+
+class ProfileSession:
+    """
+    CPU profile and stage timings for one workflow run.
+
+    cProfile only sees the thread it is enabled on, so each stage is profiled
+    on its own worker thread and the results are merged. Threads a stage starts
+    itself (e.g. concurrent GCS reads) are not profiled; time the stage spends
+    waiting on them shows up as lock waits. From Python 3.12 only one profiler
+    can be active per process, so a stage that starts while another is being
+    profiled runs unprofiled (listed under "unprofiled_stages").
+    """
+    def __init__(self, run_id: str, query: str):
+        self.profile_id = run_id
+        self.query = query
+        self.created_at = time.time()
+        self._stats = None
+        self._stage_cpu = {}
+        self._unprofiled = set()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def run_stage(self, name: str, func, ctx):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # "Another profiling tool is already active" (Python 3.12+)
+            print(f"Profiling: Running stage '{name}' unprofiled: {e}")
+            with self._lock:
+                self._unprofiled.add(name)
+            return func(ctx)
+        try:
+            return func(ctx)
+        finally:
+            profiler.disable()
+            self._add(name, profiler)
+
+    def _add(self, name: str, profiler: cProfile.Profile) -> None:
+        stats = pstats.Stats(profiler)
+        with self._lock:
+            if self._closed:
+                return  # a timed-out stage finishing after the profile was saved
+            self._stage_cpu[name] = round(stats.total_tt, 4)
+            if self._stats is None:
+                self._stats = stats
+            else:
+                self._stats.add(stats)
+
+    def summary(self, outcome, top: int = 25) -> dict:
+        """Stage wall/profiled times, a breakdown by category and the top functions by cumulative time."""
+        with self._lock:
+            self._closed = True
+            stats = self._stats
+        first_start = min(outcome.started.values()) if outcome.started else 0.0
+        stages = {
+            name: {
+                "status": outcome.status.get(name),
+                "start_offset_seconds": round(outcome.started[name] - first_start, 4) if name in outcome.started else None,
+                "wall_seconds": outcome.durations.get(name),
+                "profiled_seconds": self._stage_cpu.get(name),
+            }
+            for name in outcome.status
+        }
+        breakdown, functions = {}, []
+        if stats is not None:
+            for key, (_, calls, total, cumulative, _) in stats.stats.items():
+                category = _category(key)
+                breakdown[category] = breakdown.get(category, 0.0) + total
+                functions.append((cumulative, total, calls, key))
+            functions.sort(reverse=True)
+        return {
+            "profile_id": self.profile_id,
+            "query": self.query,
+            "created_at": self.created_at,
+            "stages": stages,
+            "unprofiled_stages": sorted(self._unprofiled),
+            "breakdown_seconds": {k: round(v, 4) for k, v in sorted(breakdown.items(), key=lambda kv: -kv[1])},
+            "top_functions": [
+                {
+                    "function": f"{os.path.basename(key[0])}:{key[1]}({key[2]})",
+                    "calls": calls,
+                    "total_seconds": round(total, 4),
+                    "cumulative_seconds": round(cumulative, 4),
+                }
+                for cumulative, total, calls, key in functions[:top]
+            ],
+        }
+
+    def save(self, outcome, directory: str, max_profiles: int) -> dict:
+        """Writes <id>.prof (pstats format) and <id>.json (the summary) and prunes old profiles."""
+        summary = self.summary(outcome)
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.profile_id)
+        if self._stats is not None:
+            self._stats.dump_stats(base + ".prof")
+        summary["has_pstats"] = self._stats is not None
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        prune_profiles(directory, max_profiles)
+        print(f"Profiling: Saved profile {self.profile_id} for '{self.query}'.")
+        return summary
+
+def prune_profiles(directory: str, max_profiles: int) -> None:
+    summaries = sorted(glob.glob(os.path.join(directory, "*.json")), key=os.path.getmtime)
+    for path in summaries[:max(0, len(summaries) - max_profiles)]:
+        for old in (path, path[:-len(".json")] + ".prof"):
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+def list_profiles(directory: str) -> list[dict]:
+    """Returns the saved profiles, newest first, without their function tables."""
+    profiles = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({k: summary.get(k) for k in ("profile_id", "query", "created_at", "has_pstats")})
+    return sorted(profiles, key=lambda p: p["created_at"] or 0, reverse=True)
+
+def load_profile(directory: str, profile_id: str) -> dict | None:
+    """Returns a saved profile summary, or None (also for ids that are not profile ids)."""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(directory, profile_id + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
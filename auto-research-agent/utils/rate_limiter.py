@@ -0,0 +1,336 @@
+# auto-research-agent/utils/rate_limiter.py
+
+import asyncio
+import threading
+import time
+from config import (
+    GEMINI_REQUESTS_PER_MINUTE,
+    GEMINI_TOKENS_PER_MINUTE,
+    GEMINI_MAX_CONCURRENCY,
+    SERPER_REQUESTS_PER_MINUTE,
+    SERPER_MAX_CONCURRENCY,
+    RATE_LIMIT_MIN_CONCURRENCY,
+    RATE_LIMIT_MAX_QUEUE,
+    RATE_LIMIT_MAX_WAIT_SECONDS,
+)
+from utils.metrics import RATE_LIMIT_CONCURRENCY, RATE_LIMIT_REJECTIONS, RATE_LIMIT_WAIT_SECONDS, RATE_LIMIT_WAITING
+
+# How often acquire_async() re-checks while waiting for a concurrency slot
+ASYNC_POLL_SECONDS = 0.05
+
+class RateLimitError(Exception):
+    """A call could not get a slot from its provider's limiter in time."""
+    def __init__(self, provider: str, message: str, retry_after: float):
+        super().__init__(message)
+        self.provider = provider
+        # Seconds after which trying again is likely to get a slot
+        self.retry_after = retry_after
+
+class RateLimitQueueFull(RateLimitError):
+    """Too many callers are already waiting for the provider."""
+
+class RateLimitTimeout(RateLimitError):
+    """The caller's deadline passed before a slot became free."""
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider errors meaning "slow down" (HTTP 429 / gRPC RESOURCE_EXHAUSTED)."""
+    return getattr(error, "code", None) == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+class TokenBucket:
+    """
+    Refills at `per_minute` units a minute up to `capacity` (default: one
+    minute's worth). A rate of 0 or less means unlimited. Not thread-safe on
+    its own; ProviderLimiter calls it under its lock.
+    """
+    def __init__(self, per_minute: float, capacity: float | None = None, now: float = 0.0):
+        self.rate = max(0.0, per_minute) / 60.0
+        self.capacity = capacity if capacity is not None else max(0.0, per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        if not self.unlimited:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Corrects an estimate afterwards; the level may go negative, which delays later callers."""
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level - amount)
+
+class Permit:
+    """
+    A slot held for one provider call. Release it with `with`, or release(); call
+    throttled() first if the provider answered 429.
+    """
+    def __init__(self, limiter: "ProviderLimiter", tokens: int, acquired_at: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.acquired_at = acquired_at
+        self._throttled = False
+        self._retry_after = None
+        self._used_tokens = None
+        self._released = False
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """Marks the call as rate limited by the provider; `retry_after` pauses every caller that long."""
+        self._throttled = True
+        self._retry_after = retry_after
+
+    def record_tokens(self, used: int) -> None:
+        """Replaces the estimated token count with what the provider reported."""
+        self._used_tokens = used
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter._release(self)
+
+    def __enter__(self) -> "Permit":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.release()
+        return False
+
+class ProviderLimiter:
+    """
+    Shared quota for one external provider (Gemini, Serper).
+
+    A call needs a concurrency slot, one request from the requests/min bucket
+    and its estimated tokens from the tokens/min bucket. Callers that cannot get
+    all three wait (at most `max_queue` of them) until their deadline, then get
+    RateLimitTimeout; callers beyond `max_queue` get RateLimitQueueFull at once.
+
+    The concurrency limit adapts AIMD-style: a 429 halves it (once per burst of
+    429s) and pauses the provider for its Retry-After, and every `limit`
+    successful calls grow it by one, up to `max_concurrency`.
+    """
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 8,
+        min_concurrency: int = RATE_LIMIT_MIN_CONCURRENCY,
+        max_queue: int = RATE_LIMIT_MAX_QUEUE,
+        max_wait: float = RATE_LIMIT_MAX_WAIT_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.clock = clock
+        now = clock()
+        self.requests = TokenBucket(requests_per_minute, now=now)
+        self.tokens = TokenBucket(tokens_per_minute, now=now)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.limit = self.max_concurrency
+        self._successes = 0
+        self._in_flight = 0
+        self._waiting = 0
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+        self._stats = {"acquired": 0, "throttled": 0, "rejected": 0, "timed_out": 0, "wait_seconds": 0.0}
+        RATE_LIMIT_CONCURRENCY.labels(name).set(self.limit)
+
+    def deadline(self) -> float:
+        """A deadline `max_wait` seconds from now, on this limiter's clock."""
+        return self.clock() + self.max_wait
+
+    def _wait_seconds(self, tokens: int, now: float) -> float:
+        """Seconds until the call could start; inf while it waits for a concurrency slot."""
+        wait = max(self._paused_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+        if self._in_flight >= self.limit:
+            return float("inf")
+        return wait
+
+    def acquire(self, tokens: int = 0, deadline: float | None = None) -> Permit:
+        """
+        Waits for a slot for one call of about `tokens` tokens.
+
+        Args:
+            tokens: Estimated tokens for the tokens/min quota (0 for Serper).
+            deadline: clock() value to give up at; defaults to max_wait from now.
+                Share one deadline across retries of the same call.
+
+        Raises:
+            RateLimitQueueFull: If max_queue callers are already waiting.
+            RateLimitTimeout: If no slot is free before the deadline.
+        """
+        start = self.clock()
+        deadline = start + self.max_wait if deadline is None else deadline
+        with self._cond:
+            wait = self._enqueue(tokens, start)
+            try:
+                while wait > 0:
+                    remaining = self._check_deadline(wait, deadline)
+                    self._cond.wait(min(wait, remaining))
+                    wait = self._wait_seconds(tokens, self.clock())
+                return self._grant(tokens, start)
+            finally:
+                self._dequeue()
+
+    async def acquire_async(self, tokens: int = 0, deadline: float | None = None) -> Permit:
+        """
+        Like acquire(), but waits with asyncio.sleep so the event loop keeps
+        running other calls. Slots released by other callers are noticed within
+        ASYNC_POLL_SECONDS.
+        """
+        start = self.clock()
+        deadline = start + self.max_wait if deadline is None else deadline
+        with self._cond:
+            self._enqueue(tokens, start)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._wait_seconds(tokens, self.clock())
+                    if wait <= 0:
+                        return self._grant(tokens, start)
+                    remaining = self._check_deadline(wait, deadline)
+                await asyncio.sleep(min(wait, remaining, ASYNC_POLL_SECONDS))
+        finally:
+            with self._cond:
+                self._dequeue()
+
+    def _enqueue(self, tokens: int, now: float) -> float:
+        """Counts the caller as waiting (under the lock) and returns its wait; refuses it if the queue is full."""
+        wait = self._wait_seconds(tokens, now)
+        if wait > 0 and self._waiting >= self.max_queue:
+            self._stats["rejected"] += 1
+            RATE_LIMIT_REJECTIONS.labels(self.name, "queue_full").inc()
+            raise RateLimitQueueFull(
+                self.name, f"Too many requests are waiting for {self.name}; try again shortly.",
+                retry_after=self._retry_hint(wait))
+        self._waiting += 1
+        RATE_LIMIT_WAITING.labels(self.name).inc()
+        return wait
+
+    def _dequeue(self) -> None:
+        self._waiting -= 1
+        RATE_LIMIT_WAITING.labels(self.name).dec()
+
+    def _check_deadline(self, wait: float, deadline: float) -> float:
+        """Returns the seconds left before the deadline, or raises RateLimitTimeout if waiting cannot succeed."""
+        remaining = deadline - self.clock()
+        # A bucket that refills after the deadline cannot help; fail now instead of sleeping
+        if remaining <= 0 or (wait != float("inf") and wait > remaining):
+            self._stats["timed_out"] += 1
+            RATE_LIMIT_REJECTIONS.labels(self.name, "timeout").inc()
+            raise RateLimitTimeout(
+                self.name, f"Timed out waiting for {self.name} quota.", retry_after=self._retry_hint(wait))
+        return remaining
+
+    def _grant(self, tokens: int, start: float) -> Permit:
+        """Takes the quota for a call that may start now (under the lock)."""
+        now = self.clock()
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        self._in_flight += 1
+        self._stats["acquired"] += 1
+        self._stats["wait_seconds"] += now - start
+        RATE_LIMIT_WAIT_SECONDS.labels(self.name).observe(now - start)
+        return Permit(self, tokens, now)
+
+    def _retry_hint(self, wait: float) -> float:
+        if wait == float("inf"):
+            wait = max(1.0, self._paused_until - self.clock())
+        return round(min(max(wait, 1.0), self.max_wait), 1)
+
+    def _release(self, permit: Permit) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            now = self.clock()
+            if permit._throttled:
+                self._stats["throttled"] += 1
+                # Calls already in flight when the limit dropped report the same overload
+                if permit.acquired_at > self._last_decrease:
+                    self.limit = max(self.min_concurrency, self.limit // 2)
+                    self._successes = 0
+                    self._last_decrease = now
+                    print(f"RateLimiter: {self.name} returned 429; concurrency limit lowered to {self.limit}.")
+                if permit._retry_after:
+                    self._paused_until = max(self._paused_until, now + permit._retry_after)
+            elif self.limit < self.max_concurrency:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            if permit._used_tokens is not None:
+                self.tokens.adjust(permit._used_tokens - permit.tokens)
+            RATE_LIMIT_CONCURRENCY.labels(self.name).set(self.limit)
+            self._cond.notify_all()
+
+    def check_capacity(self) -> None:
+        """Raises RateLimitQueueFull if new callers would be turned away right now."""
+        with self._cond:
+            wait = self._wait_seconds(0, self.clock())
+            if wait > 0 and self._waiting >= self.max_queue:
+                raise RateLimitQueueFull(
+                    self.name, f"Too many requests are waiting for {self.name}; try again shortly.",
+                    retry_after=self._retry_hint(wait))
+
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "concurrency_limit": self.limit,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "paused_seconds": round(max(0.0, self._paused_until - self.clock()), 2),
+            })
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+# Provider name -> limiter settings from config
+PROVIDER_LIMITS = {
+    "gemini": {
+        "requests_per_minute": GEMINI_REQUESTS_PER_MINUTE,
+        "tokens_per_minute": GEMINI_TOKENS_PER_MINUTE,
+        "max_concurrency": GEMINI_MAX_CONCURRENCY,
+    },
+    "serper": {
+        "requests_per_minute": SERPER_REQUESTS_PER_MINUTE,
+        "max_concurrency": SERPER_MAX_CONCURRENCY,
+    },
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider: str) -> ProviderLimiter:
+    """Returns the process-wide limiter for a provider in PROVIDER_LIMITS, creating it on first use."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limiter = _limiters[provider] = ProviderLimiter(provider, **PROVIDER_LIMITS[provider])
+    return limiter
+
+def check_capacity() -> None:
+    """Raises RateLimitQueueFull if any provider's wait queue is full, so new work can be refused up front."""
+    for limiter in list(_limiters.values()):
+        limiter.check_capacity()
+
+def rate_limiter_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in list(_limiters.items())}
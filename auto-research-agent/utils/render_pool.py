@@ -0,0 +1,196 @@
+# auto-research-agent/utils/render_pool.py
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+class RenderError(Exception):
+    """A render job failed, or its worker process crashed."""
+
+class RenderTimeout(RenderError):
+    """A render job did not finish within its timeout."""
+
+# Set in each worker process by _init_worker
+_worker_renderer = None
+
+def _init_worker(template_dir: str, template_name: str) -> None:
+    global _worker_renderer
+    from utils.pdf_generator import ReportRenderer
+    _worker_renderer = ReportRenderer(template_dir, template_name)
+
+def _ping() -> bool:
+    return _worker_renderer is not None
+
+def _render_report(data: dict, output_path: str | None) -> bytes | str:
+    """Runs in a worker: writes the PDF to output_path (returning it) or returns the bytes."""
+    if output_path:
+        _worker_renderer.render_to_file(data, output_path)
+        return output_path
+    return _worker_renderer.render_to_bytes(data)
+
+class RenderPool:
+    """
+    Renders report PDFs in a pool of worker processes.
+
+    ReportLab layout is pure Python and holds the GIL, so concurrent reports
+    rendered on threads run one at a time. Worker processes each hold their own
+    ReportRenderer, so rendering scales with the number of cores. Only the
+    insights dict goes to a worker; the PDF comes back as bytes, or is written
+    by the worker straight to a path.
+
+    Workers are started with the "spawn" method (forking a threaded server is
+    unsafe). A job that times out or whose worker dies gets a RenderError and
+    new jobs go to a fresh pool. After a timeout, the other jobs running on the
+    old pool may finish (each within its own timeout) before its processes,
+    the hung one included, are killed. Jobs cut off by a crash or by that kill
+    are retried once on the new pool.
+    """
+    def __init__(self, template_dir: str, template_name: str, max_workers: int, timeout: float | None = None):
+        self.template_dir = template_dir
+        self.template_name = template_name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = self._new_executor()
+        # Pool -> {unfinished future: its deadline}, so a replaced pool can let them finish
+        self._jobs: dict[ProcessPoolExecutor, dict] = {}
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.template_dir, self.template_name),
+        )
+
+    def warm_up(self) -> None:
+        """Starts every worker process now so the first reports do not pay for it."""
+        futures = [self._executor.submit(_ping) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+        print(f"RenderPool: {self.max_workers} render processes ready.")
+
+    def render(self, data: dict, output_path: str | None = None, timeout: float | None = None) -> bytes | str:
+        """
+        Renders a report in a worker process.
+
+        Args:
+            data: The report insights.
+            output_path: If given, the worker writes the PDF there and the path is
+                returned; otherwise the PDF bytes are returned.
+            timeout: Seconds to wait (defaults to the pool's timeout).
+
+        Raises:
+            RenderTimeout: If the render took longer than the timeout.
+            RenderError: If rendering raised or the worker process crashed.
+        """
+        return self.call(_render_report, data, output_path, timeout=timeout)
+
+    def call(self, func, *args, timeout: float | None = None):
+        """Runs a picklable module-level function in a worker, with the render pool's isolation."""
+        timeout = timeout if timeout is not None else self.timeout
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                future = executor.submit(func, *args)
+            except BrokenProcessPool:
+                self._replace(executor, "broken pool")
+                continue
+            except RuntimeError as e:
+                raise RenderError(f"Render pool unavailable: {e}") from e
+            self._track(executor, future, timeout)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                self._replace(executor, f"job exceeded {timeout}s", hung=future)
+                raise RenderTimeout(f"Rendering timed out after {timeout}s")
+            except CancelledError:
+                # Still queued when the pool was replaced
+                if attempt == 1:
+                    raise RenderError("Render pool was restarted")
+            except BrokenProcessPool:
+                # Our worker, or another job's, died; the pool is unusable either way
+                self._replace(executor, "worker process died")
+                if attempt == 1:
+                    raise RenderError("Render worker process crashed")
+            except Exception as e:
+                raise RenderError(f"Rendering failed: {type(e).__name__}: {e}") from e
+        raise RenderError("Render worker process crashed")
+
+    def _track(self, executor: ProcessPoolExecutor, future, timeout: float | None) -> None:
+        with self._lock:
+            jobs = self._jobs.setdefault(executor, {})
+            jobs[future] = time.monotonic() + timeout if timeout is not None else None
+
+        def forget(done) -> None:
+            with self._lock:
+                jobs.pop(done, None)
+
+        future.add_done_callback(forget)
+
+    def _replace(self, executor: ProcessPoolExecutor, reason: str, hung=None) -> None:
+        """
+        Swaps in a fresh pool (once per failed pool) and kills the old workers.
+        When a job hung (rather than the pool breaking), the old pool's other
+        jobs are allowed to finish first.
+        """
+        with self._lock:
+            if self._executor is not executor or self._closed:
+                return
+            print(f"RenderPool: Restarting render processes ({reason}).")
+            self._executor = self._new_executor()
+            self.restarts += 1
+            others = {f: deadline for f, deadline in self._jobs.pop(executor, {}).items() if f is not hung}
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        if hung is not None and others:
+            threading.Thread(target=self._retire, args=(others, processes),
+                             name="render-pool-retire", daemon=True).start()
+        else:
+            self._kill(processes)
+
+    def _retire(self, futures: dict, processes: list) -> None:
+        """Waits for the jobs (at most until their deadlines), then kills the old pool's processes."""
+        deadlines = list(futures.values())
+        timeout = None if None in deadlines else max(0.0, max(deadlines) - time.monotonic())
+        wait(list(futures), timeout=timeout)
+        self._kill(processes)
+
+    @staticmethod
+    def _kill(processes: list) -> None:
+        # A hung worker cannot be cancelled, only killed
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+        executor.shutdown(wait=True, cancel_futures=True)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_render_pool(template_dir: str, template_name: str, max_workers: int, timeout: float | None = None) -> RenderPool:
+    """Returns the process-wide render pool, creating and warming it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = RenderPool(template_dir, template_name, max_workers, timeout)
+                pool.warm_up()
+                _pool = pool
+    return _pool
+
+def close_render_pool() -> None:
+    """Stops the process-wide render pool (if one was started)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,285 @@
+# auto-research-agent/utils/report_store.py
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from utils.cache import LRUCache
+
+def build_view_data(insights: dict, filename: str | None) -> dict:
+    """Flattens report insights into the fields templates/report_template.html expects."""
+    insights = insights or {}
+    return {
+        "pdf_filename": filename,
+        "title": insights.get("title", "Research Report"),
+        "executive_summary": insights.get("executive_summary", ""),
+        "key_insights": insights.get("key_insights", []),
+        "source_analysis": insights.get("source_analysis", {"sentiment": "N/A", "confidence": "N/A"}),
+        "conclusion": insights.get("conclusion", ""),
+    }
+
+class SQLiteReportStore:
+    """
+    Keeps finished reports (view data and PDF) in a local SQLite file.
+
+    Report metadata and the PDF blob live in separate tables, so listing and
+    viewing never read PDF bytes. Recently used metadata and PDFs are kept in
+    in-process LRU caches. Reports older than `max_age_seconds` are removed,
+    and the oldest reports are evicted while the stored PDFs exceed
+    `max_total_bytes`; both checks run after every save. For incremental
+    refreshes, the per-source content hashes behind the latest report for each
+    request are kept too (and go away with that report).
+
+    A single connection is shared by all threads and guarded by a lock.
+    """
+    def __init__(
+        self,
+        db_path: str,
+        max_age_seconds: float = 7 * 86400,
+        max_total_bytes: int = 1024 * 1024 * 1024,
+        cache_entries: int = 128,
+        cache_max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self._meta_cache = LRUCache(max_entries=cache_entries, ttl_seconds=max_age_seconds)
+        self._pdf_cache = LRUCache(max_entries=cache_entries, max_bytes=cache_max_bytes,
+                                   ttl_seconds=max_age_seconds, sizeof=len)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reports (
+                    id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    filename TEXT NOT NULL UNIQUE,
+                    created_at REAL NOT NULL,
+                    pdf_size INTEGER NOT NULL DEFAULT 0,
+                    report_url TEXT,
+                    view TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS report_pdfs (
+                    id TEXT PRIMARY KEY REFERENCES reports(id) ON DELETE CASCADE,
+                    pdf BLOB NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS report_sources (
+                    request_key TEXT PRIMARY KEY,
+                    report_id TEXT NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+                    sources TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS reports_query ON reports (query)")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        report = dict(row)
+        report["view"] = json.loads(report["view"])
+        report["has_pdf"] = report["pdf_size"] > 0
+        return report
+
+    def save(
+        self,
+        query: str,
+        filename: str,
+        insights: dict,
+        pdf_bytes: bytes | None = None,
+        report_url: str | None = None,
+    ) -> str:
+        """
+        Stores a finished report and returns its id.
+
+        A report saved under an existing filename replaces the earlier one, as
+        the PDF in GCS would be overwritten too.
+        """
+        report_id = uuid.uuid4().hex
+        view = build_view_data(insights, filename)
+        with self._lock, self._conn:
+            replaced = self._conn.execute("SELECT id FROM reports WHERE filename = ?", (filename,)).fetchone()
+            if replaced:
+                self._conn.execute("DELETE FROM reports WHERE id = ?", (replaced["id"],))
+            self._conn.execute(
+                "INSERT INTO reports (id, query, filename, created_at, pdf_size, report_url, view) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (report_id, query, filename, time.time(), len(pdf_bytes or b""), report_url, json.dumps(view)),
+            )
+            if pdf_bytes:
+                self._conn.execute("INSERT INTO report_pdfs (id, pdf) VALUES (?, ?)", (report_id, pdf_bytes))
+        if replaced:
+            self._meta_cache.delete(replaced["id"])
+            self._pdf_cache.delete(replaced["id"])
+        if pdf_bytes:
+            self._pdf_cache.set(report_id, pdf_bytes)
+        self.prune()
+        return report_id
+
+    def set_report_url(self, report_id: str, report_url: str) -> None:
+        """Records the public URL once delivery has finished."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE reports SET report_url = ? WHERE id = ?", (report_url, report_id))
+        self._meta_cache.delete(report_id)
+
+    def get(self, report_id: str) -> dict | None:
+        """Returns a report's metadata and view data (no PDF bytes), or None."""
+        report = self._meta_cache.get(report_id)
+        if report is not None:
+            return report
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if row is None:
+            return None
+        report = self._to_dict(row)
+        self._meta_cache.set(report_id, report)
+        return report
+
+    def find_by_filename(self, filename: str) -> dict | None:
+        """Looks a report up by its PDF filename (used by /view and /download links)."""
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM reports WHERE filename = ?", (filename,)).fetchone()
+        return self.get(row["id"]) if row else None
+
+    def get_pdf(self, report_id: str) -> bytes | None:
+        """Returns the stored PDF bytes, or None."""
+        pdf = self._pdf_cache.get(report_id)
+        if pdf is not None:
+            return pdf
+        with self._lock:
+            row = self._conn.execute("SELECT pdf FROM report_pdfs WHERE id = ?", (report_id,)).fetchone()
+        if row is None:
+            return None
+        pdf = bytes(row["pdf"])
+        self._pdf_cache.set(report_id, pdf)
+        return pdf
+
+    def set_source_hashes(self, request_key: str, report_id: str, sources: dict[str, str]) -> None:
+        """Records the source id -> content hash map the report was built from, replacing earlier ones."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO report_sources (request_key, report_id, sources, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (request_key, report_id, json.dumps(sources), time.time()),
+            )
+
+    def get_source_hashes(self, request_key: str) -> dict | None:
+        """Returns {"report_id", "sources", "updated_at"} for the request's latest report, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report_id, sources, updated_at FROM report_sources WHERE request_key = ?", (request_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"report_id": row["report_id"], "sources": json.loads(row["sources"]), "updated_at": row["updated_at"]}
+
+    def list_reports(self, limit: int = 20, offset: int = 0, query: str | None = None) -> dict:
+        """
+        Lists reports newest first.
+
+        Args:
+            limit: Page size.
+            offset: Number of reports to skip.
+            query: Optional case-insensitive substring filter on the query.
+
+        Returns:
+            {"reports": [...], "total": N} where each report has its metadata and title.
+        """
+        where, params = "", []
+        if query:
+            where, params = "WHERE query LIKE ? ESCAPE '\\'", [
+                "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            ]
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM reports {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, query, filename, created_at, pdf_size, report_url, "
+                f"json_extract(view, '$.title') AS title FROM reports {where} "
+                f"ORDER BY created_at DESC, id LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return {"reports": [dict(row) for row in rows], "total": total}
+
+    def delete(self, report_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+        self._meta_cache.delete(report_id)
+        self._pdf_cache.delete(report_id)
+
+    def prune(self, now: float | None = None) -> int:
+        """Removes expired reports, then the oldest ones while over the size limit. Returns how many."""
+        now = now if now is not None else time.time()
+        evicted = []
+        with self._lock, self._conn:
+            cutoff = now - self.max_age_seconds
+            evicted += [row["id"] for row in self._conn.execute(
+                "SELECT id FROM reports WHERE created_at < ?", (cutoff,))]
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(pdf_size), 0) FROM reports WHERE created_at >= ?", (cutoff,)
+            ).fetchone()[0]
+            if total > self.max_total_bytes:
+                for row in self._conn.execute(
+                    "SELECT id, pdf_size FROM reports WHERE created_at >= ? ORDER BY created_at, id", (cutoff,)
+                ).fetchall():
+                    if total <= self.max_total_bytes:
+                        break
+                    evicted.append(row["id"])
+                    total -= row["pdf_size"]
+            self._conn.executemany("DELETE FROM reports WHERE id = ?", [(report_id,) for report_id in evicted])
+        for report_id in evicted:
+            self._meta_cache.delete(report_id)
+            self._pdf_cache.delete(report_id)
+        if evicted:
+            print(f"ReportStore: Evicted {len(evicted)} report(s).")
+        return len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) AS reports, COALESCE(SUM(pdf_size), 0) AS bytes FROM reports").fetchone()
+        return {
+            "reports": row["reports"],
+            "pdf_bytes": row["bytes"],
+            "metadata_cache": self._meta_cache.info(),
+            "pdf_cache": self._pdf_cache.info(),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_report_store() -> SQLiteReportStore:
+    """Returns the process-wide report store configured from REPORT_STORE_* settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from config import (
+                    REPORT_STORE_PATH,
+                    REPORT_STORE_MAX_AGE_SECONDS,
+                    REPORT_STORE_MAX_BYTES,
+                    REPORT_STORE_CACHE_ENTRIES,
+                    REPORT_STORE_CACHE_MAX_BYTES,
+                )
+                _store = SQLiteReportStore(
+                    REPORT_STORE_PATH,
+                    max_age_seconds=REPORT_STORE_MAX_AGE_SECONDS,
+                    max_total_bytes=REPORT_STORE_MAX_BYTES,
+                    cache_entries=REPORT_STORE_CACHE_ENTRIES,
+                    cache_max_bytes=REPORT_STORE_CACHE_MAX_BYTES,
+                )
+    return _store